@@ -0,0 +1,112 @@
+"""
+Legal action generation for Flip Out! - The Mood Swing Card Game
+Every action is an index into one fixed-length action space, so AI search
+and batch simulators can share boolean masks instead of re-deriving
+legality card by card
+"""
+
+from constants import *
+from card import CARD_IDS, NUM_CARD_TYPES, WILD_MOOD_ID
+from game_logic import BLOCKED_SWING_TYPES
+
+NUM_MOODS = len(MOOD_TYPES)
+NUM_SWING_TYPES = len(SWING_CARD_TYPES)
+
+# Action space layout
+DRAW = 0            # Draw the top card of the deck
+PASS = 1            # Skip the optional play or discard, or a draw from an exhausted deck
+PLAY_MOOD = 2       # + mood id: play a mood card to the player's own collection
+PLAY_SWING = PLAY_MOOD + NUM_MOODS  # + swing index * MAX_PLAYERS + target seat
+DISCARD = PLAY_SWING + NUM_SWING_TYPES * MAX_PLAYERS  # + card id
+ACTION_COUNT = DISCARD + NUM_CARD_TYPES
+
+BLOCKED_SWING_IDS = [CARD_IDS[card_type] for card_type in BLOCKED_SWING_TYPES]
+
+def play_swing_action(card_id, target_seat):
+    """Get the action index for playing a swing card at a seat (wild moods target their owner)"""
+    return PLAY_SWING + (card_id - NUM_MOODS) * MAX_PLAYERS + target_seat
+
+def decode_action(action):
+    """Split an action index into (kind, card_id, target_seat)"""
+    if action == DRAW:
+        return 'draw', None, None
+    if action == PASS:
+        return 'pass', None, None
+    if action < PLAY_SWING:
+        return 'play_mood', action - PLAY_MOOD, None
+    if action < DISCARD:
+        swing_index, target_seat = divmod(action - PLAY_SWING, MAX_PLAYERS)
+        return 'play_swing', NUM_MOODS + swing_index, target_seat
+    return 'discard', action - DISCARD, None
+
+def card_actions(card_id, seat, num_players, blocked):
+    """Get the play actions one card type allows"""
+    if card_id < NUM_MOODS:
+        return [PLAY_MOOD + card_id]
+    if card_id == WILD_MOOD_ID:
+        return [play_swing_action(card_id, seat)]
+    if blocked and card_id in BLOCKED_SWING_IDS:
+        return []
+    return [play_swing_action(card_id, target) for target in range(num_players) if target != seat]
+
+class ActionMaskCache:
+    """Per-player play and discard masks, patched only where hand counts changed"""
+
+    def __init__(self):
+        self.entries = {}  # seat -> [pile, version, counts, blocked, num_players, play, discard]
+
+    def masks(self, hand, seat, num_players, blocked):
+        """Get (play_mask, discard_mask) bytearrays for a hand"""
+        entry = self.entries.get(seat)
+        if entry is None or entry[3] != blocked or entry[4] != num_players:
+            entry = [None, -1, [0] * NUM_CARD_TYPES, blocked, num_players,
+                     bytearray(ACTION_COUNT), bytearray(ACTION_COUNT)]
+            self.entries[seat] = entry
+        if entry[0] is hand and entry[1] == hand.version:
+            return entry[5], entry[6]
+
+        # Only card types whose counts changed need their mask entries rewritten
+        counts, play, discard = entry[2], entry[5], entry[6]
+        for card_id in range(NUM_CARD_TYPES):
+            held = hand.counts[card_id] > 0
+            if held == (counts[card_id] > 0):
+                continue
+            for action in card_actions(card_id, seat, num_players, blocked):
+                play[action] = held
+            discard[DISCARD + card_id] = held
+        entry[0], entry[1], entry[2] = hand, hand.version, list(hand.counts)
+        return play, discard
+
+    def invalidate(self, seat=None):
+        """Forget cached masks for one seat, or for every seat"""
+        if seat is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(seat, None)
+
+def legal_action_mask(state, player, cache=None):
+    """Get the fixed-length legal action mask for a player as a bytearray of 0/1"""
+    seat = state.players.index(player)
+    phase = state.turn_phase
+    if phase == 'draw':
+        mask = bytearray(ACTION_COUNT)
+        if state.deck.is_exhausted():
+            mask[PASS] = 1
+        else:
+            mask[DRAW] = 1
+        return mask
+
+    if cache is None:
+        cache = ActionMaskCache()
+    play, discard = cache.masks(player.hand, seat, len(state.players), player.blocked_until > 0)
+    mask = bytearray(play if phase == 'play' else discard)
+    mask[PASS] = 1
+    return mask
+
+def legal_actions(state, player, cache=None):
+    """Get (action list, mask) of legal actions, following GameLogic.can_play_card
+
+    state is any game object with players, turn_phase and deck, such as HeadlessGame
+    """
+    mask = legal_action_mask(state, player, cache)
+    return [action for action in range(ACTION_COUNT) if mask[action]], mask
@@ -0,0 +1,166 @@
+"""
+Background AI worker for Flip Out! - The Mood Swing Card Game
+The game window hands the worker a SearchState snapshot and gets a Future
+back, so AI search runs in another process while the render loop keeps
+animating. When the AI's move is due the search is interrupted and
+returns its best move so far; only if even that does not arrive in time
+does the window play a quick fallback move.
+
+While a human player thinks, the worker can ponder: it searches the
+position from the next AI's point of view, over the likely outcomes of the
+human's move. The worker's transposition table keeps those results, so the
+AI's own search starts from the pondered subtree and can answer at once
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from constants import *
+from card import WILD_MOOD_ID
+from actions import PASS, PLAY_MOOD, DISCARD, play_swing_action
+from ismcts import ISMCTS, difficulty_budget
+from search_state import MOOD_SLOTS
+
+NUM_MOODS = len(MOOD_TYPES)
+INTERRUPT_GRACE = 0.05  # Seconds to wait for an interrupted search's best move
+DEFAULT_PONDER_TIME = 30.0  # Longest a ponder search runs when nothing interrupts it
+PONDER_EXPLORATION = 0.25  # Chance a pondered opponent move is any legal move, not the likely one
+
+_search = None  # One ISMCTS per worker, so its transposition table carries over between moves
+_stop_ticket = None  # Shared counter set by the window; tasks with a ticket up to it stop
+
+def init_worker(stop_ticket):
+    """Keep the window's shared stop counter in a newly started worker"""
+    global _stop_ticket
+    _stop_ticket = stop_ticket
+
+def search_task(state, seat, budget, ticket=0):
+    """Search a position in the worker and return the chosen action"""
+    global _search
+    if _search is None:
+        _search = ISMCTS()
+    state.rng = _search.rng
+    _search.set_root(state, seat)
+    should_stop = None
+    if _stop_ticket is not None:
+        should_stop = lambda: _stop_ticket.value >= ticket
+    return _search.search_budget(budget, should_stop)
+
+def ponder_task(state, seat, budget, ticket=0):
+    """Search seat's likely positions after another player's turn; return the iterations run"""
+    global _search
+    if _search is None:
+        _search = ISMCTS()
+    state.rng = _search.rng
+    _search.set_budget(budget)
+    should_stop = None
+    if _stop_ticket is not None:
+        should_stop = lambda: _stop_ticket.value >= ticket
+    return _search.ponder(state, seat, likely_action, budget['time'], should_stop)
+
+def fallback_action(state):
+    """Pick a move without searching: play a missing mood, else a wild, else discard a spare mood"""
+    seat = state.current
+    legal = state.legal_actions()
+    hand = state.hand_counts(seat)
+    moods = state.moods[seat * MOOD_SLOTS:(seat + 1) * MOOD_SLOTS]
+    if state.phase == 'play':
+        for mood in range(NUM_MOODS):
+            if hand[mood] and not moods[mood] and PLAY_MOOD + mood in legal:
+                return PLAY_MOOD + mood
+        wild = play_swing_action(WILD_MOOD_ID, seat)
+        if wild in legal and state.moods_needed(seat) > 0:
+            return wild
+    elif state.phase == 'discard':
+        for mood in range(NUM_MOODS):
+            if hand[mood] and moods[mood]:
+                return DISCARD + mood
+    return PASS if PASS in legal else legal[0]
+
+def likely_action(state):
+    """Guess another player's move: usually the fallback move, sometimes any legal move"""
+    if state.rng.random() < PONDER_EXPLORATION:
+        return state.rng.choice(state.legal_actions())
+    return fallback_action(state)
+
+class AIWorker:
+    """Runs AI searches off the render loop and hands results back through futures"""
+
+    def __init__(self, use_processes=True):
+        self.use_processes = use_processes
+        self.executor = None
+        self.stop_ticket = None
+        self.tickets = 0  # Tickets handed to tasks so far; interrupt() stops them all
+        self.ponder_future = None
+
+    def start(self):
+        """Create the worker; it also starts on the first submit"""
+        if self.executor is None:
+            # A ticket counter rather than an event, so an interrupt can never be
+            # cleared before the search it was meant for has seen it
+            self.stop_ticket = multiprocessing.Value('q', 0, lock=False)
+            executor = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+            self.executor = executor(max_workers=1, initializer=init_worker,
+                                     initargs=(self.stop_ticket,))
+
+    def submit(self, state, seat=None, budget=None):
+        """Start searching a SearchState snapshot; return a Future of the action
+
+        budget defaults to the current difficulty's (see ismcts.difficulty_budget).
+        Any pondering stops first
+        """
+        self.start()
+        self.stop_pondering()
+        self.tickets += 1
+        return self.executor.submit(search_task, state, state.current if seat is None else seat,
+                                    budget or difficulty_budget(), self.tickets)
+
+    def ponder(self, state, seat, budget=None, ponder_time=DEFAULT_PONDER_TIME):
+        """Search another player's turn for seat until interrupted; return a Future
+
+        The results stay in the worker's table, where seat's next search finds
+        them. The next submit() or ponder() stops the pondering
+        """
+        self.start()
+        self.stop_pondering()
+        budget = dict(budget or difficulty_budget(), time=ponder_time)
+        self.tickets += 1
+        self.ponder_future = self.executor.submit(ponder_task, state, seat, budget, self.tickets)
+        return self.ponder_future
+
+    def stop_pondering(self):
+        """Interrupt pondering, if any; its results are kept"""
+        if self.ponder_future is not None:
+            if not self.ponder_future.done():
+                self.interrupt()
+            self.ponder_future = None
+
+    def interrupt(self):
+        """Ask the running search to stop and return its best move so far"""
+        if self.stop_ticket is not None:
+            self.stop_ticket.value = self.tickets
+
+    def result(self, future, state, grace=INTERRUPT_GRACE):
+        """Get the search's action, interrupting it if it is still running
+
+        Falls back to a quick move if the interrupted search does not answer
+        within grace seconds. Returns (action, searched)
+        """
+        if future is not None and not future.done():
+            self.interrupt()
+            wait([future], timeout=grace)
+        if future is not None and future.done() and not future.cancelled() \
+                and future.exception() is None:
+            action = future.result()
+            if action in state.legal_actions():
+                return action, True
+        if future is not None:
+            future.cancel()
+        return fallback_action(state), False
+
+    def shutdown(self):
+        """Stop the worker, abandoning queued searches"""
+        if self.executor is not None:
+            self.interrupt()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+            self.ponder_future = None
@@ -0,0 +1,214 @@
+"""
+NumPy lockstep batch simulator for Flip Out! - The Mood Swing Card Game
+Keeps thousands of games in struct-of-arrays form and advances every
+unfinished game by one turn per vectorized step
+"""
+
+import time
+import numpy as np
+from constants import *
+from card import CARD_IDS, NUM_CARD_TYPES
+from engine import MAX_TURNS
+from game_config import BALANCE_SETTINGS
+
+# Card type ids shared with the object engine's cards
+NUM_MOODS = len(MOOD_TYPES)
+STEAL_MOOD = CARD_IDS['steal_mood']
+SWAP_HANDS = CARD_IDS['swap_hands']
+BLOCK_MOOD = CARD_IDS['block_mood']
+DOUBLE_TROUBLE = CARD_IDS['double_trouble']
+WILD_MOOD = CARD_IDS['wild_mood']
+
+# Mood area slots: one per mood plus a final slot for played wild moods
+WILD_SLOT = NUM_MOODS
+BLOCK_TURNS = 2
+
+def standard_composition():
+    """Get the number of copies of each card type in a standard Deck"""
+    return np.array([DECK_MOOD_COPIES] * NUM_MOODS + [DECK_SWING_COPIES] * len(SWING_CARD_TYPES),
+                    dtype=np.int16)
+
+def sample_weighted(rng, counts):
+    """Pick one slot per row with probability proportional to its count (-1 if empty)"""
+    cumulative = counts.cumsum(axis=1)
+    total = cumulative[:, -1]
+    draws = (rng.random(len(counts)) * total).astype(np.int64)
+    picks = (cumulative <= draws[:, None]).sum(axis=1)
+    return np.where(total > 0, picks, -1)
+
+class BatchSimulator:
+    """Runs many random-policy games in lockstep using NumPy arrays"""
+
+    def __init__(self, num_games, num_players=4, seed=None, max_turns=MAX_TURNS,
+                 composition=None, reshuffle_discards=None):
+        self.num_games = num_games
+        self.num_players = num_players
+        self.max_turns = max_turns
+        if reshuffle_discards is None:
+            reshuffle_discards = BALANCE_SETTINGS['reshuffle_discards']
+        self.reshuffle_discards = reshuffle_discards
+        self.rng = np.random.default_rng(seed)
+        if composition is None:
+            composition = standard_composition()
+        self.composition = np.asarray(composition, dtype=np.int16)
+
+        G, P = num_games, num_players
+        deck_cards = np.repeat(np.arange(NUM_CARD_TYPES, dtype=np.int8), self.composition)
+        self.deck = self.rng.permuted(np.tile(deck_cards, (G, 1)), axis=1)
+        self.deck_size = len(deck_cards)
+        self.deck_template = deck_cards
+        # Position of each template slot among the slots of the same card type
+        starts = np.repeat(np.cumsum(self.composition) - self.composition, self.composition)
+        self.slot_ranks = np.arange(self.deck_size) - starts
+        self.deck_top = np.zeros(G, dtype=np.int32)
+
+        self.hands = np.zeros((G, P, NUM_CARD_TYPES), dtype=np.int16)
+        self.moods = np.zeros((G, P, NUM_MOODS + 1), dtype=np.int16)
+        self.discards = np.zeros((G, NUM_CARD_TYPES), dtype=np.int16)
+        self.blocked = np.zeros((G, P), dtype=np.int8)
+        self.current = np.zeros(G, dtype=np.int32)
+        self.turns = np.zeros(G, dtype=np.int32)
+        self.winner = np.full(G, -1, dtype=np.int32)
+        self.active = np.ones(G, dtype=bool)
+
+        self.deal_initial_cards()
+
+    def deal_initial_cards(self):
+        """Deal the starting hand to every player of every game"""
+        games = np.arange(self.num_games)
+        for player in range(self.num_players):
+            for _ in range(CARDS_PER_HAND):
+                self.draw(games, np.full(self.num_games, player))
+
+    def recycle_discards(self, games):
+        """Shuffle each listed game's discard pile back in as its new deck"""
+        discards = self.discards[games]
+        in_pile = self.slot_ranks < discards[:, self.deck_template]
+        # Random keys sort recycled cards to the end of the row in random order
+        keys = np.where(in_pile, self.rng.random(in_pile.shape), -1.0)
+        self.deck[games] = self.deck_template[np.argsort(keys, axis=1)]
+        self.deck_top[games] = self.deck_size - discards.sum(axis=1)
+        self.discards[games] = 0
+
+    def draw(self, games, players):
+        """Move the top deck card into each listed player's hand"""
+        if self.reshuffle_discards:
+            empty = games[self.deck_top[games] >= self.deck_size]
+            if len(empty):
+                self.recycle_discards(empty)
+        has_cards = self.deck_top[games] < self.deck_size
+        games, players = games[has_cards], players[has_cards]
+        cards = self.deck[games, self.deck_top[games]]
+        self.hands[games, players, cards] += 1
+        self.deck_top[games] += 1
+
+    def play(self, games, players):
+        """Play one random playable card per game, mirroring GameLogic rules"""
+        playable = self.hands[games, players].copy()
+        blocked = self.blocked[games, players] > 0
+        playable[blocked, STEAL_MOOD] = 0
+        playable[blocked, DOUBLE_TROUBLE] = 0
+
+        cards = sample_weighted(self.rng, playable)
+        played = cards >= 0
+        games, players, cards = games[played], players[played], cards[played]
+        self.hands[games, players, cards] -= 1
+
+        offsets = self.rng.integers(1, self.num_players, size=len(games))
+        targets = (players + offsets) % self.num_players
+
+        is_mood = cards < NUM_MOODS
+        self.moods[games[is_mood], players[is_mood], cards[is_mood]] += 1
+
+        is_wild = cards == WILD_MOOD
+        self.moods[games[is_wild], players[is_wild], WILD_SLOT] += 1
+
+        is_discarded = ~(is_mood | is_wild)
+        self.discards[games[is_discarded], cards[is_discarded]] += 1
+
+        steal = cards == STEAL_MOOD
+        g, p, t = games[steal], players[steal], targets[steal]
+        stolen = sample_weighted(self.rng, self.hands[g, t])
+        ok = stolen >= 0
+        self.hands[g[ok], t[ok], stolen[ok]] -= 1
+        self.hands[g[ok], p[ok], stolen[ok]] += 1
+
+        swap = cards == SWAP_HANDS
+        g, p, t = games[swap], players[swap], targets[swap]
+        own_hands = self.hands[g, p].copy()
+        self.hands[g, p] = self.hands[g, t]
+        self.hands[g, t] = own_hands
+
+        block = cards == BLOCK_MOOD
+        self.blocked[games[block], targets[block]] = BLOCK_TURNS
+
+        double = cards == DOUBLE_TROUBLE
+        g, t = games[double], targets[double]
+        lost = sample_weighted(self.rng, self.moods[g, t])
+        ok = lost >= 0
+        self.moods[g[ok], t[ok], lost[ok]] -= 1
+        lost_cards = np.where(lost[ok] == WILD_SLOT, WILD_MOOD, lost[ok])
+        np.add.at(self.discards, (g[ok], lost_cards), 1)
+
+    def check_winners(self, games, players):
+        """Record a winner where the current player has all five moods"""
+        moods = self.moods[games, players]
+        missing = (moods[:, :NUM_MOODS] == 0).sum(axis=1)
+        won = missing <= moods[:, WILD_SLOT]
+        self.winner[games[won]] = players[won]
+        return won
+
+    def discard(self, games, players):
+        """Discard one random card from each listed player's hand"""
+        cards = sample_weighted(self.rng, self.hands[games, players])
+        ok = cards >= 0
+        self.hands[games[ok], players[ok], cards[ok]] -= 1
+        self.discards[games[ok], cards[ok]] += 1
+
+    def step(self):
+        """Advance every unfinished game by one full turn"""
+        games = np.flatnonzero(self.active)
+        if len(games) == 0:
+            return 0
+        players = self.current[games]
+
+        self.draw(games, players)
+        self.play(games, players)
+        won = self.check_winners(games, players)
+        self.discard(games[~won], players[~won])
+
+        self.turns[games] += 1
+        next_players = (players + 1) % self.num_players
+        self.current[games] = next_players
+        blocked = self.blocked[games, next_players]
+        self.blocked[games, next_players] = np.maximum(blocked - 1, 0)
+
+        deck_empty = self.deck_top[games] >= self.deck_size
+        if self.reshuffle_discards:
+            deck_empty &= self.discards[games].sum(axis=1) == 0
+        hands_empty = self.hands[games].sum(axis=(1, 2)) == 0
+        finished = won | (self.turns[games] >= self.max_turns) | (deck_empty & hands_empty)
+        self.active[games[finished]] = False
+        return len(games)
+
+    def run(self):
+        """Play every game to completion and return summary statistics"""
+        start_time = time.perf_counter()
+        while self.step():
+            pass
+        elapsed = time.perf_counter() - start_time
+
+        has_winner = self.winner >= 0
+        return {
+            'games': self.num_games,
+            'wins': np.bincount(self.winner[has_winner], minlength=self.num_players).tolist(),
+            'draws': int((~has_winner).sum()),
+            'average_turns': float(self.turns.mean()) if self.num_games else 0.0,
+            'elapsed': elapsed,
+            'games_per_second': self.num_games / elapsed if elapsed > 0 else float('inf'),
+        }
+
+def run_batch(num_games, num_players=4, seed=None, max_turns=MAX_TURNS, reshuffle_discards=None):
+    """Simulate a batch of games in lockstep and collect statistics"""
+    return BatchSimulator(num_games, num_players, seed, max_turns,
+                          reshuffle_discards=reshuffle_discards).run()
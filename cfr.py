@@ -0,0 +1,352 @@
+"""
+Counterfactual regret minimization for Flip Out! - The Mood Swing Card Game
+Hidden hands and the steal/swap/block cards make this an imperfect-information
+game, where a search that assumes one deal of the hidden cards can be
+exploited. The trainer plays sampled self-play games over an abstraction of
+the game and drives the regret of every abstract decision towards zero. The
+average strategy it converges to is exported as a small table the AI looks
+up in O(1).
+
+An information set keeps what a player knows about their own progress and hand:
+  phase   - play or discard
+  needed  - moods still needed (the mood mask, up to relabeling moods)
+  held    - missing moods with a copy in hand: 0, 1 or 2+
+  wild, spare - a wild mood / an already-collected mood in hand
+  swings  - which of steal, swap, block and double trouble are in hand
+  blocked - whether the player is blocked
+  threat  - fewest moods any opponent needs: 1, 2 or 3+
+  deck    - deck size: 0-5, 6-15 or 16+ cards
+Abstract actions pick a kind of move. Targets and exact cards are chosen the
+way PriorityPolicy chooses them
+"""
+
+import os
+import random
+import numpy as np
+from constants import *
+from card import CARD_IDS, NUM_CARD_TYPES, WILD_MOOD_ID
+from actions import PASS, PLAY_MOOD, DISCARD, play_swing_action
+from engine import POLICIES, HeadlessGame
+from game_config import AI_SETTINGS
+from ismcts import LookupPolicy
+from search_state import SearchState, MOOD_SLOTS
+
+NUM_MOODS = len(MOOD_TYPES)
+STEAL_MOOD = CARD_IDS['steal_mood']
+SWAP_HANDS = CARD_IDS['swap_hands']
+BLOCK_MOOD = CARD_IDS['block_mood']
+DOUBLE_TROUBLE = CARD_IDS['double_trouble']
+SWING_IDS = [STEAL_MOOD, SWAP_HANDS, BLOCK_MOOD, DOUBLE_TROUBLE]  # Bit order of the swings mask
+BLOCKED_IDS = (STEAL_MOOD, DOUBLE_TROUBLE)
+
+# Abstract actions; the discard phase only uses the first four
+KEEP = 0            # Pass: play nothing, or keep the whole hand
+MISSING = 1         # Play a missing mood
+WILD = 2            # Play a wild mood
+SPARE = 1           # Discard phase: discard an already-collected mood
+SWING = 2           # Discard phase: discard the least useful swing card
+DISCARD_MISSING = 3  # Discard phase: discard a missing mood
+PLAY_SWINGS = 3     # + index into SWING_IDS
+NUM_ABSTRACT_ACTIONS = PLAY_SWINGS + len(SWING_IDS)
+
+# Information set layout: phase, needed - 1, held, wild, spare, swings, blocked, threat, deck
+ABSTRACT_SHAPE = (2, NUM_MOODS, 3, 2, 2, 1 << len(SWING_IDS), 2, 3, 3)
+NUM_INFO_SETS = int(np.prod(ABSTRACT_SHAPE))
+
+DEFAULT_HORIZON = 8  # Turns each sampled continuation plays before it is scored
+DEFAULT_BATCH_SIZE = 16  # Games sampled between vectorized regret updates
+DEFAULT_MAX_TURNS = 200
+DEFAULT_CHECKPOINT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                       'cfr_checkpoint.npz')
+DEFAULT_POLICY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cfr_policy.npy')
+
+def legal_table():
+    """Get the abstract actions legal in every information set, as a bool array"""
+    phase, _, held, wild, spare, swings, blocked, _, _ = np.indices(ABSTRACT_SHAPE)
+    play = phase == 0
+    legal = np.zeros(ABSTRACT_SHAPE + (NUM_ABSTRACT_ACTIONS,), dtype=bool)
+    legal[..., KEEP] = True
+    legal[..., MISSING] = np.where(play, held > 0, spare > 0)
+    legal[..., WILD] = np.where(play, wild > 0, swings > 0)
+    legal[..., DISCARD_MISSING] = ~play & (held > 0)
+    for bit, card_id in enumerate(SWING_IDS):
+        playable = play & ((swings >> bit) & 1 > 0)
+        if card_id in BLOCKED_IDS:
+            playable &= blocked == 0
+        legal[..., PLAY_SWINGS + bit] |= playable
+    return legal.reshape(NUM_INFO_SETS, NUM_ABSTRACT_ACTIONS)
+
+LEGAL = legal_table()
+
+def info_index(state, seat=None):
+    """Get the information set index of the player to move (play or discard phase)"""
+    seat = state.current if seat is None else seat
+    hands, moods = state.hands, state.moods
+    own, base = seat * NUM_CARD_TYPES, seat * MOOD_SLOTS
+    held = spare = 0
+    for mood in range(NUM_MOODS):
+        if hands[own + mood]:
+            if moods[base + mood]:
+                spare = 1
+            else:
+                held += 1
+    swings = 0
+    for bit, card_id in enumerate(SWING_IDS):
+        if hands[own + card_id]:
+            swings |= 1 << bit
+    threat = min(state.moods_needed(other) for other in range(state.num_players) if other != seat)
+    deck = len(state.deck)
+    index = 0 if state.phase == 'play' else 1
+    index = index * NUM_MOODS + max(state.moods_needed(seat), 1) - 1
+    index = index * 3 + min(held, 2)
+    index = index * 2 + (1 if hands[own + WILD_MOOD_ID] else 0)
+    index = index * 2 + spare
+    index = index * (1 << len(SWING_IDS)) + swings
+    index = index * 2 + (1 if state.blocked[seat] > 0 else 0)
+    index = index * 3 + min(max(threat, 1), 3) - 1
+    return index * 3 + (0 if deck <= 5 else 1 if deck <= 15 else 2)
+
+def choose_target(state, seat, card_id):
+    """Pick the opponent a swing card hurts the most, as PriorityPolicy does"""
+    opponents = [other for other in range(state.num_players) if other != seat]
+    if card_id in (STEAL_MOOD, SWAP_HANDS):
+        return max(opponents, key=lambda other: sum(state.hand_counts(other)))
+    return min(opponents, key=state.moods_needed)
+
+def concrete_action(state, abstract):
+    """Turn an abstract action into a legal action index for the player to move"""
+    if abstract == KEEP:
+        return PASS
+    seat = state.current
+    hand = state.hand_counts(seat)
+    moods = state.moods[seat * MOOD_SLOTS:(seat + 1) * MOOD_SLOTS]
+    if state.phase == 'play':
+        if abstract == MISSING:
+            return PLAY_MOOD + next(m for m in range(NUM_MOODS) if hand[m] and not moods[m])
+        if abstract == WILD:
+            return play_swing_action(WILD_MOOD_ID, seat)
+        card_id = SWING_IDS[abstract - PLAY_SWINGS]
+        return play_swing_action(card_id, choose_target(state, seat, card_id))
+    if abstract == SPARE:
+        return DISCARD + next(m for m in range(NUM_MOODS) if hand[m] and moods[m])
+    if abstract == SWING:
+        return DISCARD + max((card_id for card_id in SWING_IDS if hand[card_id]),
+                             key=swing_rank)
+    return DISCARD + next(m for m in range(NUM_MOODS) if hand[m] and not moods[m])
+
+def swing_rank(card_id):
+    """Rank a swing card by its position in AI_SETTINGS['card_priority'] (higher is less useful)"""
+    priority = AI_SETTINGS['card_priority']
+    card_type = SWING_CARD_TYPES[card_id - NUM_MOODS]
+    return priority.index(card_type) if card_type in priority else len(priority)
+
+def sample(row, rng):
+    """Pick an index with the probabilities in row"""
+    pick = rng.random()
+    last = 0
+    for action, probability in enumerate(row):
+        if probability > 0:
+            last = action
+            pick -= probability
+            if pick < 0:
+                return action
+    return last
+
+def horizon_value(state, seat):
+    """Score a position for one seat: 1 for a win, else a share of leading on moods needed"""
+    if state.winner >= 0:
+        return 1.0 if state.winner == seat else 0.0
+    needed = [state.moods_needed(other) for other in range(state.num_players)]
+    if needed[seat] != min(needed):
+        return 0.0
+    return 1.0 / needed.count(needed[seat])
+
+class CFRTrainer:
+    """Monte Carlo CFR over the abstract game, with regrets for every information set
+
+    Each game is sampled with the current strategy for every seat. At each
+    decision with a choice, every legal abstract action is tried on a copy of
+    the position and played on for horizon turns with the current strategy,
+    which samples its counterfactual value. Regret updates are gathered over
+    a batch of games and applied to the whole table with NumPy; regrets are
+    floored at zero and the average strategy is weighted by iteration, as in
+    CFR+
+    """
+
+    def __init__(self, num_players=4, seed=None, horizon=DEFAULT_HORIZON,
+                 batch_size=DEFAULT_BATCH_SIZE, max_turns=DEFAULT_MAX_TURNS):
+        self.num_players = num_players
+        self.rng = random.Random(seed)
+        self.horizon = horizon
+        self.batch_size = batch_size
+        self.max_turns = max_turns
+        self.regrets = np.zeros((NUM_INFO_SETS, NUM_ABSTRACT_ACTIONS))
+        self.strategy_sum = np.zeros((NUM_INFO_SETS, NUM_ABSTRACT_ACTIONS))
+        self.iterations = 0  # Batches applied
+        self.games = 0
+        self.strategy = None
+        self.strategy_rows = {}  # Python lists of strategy rows, filled as they are used
+        self.update_strategy()
+
+    def update_strategy(self):
+        """Regret matching for every information set at once"""
+        positive = np.maximum(self.regrets, 0.0) * LEGAL
+        totals = positive.sum(axis=1, keepdims=True)
+        uniform = LEGAL / LEGAL.sum(axis=1, keepdims=True)
+        self.strategy = np.where(totals > 0, positive / np.maximum(totals, 1e-12), uniform)
+        self.strategy_rows = {}
+
+    def strategy_row(self, index):
+        """Get an information set's current strategy as a list, cached until the next update"""
+        row = self.strategy_rows.get(index)
+        if row is None:
+            row = self.strategy_rows[index] = self.strategy[index].tolist()
+        return row
+
+    def act(self, state):
+        """Make the current strategy's move for the player to move"""
+        if state.phase == 'draw':
+            state.apply(state.legal_actions()[0])
+            return
+        abstract = sample(self.strategy_row(info_index(state)), self.rng)
+        state.apply(concrete_action(state, abstract))
+
+    def continuation_value(self, state, seat):
+        """Play on with the current strategy for horizon turns and score the result"""
+        limit = state.turns + self.horizon
+        while not state.is_terminal() and state.turns < limit:
+            self.act(state)
+        return horizon_value(state, seat)
+
+    def play_game(self, samples):
+        """Sample one self-play game, appending (index, values) for every decision with a choice"""
+        state = SearchState.from_game(HeadlessGame(self.num_players, seed=self.rng.random()))
+        state.rng = self.rng
+        state.max_turns = self.max_turns
+        while not state.is_terminal():
+            if state.phase == 'draw':
+                state.apply(state.legal_actions()[0])
+                continue
+            index = info_index(state)
+            legal = LEGAL[index]
+            if legal.sum() > 1:
+                values = np.zeros(NUM_ABSTRACT_ACTIONS)
+                for abstract in np.flatnonzero(legal):
+                    branch = state.clone()
+                    branch.apply(concrete_action(branch, abstract))
+                    values[abstract] = self.continuation_value(branch, state.current)
+                samples.append((index, values))
+            state.apply(concrete_action(state, sample(self.strategy_row(index), self.rng)))
+        self.games += 1
+
+    def apply_updates(self, samples):
+        """Add a batch of sampled regrets to the table and refresh the strategy"""
+        if not samples:
+            return
+        self.iterations += 1
+        indices = np.array([index for index, _ in samples])
+        values = np.array([row for _, row in samples])
+        strategy = self.strategy[indices]
+        expected = (strategy * values).sum(axis=1, keepdims=True)
+        np.add.at(self.regrets, indices, (values - expected) * LEGAL[indices])
+        np.maximum(self.regrets, 0.0, out=self.regrets)
+        np.add.at(self.strategy_sum, indices, strategy * self.iterations)
+        self.update_strategy()
+
+    def train(self, games, checkpoint_path=None, checkpoint_every=0):
+        """Play games self-play games, saving a checkpoint every checkpoint_every games"""
+        target = self.games + games
+        since_checkpoint = 0
+        while self.games < target:
+            samples = []
+            for _ in range(min(self.batch_size, target - self.games)):
+                self.play_game(samples)
+                since_checkpoint += 1
+            self.apply_updates(samples)
+            if checkpoint_path and checkpoint_every and since_checkpoint >= checkpoint_every:
+                self.save(checkpoint_path)
+                since_checkpoint = 0
+        if checkpoint_path:
+            self.save(checkpoint_path)
+
+    def save(self, path=DEFAULT_CHECKPOINT_PATH):
+        """Write regrets, strategy sums and counters, replacing any earlier checkpoint whole"""
+        temporary = path + '.tmp.npz'
+        np.savez_compressed(temporary, regrets=self.regrets, strategy_sum=self.strategy_sum,
+                            counters=np.array([self.iterations, self.games]),
+                            shape=np.array(ABSTRACT_SHAPE + (NUM_ABSTRACT_ACTIONS,)))
+        os.replace(temporary, path)
+
+    def load(self, path=DEFAULT_CHECKPOINT_PATH):
+        """Resume from a checkpoint written by save()"""
+        with np.load(path) as data:
+            if tuple(data['shape']) != ABSTRACT_SHAPE + (NUM_ABSTRACT_ACTIONS,):
+                raise ValueError(f"{path} was trained on a different abstraction")
+            self.regrets = data['regrets']
+            self.strategy_sum = data['strategy_sum']
+            self.iterations, self.games = (int(n) for n in data['counters'])
+        self.update_strategy()
+
+    def visited(self):
+        """Count the information sets that have a trained average strategy"""
+        return int(np.count_nonzero(self.strategy_sum.sum(axis=1)))
+
+    def policy_table(self):
+        """Get the average strategy as uint8 probabilities (x255), uniform where never visited"""
+        totals = self.strategy_sum.sum(axis=1, keepdims=True)
+        uniform = LEGAL / LEGAL.sum(axis=1, keepdims=True)
+        average = np.where(totals > 0, self.strategy_sum / np.maximum(totals, 1e-12), uniform)
+        return np.rint(average * 255).astype(np.uint8)
+
+def save_policy(table, path=DEFAULT_POLICY_PATH):
+    """Write an exported policy table for load_policy()"""
+    np.save(path, table)
+
+def load_policy(path=DEFAULT_POLICY_PATH):
+    """Load an exported policy table, or None if none has been trained"""
+    if not os.path.exists(path):
+        return None
+    return np.load(path)
+
+def table_action(table, state, rng=None):
+    """Look up the move for the player to move; the most likely one unless rng samples it"""
+    if state.phase == 'draw':
+        return state.legal_actions()[0]
+    row = table[info_index(state)]
+    if rng is None:
+        abstract = int(np.argmax(row))
+    else:
+        abstract = sample((row / max(int(row.sum()), 1)).tolist(), rng)
+    return concrete_action(state, abstract)
+
+class CFRPolicy(LookupPolicy):
+    """Engine policy that plays the exported CFR table, or PriorityPolicy moves without one"""
+    name = 'cfr'
+
+    def __init__(self, rng=None, table=None):
+        super().__init__(rng)
+        self.table = table if table is not None else load_policy()
+
+    @property
+    def ready(self):
+        return self.table is not None
+
+    def search(self, game):
+        """Look the move up instead of searching"""
+        state = SearchState.from_game(game)
+        state.rng = self.rng
+        return table_action(self.table, state)
+
+POLICIES[CFRPolicy.name] = CFRPolicy
+
+def train(games, num_players=4, seed=None, checkpoint_path=DEFAULT_CHECKPOINT_PATH,
+          policy_path=DEFAULT_POLICY_PATH, checkpoint_every=500, **options):
+    """Train from the checkpoint if there is one, then export the policy table"""
+    trainer = CFRTrainer(num_players, seed, **options)
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        trainer.load(checkpoint_path)
+    trainer.train(games, checkpoint_path, checkpoint_every)
+    table = trainer.policy_table()
+    if policy_path:
+        save_policy(table, policy_path)
+    return trainer, table
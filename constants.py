@@ -75,6 +75,12 @@ MAX_PLAYERS = 6
 MIN_PLAYERS = 2
 CARDS_PER_HAND = 5
 
+# Card types in a fixed order shared by the object and array engines
+MOOD_TYPES = list(MOOD_EMOJIS)
+SWING_CARD_TYPES = list(SWING_CARD_DESCRIPTIONS)
+DECK_MOOD_COPIES = 5   # Copies of each mood card in a standard deck
+DECK_SWING_COPIES = 3  # Copies of each mood swing card in a standard deck
+
 # Text rendering improvements
 TEXT_ANTIALIAS = True
 TEXT_SHADOW_OFFSET = 2
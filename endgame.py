@@ -0,0 +1,277 @@
+"""
+Retrograde endgame solver for Flip Out! - The Mood Swing Card Game
+Once the deck is small, every position reachable from the current one can
+be listed. The solver expands that graph forward, then sweeps it backwards
+until each position holds every player's exact win probability when all
+players play to maximize their own. Positions are keyed by their canonical
+form (moods relabeled, the player to move as seat 0, the deck as a
+multiset), so symmetric positions are solved once, and solved values can be
+kept on disk between runs.
+
+The model matches SearchState with open hands: cards drawn from the deck
+and cards taken by a steal are chance events, and double trouble removes
+the target's first collected mood. When the deck must be rebuilt from the
+discard pile the position is past the endgame horizon and is scored by who
+needs the fewest moods
+"""
+
+import os
+import random
+import shelve
+import time
+from constants import *
+from actions import DRAW, decode_action
+from card import CARD_IDS
+from search_state import SearchState
+from symmetry import canonical
+
+STEAL_MOOD = CARD_IDS['steal_mood']
+DEFAULT_MAX_DECK = 2  # Solve once the deck holds this many cards or fewer
+DEFAULT_MAX_POSITIONS = 20000  # Give up on positions whose graph is larger than this
+DEFAULT_MEMO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'endgame_memo')
+NO_TURN_LIMIT = 1 << 30
+TOLERANCE = 1e-9
+MAX_SWEEPS = 500
+
+def rotate(values, offset):
+    """Turn canonical-seat values back into the seats of a position canonicalized with offset"""
+    players = len(values)
+    return tuple(values[(seat - offset) % players] for seat in range(players))
+
+class EndgameSolver:
+    """Solves small-deck positions exactly and memoizes the results by canonical state"""
+
+    def __init__(self, max_deck=DEFAULT_MAX_DECK, max_positions=DEFAULT_MAX_POSITIONS,
+                 memo_path=None):
+        self.max_deck = max_deck
+        self.max_positions = max_positions
+        self.memo = {}  # canonical key -> win probability per canonical seat
+        self.disk = shelve.open(memo_path) if memo_path else None
+        self.too_large = set()  # Keys whose position graph exceeded max_positions
+        self.stats = {'attempted': 0, 'solved': 0, 'too_large': 0, 'timed_out': 0,
+                      'unconverged': 0, 'expanded': 0, 'memo_hits': 0}
+
+    def close(self):
+        """Flush and close the on-disk memo"""
+        if self.disk is not None:
+            self.disk.close()
+            self.disk = None
+
+    def report(self):
+        """Get solve rate and table size (positions memoized, on disk if open) statistics"""
+        attempted = self.stats['attempted']
+        table = self.disk if self.disk is not None else self.memo
+        return dict(self.stats, solve_rate=self.stats['solved'] / attempted if attempted else 0.0,
+                    table_size=len(table))
+
+    def lookup(self, key):
+        """Get a memoized canonical value, from memory or disk"""
+        value = self.memo.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(repr(key))
+            if value is not None:
+                self.memo[key] = value
+        if value is not None:
+            self.stats['memo_hits'] += 1
+        return value
+
+    def canonicalize(self, state):
+        """Get (canonical state, key, seat offset); the turn count is not part of a position
+
+        Whether discards are reshuffled changes the values but not the position,
+        so it is part of the key and a memo on disk can serve either setting
+        """
+        canon, symmetry = canonical(state, deck_order=False)
+        canon.turns = 0
+        canon.max_turns = NO_TURN_LIMIT
+        return canon, (canon.key(), canon.reshuffle_discards), symmetry.offset
+
+    def leaf_value(self, state):
+        """Get the fixed value of a finished or past-the-horizon position, else None"""
+        players = state.num_players
+        if state.winner >= 0:
+            return tuple(1.0 if seat == state.winner else 0.0 for seat in range(players))
+        if state.deck:
+            return None
+        if state.reshuffle_discards and any(state.discards):
+            if state.phase != 'draw':
+                return None
+            needed = [state.moods_needed(seat) for seat in range(players)]
+            leaders = [seat for seat in range(players) if needed[seat] == min(needed)]
+            return tuple(1.0 / len(leaders) if seat in leaders else 0.0 for seat in range(players))
+        if not any(state.hands):
+            return (0.0,) * players  # Nobody can ever win
+        return None
+
+    def outcomes(self, state):
+        """List (action, [(probability, next position)]) for every legal action"""
+        moves = []
+        for action in state.legal_actions():
+            if action == DRAW:
+                branch = []
+                deck_size = len(state.deck)
+                for card_id in sorted(set(state.deck)):
+                    child = state.clone()
+                    child.deck.remove(card_id)
+                    child.deck.append(card_id)  # The drawn card goes on top
+                    child.apply(DRAW)
+                    branch.append((state.deck.count(card_id) / deck_size, child))
+                moves.append((action, branch))
+                continue
+            kind, card_id, target = decode_action(action)
+            if state.phase == 'play' and kind == 'play_swing' and card_id == STEAL_MOOD:
+                hand = state.hand_counts(target)
+                total = sum(hand)
+                if total:
+                    branch = []
+                    for stolen, count in enumerate(hand):
+                        if count:
+                            child = state.clone()
+                            child.apply(action, stolen)
+                            branch.append((count / total, child))
+                    moves.append((action, branch))
+                    continue
+            child = state.clone()
+            child.apply(action)
+            moves.append((action, [(1.0, child)]))
+        return moves
+
+    def solve(self, state, deadline=None):
+        """Get every seat's win probability in a position, or None if it cannot be solved
+
+        Positions with more than max_deck cards in the deck, graphs larger than
+        max_positions and searches still running at deadline (a perf_counter
+        time) are not solved
+        """
+        if len(state.deck) > self.max_deck:
+            return None
+        leaf = self.leaf_value(state)
+        if leaf is not None:
+            return leaf
+        canon, key, offset = self.canonicalize(state)
+        value = self.lookup(key)
+        if value is None:
+            value = self.solve_canonical(canon, key, deadline)
+        return None if value is None else rotate(value, offset)
+
+    def solve_canonical(self, root, root_key, deadline):
+        """Expand a canonical position's graph and solve it by backward value sweeps"""
+        if root_key in self.too_large:
+            return None
+        self.stats['attempted'] += 1
+        players = root.num_players
+        index = {root_key: 0}
+        keys = [root_key]
+        positions = [root]
+        fixed = [None]  # Known values: finished, past the horizon or already memoized
+        edges = []  # Per position: per action, [(probability, child index, seat offset)]
+
+        expanded = 0
+        while expanded < len(positions):
+            if deadline is not None and time.perf_counter() > deadline:
+                self.stats['timed_out'] += 1
+                return None
+            if fixed[expanded] is not None:
+                edges.append(None)
+                expanded += 1
+                continue
+            moves = []
+            for _, branch in self.outcomes(positions[expanded]):
+                links = []
+                for probability, child in branch:
+                    canon, key, offset = self.canonicalize(child)
+                    child_index = index.get(key)
+                    if child_index is None:
+                        child_index = len(positions)
+                        if child_index >= self.max_positions:
+                            self.too_large.add(root_key)
+                            self.stats['too_large'] += 1
+                            return None
+                        index[key] = child_index
+                        keys.append(key)
+                        positions.append(canon)
+                        fixed.append(self.leaf_value(canon) or self.lookup(key))
+                    links.append((probability, child_index, offset))
+                moves.append(links)
+            edges.append(moves)
+            expanded += 1
+        self.stats['expanded'] += expanded
+
+        # Backward sweeps: the mover (canonical seat 0) picks the action best for itself
+        values = [value if value is not None else (0.0,) * players for value in fixed]
+        for _ in range(MAX_SWEEPS):
+            change = 0.0
+            for node in range(len(positions) - 1, -1, -1):
+                if fixed[node] is not None:
+                    continue
+                best = None
+                for links in edges[node]:
+                    expected = [0.0] * players
+                    for probability, child_index, offset in links:
+                        child_values = values[child_index]
+                        for seat in range(players):
+                            expected[(seat + offset) % players] += probability * child_values[seat]
+                    if best is None or expected[0] > best[0] + TOLERANCE:
+                        best = expected
+                old = values[node]
+                change = max(change, max(abs(a - b) for a, b in zip(old, best)))
+                values[node] = tuple(best)
+            if change < TOLERANCE:
+                break
+        else:
+            self.stats['unconverged'] += 1
+
+        for node, key in enumerate(keys):
+            if fixed[node] is None:
+                self.memo[key] = values[node]
+                if self.disk is not None:
+                    self.disk[repr(key)] = values[node]
+        self.stats['solved'] += 1
+        return values[0]
+
+    def best_action(self, state, deadline=None):
+        """Get the action with the best exact outcome for the player to move, or None"""
+        if self.solve(state, deadline) is None:
+            return None
+        seat = state.current
+        best_action, best_value = None, -1.0
+        for action, branch in self.outcomes(state):
+            expected = 0.0
+            for probability, child in branch:
+                value = self.solve(child, deadline)
+                if value is None:
+                    return None
+                expected += probability * value[seat]
+            if expected > best_value + TOLERANCE:
+                best_action, best_value = action, expected
+        return best_action
+
+def endgame_positions(count, max_deck=DEFAULT_MAX_DECK, num_players=4, seed=None):
+    """Play random games until the deck is small and collect those positions"""
+    from engine import HeadlessGame
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        state = SearchState.from_game(HeadlessGame(num_players, seed=rng.random()))
+        state.rng = rng
+        while not state.is_terminal() and (len(state.deck) > max_deck or state.phase != 'draw'):
+            state.apply(rng.choice(state.legal_actions()))
+        if not state.is_terminal():
+            positions.append(state)
+    return positions
+
+def survey(count, max_deck=DEFAULT_MAX_DECK, num_players=4, seed=None,
+           max_positions=DEFAULT_MAX_POSITIONS, memo_path=None):
+    """Try to solve count endgame positions and report solve rate, table size and speed"""
+    solver = EndgameSolver(max_deck, max_positions, memo_path)
+    positions = endgame_positions(count, max_deck, num_players, seed)
+    start = time.perf_counter()
+    try:
+        for state in positions:
+            solver.solve(state)
+        report = solver.report()
+    finally:
+        solver.close()
+    report['positions'] = count
+    report['elapsed'] = time.perf_counter() - start
+    return report
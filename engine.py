@@ -0,0 +1,291 @@
+"""
+Headless game engine for Flip Out! - The Mood Swing Card Game
+Plays complete games with no pygame window, no delays and no UI objects
+"""
+
+import importlib
+import random
+import time
+from constants import *
+from game_config import AI_SETTINGS, BALANCE_SETTINGS
+from card import CARD_KIND_MOOD, WILD_MOOD_ID
+from events import PHASE_CHANGED
+from game_logic import Deck, GameLogic
+from player import Player
+
+# Safety cap so a game that can no longer produce a winner always terminates
+MAX_TURNS = 500
+
+class RandomPolicy:
+    """Baseline AI: play a random playable card, then discard a random card"""
+    name = 'random'
+
+    def __init__(self, rng=None):
+        self.rng = rng or random.Random()
+
+    def choose_play(self, game, player):
+        """Pick (card_index, target_player) to play, or None to skip"""
+        playable = [i for i in range(len(player.hand))
+                    if game.logic.can_play_card(player, i)]
+        if not playable:
+            return None
+        card_index = self.rng.choice(playable)
+        opponents = [p for p in game.players if p is not player]
+        target = self.rng.choice(opponents) if opponents else None
+        return card_index, target
+
+    def choose_double_trouble(self, game, player, target_player):
+        """Pick which of the target's mood cards must be discarded"""
+        if not target_player.mood_cards:
+            return None
+        return self.rng.randrange(len(target_player.mood_cards))
+
+    def choose_discard(self, game, player):
+        """Pick a card index to discard, or None to keep the hand"""
+        if not player.hand:
+            return None
+        return self.rng.randrange(len(player.hand))
+
+class PriorityPolicy(RandomPolicy):
+    """Rule-based AI that follows AI_SETTINGS['card_priority']"""
+    name = 'priority'
+
+    def __init__(self, rng=None, card_priority=None):
+        super().__init__(rng)
+        self.card_priority = card_priority or AI_SETTINGS['card_priority']
+
+    def is_useful(self, game, player, card):
+        """Check if playing the card would help the player right now"""
+        if card.kind == CARD_KIND_MOOD:
+            return card.mood in player.get_missing_moods()
+        if card.card_type == 'wild_mood':
+            return player.get_moods_needed() > 0
+        if card.card_type == 'double_trouble':
+            return any(p.mood_cards for p in game.players if p is not player)
+        return True
+
+    def choose_target(self, game, player, card):
+        """Pick the opponent a swing card hurts the most"""
+        opponents = [p for p in game.players if p is not player]
+        if not opponents:
+            return None
+        if card.card_type in ('steal_mood', 'swap_hands'):
+            return max(opponents, key=lambda p: len(p.hand))
+        return min(opponents, key=lambda p: p.get_moods_needed())
+
+    def card_rank(self, card):
+        """Rank a card by its position in the priority list"""
+        key = 'mood' if card.kind == CARD_KIND_MOOD else card.card_type
+        if key in self.card_priority:
+            return self.card_priority.index(key)
+        return len(self.card_priority)
+
+    def choose_play(self, game, player):
+        """Play the highest-priority card that helps, or nothing"""
+        playable = [i for i in range(len(player.hand))
+                    if game.logic.can_play_card(player, i)
+                    and self.is_useful(game, player, player.hand[i])]
+        if not playable:
+            return None
+        card_index = min(playable, key=lambda i: self.card_rank(player.hand[i]))
+        card = player.hand[card_index]
+        target = None if card.kind == CARD_KIND_MOOD else self.choose_target(game, player, card)
+        return card_index, target
+
+    def choose_double_trouble(self, game, player, target_player):
+        """Make the target discard a mood they hold only one copy of"""
+        if not target_player.mood_cards:
+            return None
+        names = [card.name for card in target_player.mood_cards]
+        return min(range(len(names)), key=lambda i: names.count(names[i]))
+
+    def choose_discard(self, game, player):
+        """Discard a mood card the player has already collected"""
+        missing = player.get_missing_moods()
+        for i, card in enumerate(player.hand):
+            if card.kind == CARD_KIND_MOOD and card.mood not in missing:
+                return i
+        return None
+
+class PolicyRegistry(dict):
+    """AI policies by name; a policy defined in another module is imported on first use"""
+
+    def __init__(self, policies, modules):
+        super().__init__(policies)
+        self.modules = modules  # Policy name -> module that registers it when imported
+
+    def __missing__(self, name):
+        if name not in self.modules:
+            raise KeyError(name)
+        importlib.import_module(self.modules[name])
+        return dict.__getitem__(self, name)
+
+    def __contains__(self, name):
+        return dict.__contains__(self, name) or name in self.modules
+
+# AI policies available to tournaments, keyed by AI_SETTINGS name. Search and trained
+# policies pull in the endgame solver and NumPy, so they load only when asked for
+POLICIES = PolicyRegistry({
+    RandomPolicy.name: RandomPolicy,
+    PriorityPolicy.name: PriorityPolicy,
+}, {'ismcts': 'ismcts', 'cfr': 'cfr', 'network': 'selfplay'})
+
+class HeadlessGame:
+    """A complete game of Flip Out! driven by an iterative turn loop"""
+
+    def __init__(self, num_players=4, policies=None, seed=None, max_turns=MAX_TURNS,
+                 reshuffle_discards=None, events=None):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.max_turns = max_turns
+        self.events = events  # Optional EventBus shared by the whole game model
+        self.logic = GameLogic(rng=self.rng, events=events)
+        self.players = [Player(f"AI Player {i + 1}", is_ai=True, events=events)
+                        for i in range(num_players)]
+        if policies is None:
+            policies = [RandomPolicy(random.Random(self.rng.random())) for _ in range(num_players)]
+        self.policies = policies
+        if reshuffle_discards is None:
+            reshuffle_discards = BALANCE_SETTINGS['reshuffle_discards']
+        self.deck = Deck(self.rng, reshuffle_discards, events)
+        self.deck.shuffle()
+        self.discard_pile = self.deck.discard_pile
+        self.turn_phase = 'draw'  # draw, play, discard
+        self.turns_played = 0
+
+        self.deal_initial_cards()
+        self.logic.start_game(self.players)
+
+    def deal_initial_cards(self):
+        """Deal the starting hand to every player"""
+        for player in self.players:
+            for _ in range(CARDS_PER_HAND):
+                card = self.deck.draw()
+                if card:
+                    player.add_card_to_hand(card)
+
+    def current_seat(self):
+        """Get the seat index of the player whose turn it is"""
+        return self.logic.turn_order[self.logic.current_turn]
+
+    def set_turn_phase(self, phase):
+        """Change the turn phase and notify listeners"""
+        self.turn_phase = phase
+        if self.events is not None:
+            self.events.emit(PHASE_CHANGED, turn_phase=phase)
+
+    def is_over(self):
+        """Check if the game has a winner or can no longer progress"""
+        if self.logic.is_game_over() or self.turns_played >= self.max_turns:
+            return True
+        return self.deck.is_exhausted() and not any(p.hand for p in self.players)
+
+    def draw_phase(self, player):
+        """Draw one card from the deck"""
+        self.set_turn_phase('draw')
+        card = self.deck.draw()
+        if card:
+            player.add_card_to_hand(card)
+
+    def play_phase(self, player, policy):
+        """Let the policy play up to one card"""
+        self.set_turn_phase('play')
+        choice = policy.choose_play(self, player)
+        if choice is None:
+            return
+        card_index, target = choice
+        card = player.hand[card_index]
+
+        if card.kind == CARD_KIND_MOOD:
+            self.logic.play_mood_card(player, card_index)
+            return
+
+        success, _ = self.logic.play_swing_card(player, card_index, target)
+        if not success:
+            return
+        if card.card_id == WILD_MOOD_ID:
+            self.logic.resolve_wild_mood(player, card)
+            return
+        if card.card_type == 'double_trouble' and target is not None:
+            mood_index = policy.choose_double_trouble(self, player, target)
+            if mood_index is not None:
+                discarded = self.logic.resolve_double_trouble(target, mood_index)
+                if discarded:
+                    self.discard_pile.append(discarded)
+        self.discard_pile.append(card)
+
+    def discard_phase(self, player, policy):
+        """Let the policy discard up to one card"""
+        self.set_turn_phase('discard')
+        card_index = policy.choose_discard(self, player)
+        if card_index is not None:
+            card = player.remove_card_from_hand(card_index)
+            if card:
+                self.discard_pile.append(card)
+
+    def check_winner(self):
+        """End the game if any player has collected all five moods"""
+        for player in self.players:
+            if self.logic.check_win_condition(player):
+                self.logic.end_game(player)
+                return player
+        return None
+
+    def play_turn(self):
+        """Play one full draw/play/discard turn for the current player"""
+        seat = self.current_seat()
+        player = self.players[seat]
+        policy = self.policies[seat]
+
+        self.draw_phase(player)
+        self.play_phase(player, policy)
+        if not self.check_winner():
+            self.discard_phase(player, policy)
+
+        self.turns_played += 1
+        self.set_turn_phase('draw')
+        self.logic.next_turn()
+
+    def run(self):
+        """Play the game to completion and return a result summary"""
+        while not self.is_over():
+            self.play_turn()
+
+        winner = self.logic.winner
+        return {
+            'seed': self.seed,
+            'winner': self.players.index(winner) if winner else None,
+            'turns': self.turns_played,
+        }
+
+def play_game(seed=None, num_players=4, policies=None, max_turns=MAX_TURNS,
+              reshuffle_discards=None):
+    """Play a single headless game and return its result summary"""
+    return HeadlessGame(num_players, policies, seed, max_turns, reshuffle_discards).run()
+
+def run_games(num_games, num_players=4, seed=None, max_turns=MAX_TURNS, reshuffle_discards=None):
+    """Play many headless games back to back and collect statistics"""
+    seeds = random.Random(seed)
+    wins = [0] * num_players
+    draws = 0
+    total_turns = 0
+
+    start_time = time.perf_counter()
+    for _ in range(num_games):
+        result = play_game(seeds.getrandbits(32), num_players, max_turns=max_turns,
+                           reshuffle_discards=reshuffle_discards)
+        total_turns += result['turns']
+        if result['winner'] is None:
+            draws += 1
+        else:
+            wins[result['winner']] += 1
+    elapsed = time.perf_counter() - start_time
+
+    return {
+        'games': num_games,
+        'wins': wins,
+        'draws': draws,
+        'average_turns': total_turns / num_games if num_games else 0.0,
+        'elapsed': elapsed,
+        'games_per_second': num_games / elapsed if elapsed > 0 else float('inf'),
+    }
@@ -0,0 +1,273 @@
+"""
+Out-of-process game engine for Flip Out! - The Mood Swing Card Game
+Rules and AI run on a SearchState in a child process. The renderer sends
+action commands over a pipe and receives state snapshots, so the render
+loop never waits on the engine. AI seats play as AI_SETTINGS['ai_type'] does
+in the window, at the same difficulty. With no human seats and no step delay
+the engine plays as fast as its AI allows
+"""
+
+import multiprocessing
+import random
+from card import (CARD_NAMES, CARD_KINDS, CARD_KIND_MOOD, NUM_CARD_TYPES, WILD_MOOD_ID,
+                  MoodCard, MoodSwingCard)
+from engine import HeadlessGame, MAX_TURNS
+from game_config import get_setting
+from ismcts import ISMCTS, difficulty_budget
+from cfr import load_policy, table_action
+from selfplay import load_network
+from search_state import SearchState, MOOD_SLOTS, WILD_SLOT
+
+# Renderer -> engine commands
+ACT = 'act'            # (ACT, action): play an action index for a human seat
+PAUSE = 'pause'
+RESUME = 'resume'
+SET_DELAY = 'delay'    # (SET_DELAY, seconds): pause between AI actions
+SNAPSHOT = 'snapshot'  # Ask for a snapshot; also the engine -> renderer state message
+STOP = 'stop'
+
+# Engine -> renderer messages
+REJECTED = 'rejected'    # (REJECTED, action): the action was not legal
+GAME_OVER = 'game_over'  # (GAME_OVER, result)
+
+def state_snapshot(state, human_seats=()):
+    """Get a picklable view of a SearchState for the renderer"""
+    return {
+        'num_players': state.num_players,
+        'hands': state.hands[:],
+        'moods': state.moods[:],
+        'blocked': state.blocked[:],
+        'deck_size': len(state.deck),
+        'discards': state.discards[:],
+        'current': state.current,
+        'phase': state.phase,
+        'turns': state.turns,
+        'winner': state.winner,
+        'legal_actions': state.legal_actions() if state.current in human_seats else [],
+    }
+
+class EngineServer:
+    """Runs one game in the engine process, answering renderer commands"""
+
+    def __init__(self, conn, num_players=4, seed=None, human_seats=(), step_delay=0.0,
+                 stream=True, max_turns=MAX_TURNS, ai_type='random', difficulty=None):
+        self.conn = conn
+        self.state = SearchState.from_game(HeadlessGame(num_players, seed=seed, max_turns=max_turns))
+        self.rng = random.Random(self.state.rng.random())  # AI action choices
+        self.ai_type = ai_type
+        self.budget = difficulty_budget(difficulty)
+        self.search = ISMCTS(self.rng)  # Kept between moves, so its table carries over
+        self.lookup = None  # Trained CFR table or network, when ai_type uses one
+        if ai_type == 'cfr':
+            self.lookup = load_policy()
+        elif ai_type == 'network':
+            self.lookup = load_network()
+        self.human_seats = tuple(human_seats)
+        self.step_delay = step_delay
+        self.stream = stream  # Send a snapshot after every action, not just on request
+        self.paused = False
+        self.running = True
+        self.finished = False
+
+    def send_snapshot(self):
+        self.conn.send((SNAPSHOT, state_snapshot(self.state, self.human_seats)))
+
+    def after_move(self):
+        """Stream the new position and report the end of the game once"""
+        if self.stream:
+            self.send_snapshot()
+        if not self.finished and self.state.is_terminal():
+            self.finished = True
+            winner = self.state.winner
+            self.conn.send((GAME_OVER, {'winner': winner if winner >= 0 else None,
+                                        'turns': self.state.turns}))
+
+    def handle(self, command, *args):
+        """Apply one renderer command"""
+        if command == ACT:
+            action = args[0]
+            if self.state.current in self.human_seats and not self.finished \
+                    and action in self.state.legal_actions():
+                self.state.apply(action)
+                self.after_move()
+            else:
+                self.conn.send((REJECTED, action))
+        elif command == PAUSE:
+            self.paused = True
+        elif command == RESUME:
+            self.paused = False
+        elif command == SET_DELAY:
+            self.step_delay = args[0]
+        elif command == SNAPSHOT:
+            self.send_snapshot()
+        elif command == STOP:
+            self.running = False
+
+    def ai_action(self):
+        """Choose the move for an AI seat the way the game window does"""
+        state = self.state
+        legal = state.legal_actions()
+        if self.ai_type == 'random':
+            return self.rng.choice(legal)
+        if len(legal) == 1:
+            return legal[0]
+        if self.lookup is not None:
+            if self.ai_type == 'cfr':
+                return table_action(self.lookup, state)
+            return self.lookup.action(state)
+        # Any command from the renderer cuts the search short; it is handled next
+        self.search.set_root(state.clone(), state.current)
+        return self.search.search_budget(self.budget, self.conn.poll)
+
+    def wait(self, seconds):
+        """Sleep between AI actions while still answering commands"""
+        while self.running and self.conn.poll(seconds):
+            self.handle(*self.conn.recv())
+            seconds = 0  # Anything else queued is handled right away; then move on
+        return self.running
+
+    def serve(self):
+        """Play until stopped, blocking on the pipe whenever a human must act"""
+        self.after_move()
+        while self.running:
+            if self.paused or self.finished or self.state.current in self.human_seats:
+                self.handle(*self.conn.recv())
+                continue
+            if not self.wait(0) or self.paused:
+                continue
+            self.state.apply(self.ai_action())
+            self.after_move()
+            if self.step_delay:
+                self.wait(self.step_delay)
+
+def run_engine(conn, options):
+    """Engine process entry point"""
+    try:
+        EngineServer(conn, **options).serve()
+    except (EOFError, BrokenPipeError):
+        pass  # The renderer went away
+    finally:
+        conn.close()
+
+class EngineProcess:
+    """Renderer-side handle on an engine running in a child process"""
+
+    def __init__(self, num_players=4, seed=None, human_seats=(0,), step_delay=0.0,
+                 stream=True, max_turns=MAX_TURNS, ai_type=None, difficulty=None):
+        # Settings are read here, so the engine follows this process's AI_SETTINGS
+        if ai_type is None:
+            ai_type = get_setting('AI_SETTINGS', 'ai_type', 'ismcts')
+        if difficulty is None:
+            difficulty = get_setting('AI_SETTINGS', 'difficulty', 'medium')
+        self.options = {'num_players': num_players, 'seed': seed, 'human_seats': tuple(human_seats),
+                        'step_delay': step_delay, 'stream': stream, 'max_turns': max_turns,
+                        'ai_type': ai_type, 'difficulty': difficulty}
+        self.conn = None
+        self.process = None
+        self.snapshot = None  # Latest state received
+        self.result = None  # Set once the engine reports the game is over
+        self.rejected = []  # Actions the engine refused since the last poll
+
+    def start(self):
+        """Launch the engine process"""
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=run_engine, args=(child_conn, self.options),
+                                               daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def send(self, command, *args):
+        try:
+            self.conn.send((command,) + args)
+        except (BrokenPipeError, OSError):
+            pass  # The engine has already stopped
+
+    def act(self, action):
+        """Ask the engine to play an action for a human seat"""
+        self.send(ACT, action)
+
+    def receive(self, message):
+        kind = message[0]
+        if kind == SNAPSHOT:
+            self.snapshot = message[1]
+        elif kind == GAME_OVER:
+            self.result = message[1]
+        elif kind == REJECTED:
+            self.rejected.append(message[1])
+
+    def poll(self):
+        """Drain pending messages without blocking; return the newest snapshot, if any"""
+        latest = None
+        self.rejected = []
+        try:
+            while self.conn.poll():
+                message = self.conn.recv()
+                self.receive(message)
+                if message[0] == SNAPSHOT:
+                    latest = message[1]
+        except (EOFError, OSError):
+            pass  # The engine has stopped
+        return latest
+
+    def wait_result(self, timeout=None):
+        """Block until the engine reports the end of the game"""
+        while self.result is None and self.conn.poll(timeout):
+            self.receive(self.conn.recv())
+        return self.result
+
+    def stop(self):
+        """Shut the engine down"""
+        if self.process is None:
+            return
+        self.send(STOP)
+        self.process.join(timeout=1.0)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+        self.process = None
+
+def play_remote_game(num_players=4, seed=None, max_turns=MAX_TURNS, ai_type=None,
+                     difficulty=None):
+    """Play an AI-only game in an engine process as fast as it will go"""
+    engine = EngineProcess(num_players, seed, human_seats=(), stream=False, max_turns=max_turns,
+                           ai_type=ai_type, difficulty=difficulty)
+    engine.start()
+    try:
+        return engine.wait_result()
+    finally:
+        engine.stop()
+
+class RemoteDeck:
+    """Stands in for Deck on the renderer side, where only the card count is known"""
+
+    def __init__(self, size=0):
+        self.size = size
+
+    def get_card_count(self):
+        return self.size
+
+    def is_empty(self):
+        return self.size == 0
+
+# One card object per card id for showing snapshot contents
+CARD_FACES = [MoodCard(name) if kind == CARD_KIND_MOOD else MoodSwingCard(name)
+              for name, kind in zip(CARD_NAMES, CARD_KINDS)]
+
+def cards_from_counts(counts):
+    """Expand per-card-id counts into a list of card objects"""
+    cards = []
+    for card_id, count in enumerate(counts):
+        cards.extend([CARD_FACES[card_id]] * count)
+    return cards
+
+def hand_cards(snapshot, seat):
+    """Get one player's hand from a snapshot"""
+    base = seat * NUM_CARD_TYPES
+    return cards_from_counts(snapshot['hands'][base:base + NUM_CARD_TYPES])
+
+def mood_cards(snapshot, seat):
+    """Get one player's mood collection from a snapshot, wild moods last"""
+    slots = snapshot['moods'][seat * MOOD_SLOTS:(seat + 1) * MOOD_SLOTS]
+    cards = cards_from_counts(slots[:WILD_SLOT])
+    cards.extend([CARD_FACES[WILD_MOOD_ID]] * slots[WILD_SLOT])
+    return cards
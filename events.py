@@ -0,0 +1,41 @@
+"""
+Game model change events for Flip Out! - The Mood Swing Card Game
+Players, decks and game logic emit these so win checks, messages, UI
+invalidation, simulations and replays can react only to real changes
+"""
+
+# Event types
+CARD_MOVED = 'card_moved'          # A card entered or left a hand, the deck or the discard pile
+MOOD_ADDED = 'mood_added'          # A card was added to a player's mood collection
+MOOD_REMOVED = 'mood_removed'      # A card left a player's mood collection
+HAND_SWAPPED = 'hand_swapped'      # A player's whole hand was replaced
+BLOCK_CHANGED = 'block_changed'    # A player's blocked_until counter changed
+DECK_RECYCLED = 'deck_recycled'    # The discard pile was shuffled back into the deck
+PHASE_CHANGED = 'phase_changed'    # The game or turn phase changed
+TURN_CHANGED = 'turn_changed'      # Play passed to another player
+
+ANY_EVENT = '*'  # Subscribe to every event type
+
+class EventBus:
+    """Dispatches model change events to subscribed callbacks"""
+
+    def __init__(self):
+        self.listeners = {}
+
+    def subscribe(self, event_type, callback):
+        """Call callback(event_type, data) whenever event_type is emitted"""
+        self.listeners.setdefault(event_type, []).append(callback)
+
+    def unsubscribe(self, event_type, callback):
+        """Stop calling a previously subscribed callback"""
+        callbacks = self.listeners.get(event_type)
+        if callbacks and callback in callbacks:
+            callbacks.remove(callback)
+
+    def emit(self, event_type, **data):
+        """Notify the subscribers of event_type and of every event"""
+        for key in (event_type, ANY_EVENT):
+            callbacks = self.listeners.get(key)
+            if callbacks:
+                for callback in tuple(callbacks):
+                    callback(event_type, data)
@@ -0,0 +1,347 @@
+"""
+Rules engine fuzzer for Flip Out! - The Mood Swing Card Game
+Drives GameLogic, Deck and Player with random legal actions mixed with
+illegal attempts, checks the game invariants after every step and shrinks
+any failing run to a minimal operation sequence that still fails
+"""
+
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from card import CARD_IDS, NUM_CARD_TYPES, WILD_MOOD_ID
+from actions import DRAW, ActionMaskCache, decode_action, legal_actions
+from engine import HeadlessGame
+
+DOUBLE_TROUBLE = CARD_IDS['double_trouble']
+
+# Operations; ('act', action) plays a legal action, the rest must be rejected. A double
+# trouble action also records the target's mood index: ('act', action, mood_index)
+ACT = 'act'
+PLAY_INDEX = 'play_index'          # ('play_index', index): play a card the rules refuse
+REMOVE_INDEX = 'remove_index'      # ('remove_index', index): remove a card index past the hand
+RESOLVE_INDEX = 'resolve_index'    # ('resolve_index', seat, index): double trouble, bad index
+DRAW_EXHAUSTED = 'draw_exhausted'  # Draw from a deck that cannot refill
+
+# Steps between full audits; the cheap checks run after every step
+AUDIT_INTERVAL = 32
+
+class InvariantViolation(AssertionError):
+    """A game invariant failed; carries where, so the run can be shrunk and replayed"""
+
+    def __init__(self, invariant, message, step=None):
+        super().__init__(f"{invariant}: {message}")
+        self.invariant = invariant
+        self.step = step
+        self.seed = None
+        self.ops = None
+
+class RulesFuzzer:
+    """Applies operations to a live object-model game and checks invariants"""
+
+    def __init__(self, seed, num_players=4, illegal_rate=0.25, reshuffle_discards=True,
+                 audit_interval=AUDIT_INTERVAL):
+        self.num_players = num_players
+        self.illegal_rate = illegal_rate
+        self.reshuffle_discards = reshuffle_discards
+        self.audit_interval = audit_interval
+        self.steps = 0
+        self.game = None
+        self.op_rng = random.Random(seed)  # Picks operations; replays use only the recorded ops
+        self.game_seeds = random.Random(seed)  # Seeds each new game, the same on replay
+        self.cache = ActionMaskCache()
+        self.games = 0
+        self.new_game()
+
+    def new_game(self):
+        """Start the next game once the current one is over"""
+        if self.game is not None:
+            self.audit()  # The last steps of a finished game may not have been audited yet
+        self.game = HeadlessGame(self.num_players, seed=self.game_seeds.getrandbits(32),
+                                 reshuffle_discards=self.reshuffle_discards)
+        self.logic, self.deck, self.players = self.game.logic, self.game.deck, self.game.players
+        self.total_cards = self.card_totals()
+        self.card_count = sum(self.total_cards)
+        self.cache.invalidate()
+        self.games += 1
+
+    def current_player(self):
+        return self.players[self.game.current_seat()]
+
+    def card_totals(self):
+        """Count every card in the game by card id"""
+        totals = [0] * NUM_CARD_TYPES
+        for index in self.deck.order:
+            totals[self.deck.pool[index].card_id] += 1
+        for pile in self.piles():
+            for card_id, count in enumerate(pile.counts):
+                totals[card_id] += count
+        return totals
+
+    def fingerprint(self):
+        """Cheap summary of the position, for checking that rejected operations change nothing"""
+        return (len(self.deck.order),
+                tuple(tuple(p.hand.counts) + tuple(p.mood_cards.counts) + (p.blocked_until,)
+                      for p in self.players),
+                tuple(self.deck.discard_pile.counts), self.game.turn_phase)
+
+    def random_op(self):
+        """Pick the next operation: usually a legal action, sometimes an illegal attempt"""
+        rng = self.op_rng
+        if rng.random() >= self.illegal_rate:
+            actions, _ = legal_actions(self.game, self.current_player(), self.cache)
+            action = rng.choice(actions)
+            kind, card_id, target = decode_action(action)
+            if kind == 'play_swing' and card_id == DOUBLE_TROUBLE:
+                moods = len(self.players[target].mood_cards)
+                if moods:
+                    return (ACT, action, rng.randrange(moods))
+            return (ACT, action)
+        kind = rng.choice((PLAY_INDEX, REMOVE_INDEX, RESOLVE_INDEX, DRAW_EXHAUSTED))
+        if kind == RESOLVE_INDEX:
+            return (kind, rng.randrange(self.num_players), rng.choice((-1, 99)))
+        if kind == DRAW_EXHAUSTED:
+            return (kind,)
+        return (kind, rng.choice((-1, 99)) if kind == REMOVE_INDEX else rng.randrange(-2, 12))
+
+    def apply(self, op, generated=False):
+        """Apply one operation; replayed actions that are no longer legal are skipped"""
+        if op[0] == ACT:
+            if generated or op[1] in legal_actions(self.game, self.current_player(), self.cache)[0]:
+                self.apply_action(op[1], op[2] if len(op) > 2 else 0)
+            return
+        before = self.fingerprint()
+        if not self.attempt_illegal(op):
+            return
+        if self.fingerprint() != before:
+            raise InvariantViolation('rejection', f"{op} changed the game")
+
+    def attempt_illegal(self, op):
+        """Try an operation the rules must refuse; False if it would actually be legal"""
+        player = self.current_player()
+        kind = op[0]
+        if kind == PLAY_INDEX:
+            index = op[1]
+            if 0 <= index < len(player.hand) and self.logic.can_play_card(player, index):
+                return False
+            played = self.logic.play_mood_card(player, index)[0] or \
+                self.logic.play_swing_card(player, index)[0]
+            if played:
+                raise InvariantViolation('rejection', f"played unplayable card index {index}")
+        elif kind == REMOVE_INDEX:
+            if player.remove_card_from_hand(op[1]) is not None:
+                raise InvariantViolation('rejection', f"removed card index {op[1]}")
+        elif kind == RESOLVE_INDEX:
+            if self.logic.resolve_double_trouble(self.players[op[1]], op[2]) is not None:
+                raise InvariantViolation('rejection', f"double trouble took mood index {op[2]}")
+        elif kind == DRAW_EXHAUSTED:
+            if not self.deck.is_exhausted():
+                return False
+            if self.deck.draw() is not None:
+                raise InvariantViolation('rejection', "drew from an exhausted deck")
+        return True
+
+    def apply_action(self, action, mood_index=0):
+        """Play a legal action through GameLogic, Deck and Player as the engine does
+
+        mood_index picks the mood double trouble removes; a shrunk replay may
+        leave the target fewer moods, so it wraps around
+        """
+        game, player = self.game, self.current_player()
+        kind, card_id, target = decode_action(action)
+        if game.turn_phase == 'draw':
+            if action == DRAW:
+                player.add_card_to_hand(self.deck.draw())
+            game.turn_phase = 'play'
+            return
+
+        if game.turn_phase == 'play':
+            if kind != 'pass':
+                index = next(i for i, card in enumerate(player.hand) if card.card_id == card_id)
+                if kind == 'play_mood':
+                    ok = self.logic.play_mood_card(player, index)[0]
+                else:
+                    card = player.hand[index]
+                    target_player = self.players[target]
+                    ok = self.logic.play_swing_card(player, index, target_player)[0]
+                    if ok and card_id == WILD_MOOD_ID:
+                        self.logic.resolve_wild_mood(player, card)
+                    elif ok:
+                        if card_id == DOUBLE_TROUBLE and target_player.mood_cards:
+                            mood_index %= len(target_player.mood_cards)
+                            lost = self.logic.resolve_double_trouble(target_player, mood_index)
+                            self.deck.discard(lost)
+                        self.deck.discard(card)
+                if not ok:
+                    raise InvariantViolation('legality',
+                                             f"legal action {decode_action(action)} was refused")
+            if game.check_winner():
+                self.new_game()
+                return
+            game.turn_phase = 'discard'
+            return
+
+        if kind == 'discard':
+            index = next(i for i, card in enumerate(player.hand) if card.card_id == card_id)
+            self.deck.discard(player.remove_card_from_hand(index))
+        self.end_turn()
+
+    def end_turn(self):
+        """Pass play on and check the next player's block counts down by one"""
+        blocked = [p.blocked_until for p in self.players]
+        self.game.turns_played += 1
+        self.game.turn_phase = 'draw'
+        self.logic.next_turn()
+        seat = self.game.current_seat()
+        for other, player in enumerate(self.players):
+            expected = max(0, blocked[other] - 1) if other == seat else blocked[other]
+            if player.blocked_until != expected:
+                raise InvariantViolation('blocked_countdown', f"seat {other} blocked_until "
+                                         f"{player.blocked_until}, expected {expected}")
+        if self.game.is_over():
+            self.new_game()
+
+    def step(self, op, generated=False):
+        """Apply one operation and check the invariants, with a full audit every few steps"""
+        try:
+            self.apply(op, generated)
+        except InvariantViolation:
+            raise
+        except Exception as error:
+            # A rules method blowing up on bad input is a failure to shrink like any other
+            raise InvariantViolation('crash', f"{type(error).__name__}: {error}") from error
+        self.steps += 1
+        self.check()
+        if self.steps % self.audit_interval == 0:
+            self.audit()
+
+    def check(self):
+        """Cheap per-step checks: card total, non-negative counts and blocks"""
+        piles = self.piles()
+        if len(self.deck.order) + sum(len(pile) for pile in piles) != self.card_count:
+            raise InvariantViolation('conservation', "the number of cards in the game changed")
+        for pile in piles:
+            if min(pile.counts) < 0:
+                raise InvariantViolation('negative_count', f"pile counts {pile.counts}")
+        for seat, player in enumerate(self.players):
+            if player.blocked_until < 0:
+                raise InvariantViolation('negative_count',
+                                         f"seat {seat} blocked_until {player.blocked_until}")
+
+    def audit(self):
+        """Full checks: per-type conservation, pile bookkeeping and card identity"""
+        totals = self.card_totals()
+        if totals != self.total_cards:
+            raise InvariantViolation('conservation', f"card counts {totals} != {self.total_cards}")
+        seen = set(id(self.deck.pool[index]) for index in self.deck.order)
+        for pile in self.piles():
+            counts = [0] * NUM_CARD_TYPES
+            for card in pile:
+                counts[card.card_id] += 1
+                seen.add(id(card))
+            if counts != pile.counts:
+                raise InvariantViolation('pile_counts',
+                                         f"pile counts {pile.counts}, holds {counts}")
+        if len(seen) != self.card_count:
+            raise InvariantViolation('conservation', "a card is in two places at once")
+
+    def piles(self):
+        """Get the discard pile and every hand and mood collection"""
+        piles = [self.deck.discard_pile]
+        for player in self.players:
+            piles.append(player.hand)
+            piles.append(player.mood_cards)
+        return piles
+
+    def run(self, ops):
+        """Apply and check a sequence of operations"""
+        for index, op in enumerate(ops):
+            try:
+                self.step(op)
+            except InvariantViolation as violation:
+                violation.step = index
+                raise
+        self.audit()
+
+def replay(seed, ops, num_players=4, reshuffle_discards=True):
+    """Replay an operation sequence; return the violation it hits, or None"""
+    try:
+        RulesFuzzer(seed, num_players, reshuffle_discards=reshuffle_discards).run(ops)
+    except InvariantViolation as violation:
+        return violation
+    return None
+
+def shrink(seed, ops, invariant, num_players=4, reshuffle_discards=True):
+    """Remove operations while the run still breaks the same invariant"""
+    def fails(candidate):
+        violation = replay(seed, candidate, num_players, reshuffle_discards)
+        return violation is not None and violation.invariant == invariant
+
+    chunk = max(1, len(ops) // 2)
+    while chunk >= 1:
+        start = 0
+        while start < len(ops):
+            candidate = ops[:start] + ops[start + chunk:]
+            if candidate and fails(candidate):
+                ops = candidate
+            else:
+                start += chunk
+        chunk //= 2
+    return ops
+
+def fuzz_seed(seed, steps, num_players=4, reshuffle_discards=True):
+    """Fuzz one seed; return the shrunk violation or None"""
+    fuzzer = RulesFuzzer(seed, num_players, reshuffle_discards=reshuffle_discards)
+    ops = []
+    try:
+        for step in range(steps):
+            op = fuzzer.random_op()
+            ops.append(op)
+            fuzzer.step(op, generated=True)
+        fuzzer.audit()
+    except InvariantViolation as violation:
+        violation.seed = seed
+        violation.step = step
+        violation.ops = shrink(seed, ops, violation.invariant, num_players, reshuffle_discards)
+        return violation
+    return None
+
+def fuzz_task(task):
+    """Fuzz a chunk of seeds in a worker; return failures as plain dicts"""
+    seeds, steps, num_players, reshuffle_discards = task
+    failures = []
+    for seed in seeds:
+        violation = fuzz_seed(seed, steps, num_players, reshuffle_discards)
+        if violation is not None:
+            failures.append({'seed': seed, 'invariant': violation.invariant,
+                             'message': str(violation), 'ops': violation.ops})
+    return failures
+
+def run_fuzz(num_seeds=10, steps=10000, seed=None, num_players=4, reshuffle_discards=True,
+             workers=1):
+    """Fuzz many seeds, optionally across worker processes, and report shrunk failures"""
+    seed_rng = random.Random(seed)
+    seeds = [seed_rng.getrandbits(32) for _ in range(num_seeds)]
+    workers = workers or os.cpu_count() or 1
+    tasks = [(seeds[start::workers], steps, num_players, reshuffle_discards)
+             for start in range(min(workers, num_seeds))]
+
+    failures = []
+    start_time = time.perf_counter()
+    if workers == 1:
+        for task in tasks:
+            failures.extend(fuzz_task(task))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk_failures in executor.map(fuzz_task, tasks):
+                failures.extend(chunk_failures)
+    elapsed = time.perf_counter() - start_time
+
+    total_steps = num_seeds * steps
+    return {
+        'steps': total_steps,
+        'workers': workers,
+        'failures': failures,
+        'elapsed': elapsed,
+        'steps_per_second': total_steps / elapsed if elapsed > 0 else float('inf'),
+    }
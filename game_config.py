@@ -14,7 +14,21 @@ AI_SETTINGS = {
     'difficulty': 'medium',  # 'easy', 'medium', 'hard'
     'thinking_delay': 1.0,  # seconds
     'strategy_aggression': 0.7,  # 0.0 to 1.0
-    'card_priority': ['mood', 'steal_mood', 'wild_mood', 'swap_hands', 'block_mood', 'double_trouble']
+    'card_priority': ['mood', 'steal_mood', 'wild_mood', 'swap_hands', 'block_mood', 'double_trouble'],
+    'tournament_policies': ['random', 'priority'],  # Competitors for headless tournaments
+    # 'ismcts' searches each play and discard, 'cfr' looks moves up in the table trained by
+    # launch_game.py --cfr and 'network' asks the network trained by --selfplay (both
+    # search while untrained), 'random' picks legal moves
+    'ai_type': 'ismcts',
+    'ponder': True,  # Searching AIs think ahead while a human player is on turn
+    # ISMCTS budget per decision for each difficulty; the search stops at whichever limit
+    # comes first, and the thinking delay still caps the time. Once the deck holds
+    # endgame_deck cards or fewer, exact endgame values replace rollouts
+    'difficulty_budgets': {
+        'easy': {'iterations': 100, 'time': 0.05, 'rollout_turns': 4, 'endgame_deck': 0},
+        'medium': {'iterations': 1000, 'time': 0.25, 'rollout_turns': 16, 'endgame_deck': 1},
+        'hard': {'iterations': 20000, 'time': 1.0, 'rollout_turns': 40, 'endgame_deck': 2},
+    }
 }
 
 # Visual Settings
@@ -54,7 +68,8 @@ BALANCE_SETTINGS = {
         'double_trouble': 3,
         'wild_mood': 3
     },
-    'win_condition_moods': 5
+    'win_condition_moods': 5,
+    'reshuffle_discards': True  # Shuffle the discard pile back in when the deck runs out
 }
 
 # Theme Settings
@@ -76,6 +91,14 @@ PERFORMANCE_SETTINGS = {
     'low_power_mode': False
 }
 
+# Logging Settings
+LOG_SETTINGS = {
+    'level': 'info',  # 'debug', 'info', 'warning', 'error', 'off'
+    'echo': True,  # Print log messages to the terminal while the game window is open
+    'ring_size': 500,  # Recent records kept in memory
+    'jsonl_path': None  # Optional JSON-lines file receiving every record
+}
+
 # Enhanced UI Settings
 UI_ENHANCEMENTS = {
     'card_hover_lift': True,
@@ -178,7 +201,8 @@ def export_settings():
     
     all_settings = {}
     for category in ['GAME_SETTINGS', 'AI_SETTINGS', 'VISUAL_SETTINGS', 'AUDIO_SETTINGS', 
-                    'BALANCE_SETTINGS', 'THEME_SETTINGS', 'PERFORMANCE_SETTINGS', 'UI_ENHANCEMENTS']:
+                    'BALANCE_SETTINGS', 'THEME_SETTINGS', 'PERFORMANCE_SETTINGS', 'UI_ENHANCEMENTS',
+                    'LOG_SETTINGS']:
         all_settings[category] = globals()[category]
     
     try:
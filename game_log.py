@@ -0,0 +1,96 @@
+"""
+Structured event log for Flip Out! - The Mood Swing Card Game
+Levelled records go to an in-memory ring buffer, an optional JSON-lines
+file and, when echo is on, the terminal. Records below the current
+level return before any formatting, so a quiet log costs almost nothing
+"""
+
+import json
+import time
+from collections import deque
+
+# Log levels
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+
+LEVEL_NAMES = {DEBUG: 'debug', INFO: 'info', WARNING: 'warning', ERROR: 'error', OFF: 'off'}
+LEVELS = {name: level for level, name in LEVEL_NAMES.items()}
+
+class GameLog:
+    """Levelled structured log with a ring buffer and an optional JSON-lines sink"""
+
+    def __init__(self, level=INFO, capacity=500, echo=False, sink_path=None):
+        self.level = level
+        self.echo = echo  # Print each record's message to the terminal
+        self.records = deque(maxlen=capacity)
+        self.sink = None
+        if sink_path:
+            self.open_sink(sink_path)
+
+    def configure(self, level=None, capacity=None, echo=None, sink_path=None):
+        """Change the level, buffer size, echo or JSON-lines sink"""
+        if level is not None:
+            self.level = LEVELS.get(level, level) if isinstance(level, str) else level
+        if capacity is not None and capacity != self.records.maxlen:
+            self.records = deque(self.records, maxlen=capacity)
+        if echo is not None:
+            self.echo = echo
+        if sink_path is not None:
+            self.open_sink(sink_path)
+
+    def is_enabled(self, level):
+        """Check if records at a level would be kept"""
+        return level >= self.level
+
+    def open_sink(self, path):
+        """Append every kept record to a JSON-lines file"""
+        self.close_sink()
+        self.sink = open(path, 'a', encoding='utf-8')
+
+    def close_sink(self):
+        """Flush and close the JSON-lines file, if any"""
+        if self.sink is not None:
+            self.sink.close()
+            self.sink = None
+
+    def log(self, level, event, message=None, **fields):
+        """Record an event; message is a format string filled from fields on echo"""
+        if level < self.level:
+            return
+        record = {'time': time.time(), 'level': LEVEL_NAMES.get(level, level), 'event': event}
+        record.update(fields)
+        self.records.append(record)
+        if self.sink is not None:
+            self.sink.write(json.dumps(record, default=str) + '\n')
+        if self.echo:
+            print(message.format(**fields) if message else f"{event}: {fields}")
+
+    def debug(self, event, message=None, **fields):
+        self.log(DEBUG, event, message, **fields)
+
+    def info(self, event, message=None, **fields):
+        self.log(INFO, event, message, **fields)
+
+    def warning(self, event, message=None, **fields):
+        self.log(WARNING, event, message, **fields)
+
+    def error(self, event, message=None, **fields):
+        self.log(ERROR, event, message, **fields)
+
+    def recent(self, count=None, event=None):
+        """Get the most recent buffered records, optionally of one event type"""
+        records = [r for r in self.records if event is None or r['event'] == event]
+        return records if count is None else records[-count:]
+
+# Shared game log; warnings only and no echo by default, so headless and batch
+# runs skip terminal I/O. The game window applies LOG_SETTINGS on startup
+game_log = GameLog(level=WARNING)
+
+def configure_from_settings():
+    """Apply LOG_SETTINGS from game_config to the shared game log"""
+    from game_config import LOG_SETTINGS
+    game_log.configure(level=LOG_SETTINGS['level'], capacity=LOG_SETTINGS['ring_size'],
+                       echo=LOG_SETTINGS['echo'], sink_path=LOG_SETTINGS['jsonl_path'])
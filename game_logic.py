@@ -1,74 +1,153 @@
 import random
 from constants import *
-from card import Card, MoodCard, MoodSwingCard
-from player import Player
+from card import Card, MoodCard, MoodSwingCard, CARD_KIND_MOOD, CARD_KIND_SWING
+from player import Player, CardPile
+from game_log import game_log
+from events import CARD_MOVED, DECK_RECYCLED, PHASE_CHANGED, TURN_CHANGED
+
+# Swing cards a blocked player may not play
+BLOCKED_SWING_TYPES = ['steal_mood', 'double_trouble']
+
+# Card pools shared by every deck with the same composition; cards are
+# immutable flyweights, so games can safely hold the same card objects
+_CARD_POOLS = {}
+
+def build_card_pool(mood_copies=DECK_MOOD_COPIES, swing_copies=DECK_SWING_COPIES):
+    """Get the shared (cards, id-to-index) pool for a deck composition"""
+    key = (mood_copies, swing_copies)
+    if key not in _CARD_POOLS:
+        pool = []
+        # Create mood cards (5 of each mood)
+        for mood in MOOD_TYPES:
+            for _ in range(mood_copies):
+                pool.append(MoodCard(mood))
+        
+        # Create mood swing cards
+        for swing_type in SWING_CARD_TYPES:
+            for _ in range(swing_copies):  # 3 of each swing card
+                pool.append(MoodSwingCard(swing_type))
+        _CARD_POOLS[key] = (pool, {id(card): i for i, card in enumerate(pool)})
+    return _CARD_POOLS[key]
 
 class Deck:
-    """Represents a deck of cards"""
+    """Represents a deck of cards as an index array over a shared card pool"""
     
-    def __init__(self):
-        self.cards = []
+    def __init__(self, rng=None, reshuffle_discards=False, events=None):
+        self.rng = rng if rng is not None else random.Random()  # Per-game random generator
+        self.reshuffle_discards = reshuffle_discards  # Refill from the discard pile when empty
+        self.events = events  # Optional EventBus notified of every change
+        self.pool = []  # Card objects this deck can index
+        self.pool_index = {}  # id(card) -> position in pool
+        self.owns_pool = False  # Shared pools are copied before they grow
+        self.order = []  # Pool indices still in the deck; the top card is last
+        self.reorders = 0  # Bumped when cards are added or reordered; draws only shorten order
+        self.discard_pile = CardPile()
         self.create_deck()
+        if events is not None:
+            self.attach_events(events)
+    
+    def attach_events(self, events):
+        """Start emitting change events to an EventBus"""
+        self.events = events
+        self.discard_pile.listener = self._discard_changed
+    
+    def _discard_changed(self, card, added):
+        self.events.emit(CARD_MOVED, zone='discard', card=card, added=added)
     
     def create_deck(self):
         """Create a standard deck with mood cards and mood swing cards"""
-        # Create mood cards (5 of each mood)
-        moods = ['angry', 'happy', 'sad', 'scared', 'silly']
-        for mood in moods:
-            for _ in range(5):
-                self.cards.append(MoodCard(mood))
-        
-        # Create mood swing cards
-        swing_types = ['steal_mood', 'swap_hands', 'block_mood', 'double_trouble', 'wild_mood']
-        for swing_type in swing_types:
-            for _ in range(3):  # 3 of each swing card
-                self.cards.append(MoodSwingCard(swing_type))
-        
-        print(f"✓ Created deck with {len(self.cards)} cards")
+        self.pool, self.pool_index = build_card_pool()
+        self.owns_pool = False
+        self.order = list(range(len(self.pool)))
+        self.reorders += 1
+    
+    @property
+    def cards(self):
+        """Get the cards still in the deck, bottom to top"""
+        return [self.pool[i] for i in self.order]
     
-    def shuffle(self):
-        """Shuffle the deck"""
-        random.shuffle(self.cards)
-        print("✓ Deck shuffled")
+    def shuffle(self, rng=None):
+        """Shuffle the deck, with the deck's own generator unless one is given"""
+        (rng or self.rng).shuffle(self.order)
+        self.reorders += 1
     
     def draw(self):
         """Draw a card from the top of the deck"""
-        if self.cards:
-            return self.cards.pop()
+        if not self.order and self.reshuffle_discards:
+            self.recycle_discards()
+        if self.order:
+            card = self.pool[self.order.pop()]
+            if self.events is not None:
+                self.events.emit(CARD_MOVED, zone='deck', card=card, added=False)
+            return card
         return None
     
+    def discard(self, card):
+        """Put a card on the discard pile"""
+        self.discard_pile.append(card)
+    
+    def recycle_discards(self):
+        """Shuffle the discard pile back in as the new deck"""
+        self.order.extend(self.index_of(card) for card in self.discard_pile)
+        self.discard_pile.clear()
+        self.shuffle()
+        if self.events is not None:
+            self.events.emit(DECK_RECYCLED, count=len(self.order))
+    
+    def index_of(self, card):
+        """Get a card's pool index, adding cards from outside the pool"""
+        index = self.pool_index.get(id(card))
+        if index is None:
+            if not self.owns_pool:
+                self.pool, self.pool_index = list(self.pool), dict(self.pool_index)
+                self.owns_pool = True
+            index = len(self.pool)
+            self.pool.append(card)
+            self.pool_index[id(card)] = index
+        return index
+    
     def add_card(self, card):
         """Add a card to the deck"""
-        self.cards.append(card)
+        self.order.append(self.index_of(card))
+        self.reorders += 1
+        if self.events is not None:
+            self.events.emit(CARD_MOVED, zone='deck', card=card, added=True)
     
     def add_cards(self, cards):
         """Add multiple cards to the deck"""
-        self.cards.extend(cards)
+        for card in cards:
+            self.add_card(card)
     
     def get_card_count(self):
         """Get the number of cards in the deck"""
-        return len(self.cards)
+        return len(self.order)
     
     def is_empty(self):
         """Check if the deck is empty"""
-        return len(self.cards) == 0
+        return len(self.order) == 0
+    
+    def is_exhausted(self):
+        """Check if no card can be drawn, even after recycling discards"""
+        return not self.order and not (self.reshuffle_discards and self.discard_pile)
 
 class GameLogic:
     """Handles game rules and logic"""
     
-    def __init__(self):
+    def __init__(self, rng=None, events=None):
+        self.events = events  # Optional EventBus notified of phase and turn changes
         self.game_phase = "setup"  # setup, playing, game_over
         self.current_turn = 0
         self.turn_order = []
         self.winner = None
+        self.rng = rng if rng is not None else random  # Source of card-effect randomness
     
     def start_game(self, players):
         """Initialize the game with players"""
         self.players = players
         self.turn_order = list(range(len(players)))
         self.current_turn = 0
-        self.game_phase = "playing"
         self.winner = None
+        self.set_phase("playing")
         
         # Initialize player mood collections
         for player in players:
@@ -77,6 +156,12 @@ class GameLogic:
             if not hasattr(player, 'blocked_until'):
                 player.blocked_until = 0
     
+    def set_phase(self, phase):
+        """Change the game phase and notify listeners"""
+        self.game_phase = phase
+        if self.events is not None:
+            self.events.emit(PHASE_CHANGED, phase=phase)
+    
     def get_current_player(self):
         """Get the current player"""
         if self.turn_order:
@@ -90,27 +175,30 @@ class GameLogic:
             
             # Check if current player is blocked
             current_player = self.get_current_player()
+            if self.events is not None:
+                self.events.emit(TURN_CHANGED, player=current_player)
             if hasattr(current_player, 'blocked_until') and current_player.blocked_until > 0:
                 current_player.blocked_until -= 1
                 if current_player.blocked_until <= 0:
-                    print(f"🎉 {current_player.name} is no longer blocked!")
+                    game_log.info('player_unblocked', "🎉 {player} is no longer blocked!",
+                                  player=current_player.name)
     
     def can_play_card(self, player, card_index):
         """Check if a player can play a specific card"""
-        if card_index >= len(player.hand):
+        if not 0 <= card_index < len(player.hand):
             return False
         
         card = player.hand[card_index]
         
         # Check if it's a mood card - blocked players can still collect moods
-        if hasattr(card, 'mood'):
+        if card.kind == CARD_KIND_MOOD:
             return True
         
         # Check if it's a mood swing card
-        if hasattr(card, 'card_type'):
+        if card.kind == CARD_KIND_SWING:
             # Check if player is blocked from stealing/discarding
             if hasattr(player, 'blocked_until') and player.blocked_until > 0:
-                if card.card_type in ['steal_mood', 'double_trouble']:
+                if card.card_type in BLOCKED_SWING_TYPES:
                     return False  # Blocked players can't steal or force discards
                 # Blocked players can still use other swing cards
             return self.can_play_swing_card(card, player)
@@ -121,7 +209,7 @@ class GameLogic:
         """Check if a mood swing card can be played"""
         # Check if player is blocked from stealing/discarding
         if hasattr(player, 'blocked_until') and player.blocked_until > 0:
-            if card.card_type in ['steal_mood', 'double_trouble']:
+            if card.card_type in BLOCKED_SWING_TYPES:
                 return False  # Blocked players can't steal or force discards
         
         # All other swing cards can be played
@@ -134,7 +222,7 @@ class GameLogic:
         
         card = player.hand.pop(card_index)
         
-        if hasattr(card, 'mood'):
+        if card.kind == CARD_KIND_MOOD:
             player.mood_cards.append(card)
             return True, f"Played {card.mood} mood card"
         else:
@@ -149,7 +237,7 @@ class GameLogic:
         
         card = player.hand.pop(card_index)
         
-        if hasattr(card, 'card_type'):
+        if card.kind == CARD_KIND_SWING:
             result = self.execute_swing_card_effect(card, player, target_player)
             return True, result
         else:
@@ -162,7 +250,7 @@ class GameLogic:
         if card.card_type == 'steal_mood':
             if target_player and target_player.hand:
                 # Steal a random card from opponent's hand (not just mood cards)
-                stolen_card = random.choice(target_player.hand)
+                stolen_card = self.rng.choice(target_player.hand)
                 target_player.hand.remove(stolen_card)
                 player.hand.append(stolen_card)
                 return f"Stole {stolen_card.name} from {target_player.name}!"
@@ -200,20 +288,24 @@ class GameLogic:
         
         return "Unknown swing card effect!"
     
+    def resolve_double_trouble(self, target_player, mood_index):
+        """Discard the chosen mood card from the target's collection"""
+        if 0 <= mood_index < len(target_player.mood_cards):
+            return target_player.mood_cards.pop(mood_index)
+        return None
+    
+    def resolve_wild_mood(self, player, card):
+        """Place a played wild mood card in the player's collection"""
+        player.mood_cards.append(card)
+        return f"{player.name} collected a wild mood!"
+    
     def check_win_condition(self, player):
         """Check if a player has won by collecting one of each of the 5 moods"""
         if not hasattr(player, 'mood_cards'):
             return False
         
-        # Count unique moods collected
-        unique_moods = set()
-        for card in player.mood_cards:
-            if hasattr(card, 'mood'):
-                unique_moods.add(card.mood)
-        
-        # Check if player has all 5 moods
-        required_moods = {'angry', 'happy', 'sad', 'scared', 'silly'}
-        return unique_moods.issuperset(required_moods)
+        # Player keeps running mood counts, each wild mood standing in for one missing mood
+        return player.is_winner()
     
     def get_game_state(self):
         """Get the current game state"""
@@ -237,11 +329,11 @@ class GameLogic:
     def end_game(self, winner):
         """End the game with a winner"""
         self.winner = winner
-        self.game_phase = "game_over"
+        self.set_phase("game_over")
     
     def reset_game(self):
         """Reset the game to initial state"""
-        self.game_phase = "setup"
+        self.set_phase("setup")
         self.current_turn = 0
         self.turn_order = []
         self.winner = None
@@ -0,0 +1,130 @@
+"""
+Persistent game history for Flip Out! - The Mood Swing Card Game
+One immutable snapshot is recorded per turn. Unchanged hands, mood
+collections and discard piles reuse the previous snapshot's tuples, and
+the deck shares one tuple for as long as cards are only drawn from it,
+so each snapshot costs only what changed during the turn
+"""
+
+from collections import namedtuple
+
+Snapshot = namedtuple('Snapshot', [
+    'turn',                  # Turn number the snapshot was taken at the start of
+    'current_player_index',
+    'turn_phase',
+    'hands',                 # Tuple of card tuples, one per player
+    'moods',                 # Tuple of mood card tuples, one per player
+    'blocked',               # Tuple of blocked_until counters
+    'deck',                  # Pool indices shared between snapshots; the deck is deck[:deck_size]
+    'deck_size',
+    'discards',              # Discard pile cards, bottom to top
+])
+
+class GameHistory:
+    """Turn-by-turn snapshots with O(1) undo, redo and jump-to-turn"""
+
+    def __init__(self):
+        self.snapshots = []  # Consecutive turns; index = turn - first recorded turn
+        self.cursor = -1  # Index of the snapshot the game currently matches
+        self.shared = {}  # zone key -> (pile, version, tuple) of the last recorded pile
+        self.deck_share = (None, -1, ())  # (deck, reorders, order tuple)
+
+    def clear(self):
+        """Forget every snapshot"""
+        self.snapshots = []
+        self.cursor = -1
+        self.shared = {}
+        self.deck_share = (None, -1, ())
+
+    def share(self, key, pile):
+        """Get a pile's cards as a tuple, reusing the last one if the pile is unchanged"""
+        entry = self.shared.get(key)
+        if entry is not None and entry[0] is pile and entry[1] == pile.version:
+            return entry[2]
+        cards = tuple(pile)
+        self.shared[key] = (pile, pile.version, cards)
+        return cards
+
+    def share_deck(self, deck):
+        """Get the deck order as a shared tuple, re-copied only after a shuffle or addition"""
+        owner, reorders, order = self.deck_share
+        if owner is not deck or reorders != deck.reorders:
+            order = tuple(deck.order)
+            self.deck_share = (deck, deck.reorders, order)
+        return order
+
+    def record(self, game):
+        """Snapshot the game at the start of a turn, dropping any undone turns"""
+        players = game.players
+        snapshot = Snapshot(
+            turn=game.state.turn_number,
+            current_player_index=game.state.current_player_index,
+            turn_phase=game.state.turn_phase,
+            hands=tuple(self.share(('hand', seat), p.hand) for seat, p in enumerate(players)),
+            moods=tuple(self.share(('moods', seat), p.mood_cards) for seat, p in enumerate(players)),
+            blocked=tuple(p.blocked_until for p in players),
+            deck=self.share_deck(game.deck),
+            deck_size=len(game.deck.order),
+            discards=self.share('discards', game.deck.discard_pile),
+        )
+        if self.cursor + 1 < len(self.snapshots):
+            del self.snapshots[self.cursor + 1:]
+        self.snapshots.append(snapshot)
+        self.cursor = len(self.snapshots) - 1
+        return snapshot
+
+    def current(self):
+        """Get the snapshot the game currently matches, if any"""
+        return self.snapshots[self.cursor] if self.cursor >= 0 else None
+
+    def can_undo(self):
+        return self.cursor > 0
+
+    def can_redo(self):
+        return self.cursor + 1 < len(self.snapshots)
+
+    def undo(self):
+        """Step back one turn and return that snapshot (None at the first turn)"""
+        if not self.can_undo():
+            return None
+        self.cursor -= 1
+        return self.snapshots[self.cursor]
+
+    def redo(self):
+        """Step forward one undone turn and return that snapshot (None if there is none)"""
+        if not self.can_redo():
+            return None
+        self.cursor += 1
+        return self.snapshots[self.cursor]
+
+    def jump_to_turn(self, turn):
+        """Move to the snapshot taken at the start of a turn (None if it was not recorded)"""
+        if not self.snapshots:
+            return None
+        index = turn - self.snapshots[0].turn
+        if not 0 <= index < len(self.snapshots):
+            return None
+        self.cursor = index
+        return self.snapshots[index]
+
+    def restore(self, game, snapshot):
+        """Put the game back into a snapshot's position"""
+        game.state.turn_number = snapshot.turn
+        game.state.current_player_index = snapshot.current_player_index
+        game.state.turn_phase = snapshot.turn_phase
+        for seat, player in enumerate(game.players):
+            player.hand = list(snapshot.hands[seat])
+            player.mood_cards = list(snapshot.moods[seat])
+            player.blocked_until = snapshot.blocked[seat]
+            # The restored piles match their tuples, so the next snapshot can share them
+            self.shared[('hand', seat)] = (player.hand, player.hand.version, snapshot.hands[seat])
+            self.shared[('moods', seat)] = (player.mood_cards, player.mood_cards.version,
+                                            snapshot.moods[seat])
+
+        deck = game.deck
+        deck.order = list(snapshot.deck[:snapshot.deck_size])
+        self.deck_share = (deck, deck.reorders, snapshot.deck)
+        discard_pile = deck.discard_pile  # Cleared in place; the game holds an alias to it
+        discard_pile.clear()
+        discard_pile.extend(snapshot.discards)
+        self.shared['discards'] = (discard_pile, discard_pile.version, snapshot.discards)
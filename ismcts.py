@@ -0,0 +1,455 @@
+"""
+Information-set Monte Carlo tree search AI for Flip Out! - The Mood Swing Card Game
+Each iteration deals the cards the searching player cannot see (opponent
+hands and the deck order) at random, walks one shared tree of
+draw/play/target/discard decisions and finishes the game with a random
+rollout that works on the SearchState lists in place. Nodes are keyed by
+the searching player's view of the position in a transposition table, so
+card orders that lead to the same position share one node. Once the deck
+is small enough, the endgame solver's exact values replace rollouts, and
+with the odds table built, rollouts cut off unfinished go to the player
+likeliest to flip out
+"""
+
+import math
+import random
+import time
+from constants import *
+from card import CARD_IDS, NUM_CARD_TYPES, WILD_MOOD_ID
+from actions import decode_action
+from engine import POLICIES, PriorityPolicy
+from game_config import get_setting
+from search_state import SearchState, MOOD_SLOTS, WILD_SLOT, BLOCK_TURNS
+from zobrist import TranspositionTable, observer_hash
+from endgame import EndgameSolver
+from odds import load_odds
+
+NUM_MOODS = len(MOOD_TYPES)
+STEAL_MOOD = CARD_IDS['steal_mood']
+SWAP_HANDS = CARD_IDS['swap_hands']
+BLOCK_MOOD = CARD_IDS['block_mood']
+DOUBLE_TROUBLE = CARD_IDS['double_trouble']
+
+DEFAULT_TIME_BUDGET = 0.25  # Seconds per decision
+DEFAULT_ROLLOUT_TURNS = 16  # Turns a rollout plays before the position is scored
+EXPLORATION = 0.7
+DEFAULT_TABLE_SIZE = 1 << 16  # Transposition table buckets
+PONDER_CHUNK = 64  # Iterations spent on each sampled outcome of the other players' moves
+
+class Node:
+    """One information set in the search graph"""
+    __slots__ = ('player', 'children', 'visits', 'reward', 'available')
+
+    def __init__(self, player=-1):
+        self.player = player  # Seat whose move led here; rewards are from its side
+        self.children = {}  # action -> Node
+        self.visits = 0
+        self.reward = 0.0
+        self.available = 0  # Iterations in which this action was legal
+
+    def ucb(self, exploration):
+        return (self.reward / self.visits +
+                exploration * math.sqrt(math.log(self.available) / self.visits))
+
+def rollout(state, rng, max_turns, score=None):
+    """Play random moves to the end (or max_turns turns) in place; return the winning seat or -1
+
+    Works directly on the state's lists and mirrors SearchState.apply, so no
+    records, action lists or card objects are created per step. An unfinished
+    rollout goes to score(state) (default: leader)
+    """
+    hands, moods, blocked = state.hands, state.moods, state.blocked
+    deck, discards = state.deck, state.discards
+    players = state.num_players
+    seat, phase, turns = state.current, state.phase, state.turns
+    limit = min(state.max_turns, turns + max_turns)
+
+    while True:
+        own = seat * NUM_CARD_TYPES
+        if phase == 'draw':
+            if not deck and state.reshuffle_discards:
+                state.recycle_discards()
+                discards = state.discards
+            if deck:
+                hands[own + deck.pop()] += 1
+
+        # Play a random playable card, as RandomPolicy does
+        is_blocked = blocked[seat] > 0
+        playable = 0
+        if phase != 'discard':
+            for card_id in range(NUM_CARD_TYPES):
+                if not (is_blocked and (card_id == STEAL_MOOD or card_id == DOUBLE_TROUBLE)):
+                    playable += hands[own + card_id]
+        if playable:
+            pick = rng.randrange(playable)
+            card_id = 0
+            for card_id in range(NUM_CARD_TYPES):
+                if is_blocked and (card_id == STEAL_MOOD or card_id == DOUBLE_TROUBLE):
+                    continue
+                pick -= hands[own + card_id]
+                if pick < 0:
+                    break
+            hands[own + card_id] -= 1
+            target = (seat + rng.randrange(1, players)) % players
+            other = target * NUM_CARD_TYPES
+            if card_id < NUM_MOODS:
+                moods[seat * MOOD_SLOTS + card_id] += 1
+            elif card_id == WILD_MOOD_ID:
+                moods[seat * MOOD_SLOTS + WILD_SLOT] += 1
+            else:
+                discards[card_id] += 1
+                if card_id == STEAL_MOOD:
+                    total = 0
+                    for c in range(NUM_CARD_TYPES):
+                        total += hands[other + c]
+                    if total:
+                        pick = rng.randrange(total)
+                        for c in range(NUM_CARD_TYPES):
+                            pick -= hands[other + c]
+                            if pick < 0:
+                                hands[other + c] -= 1
+                                hands[own + c] += 1
+                                break
+                elif card_id == SWAP_HANDS:
+                    for c in range(NUM_CARD_TYPES):
+                        hands[own + c], hands[other + c] = hands[other + c], hands[own + c]
+                elif card_id == BLOCK_MOOD:
+                    blocked[target] = BLOCK_TURNS
+                else:  # Double trouble
+                    base = target * MOOD_SLOTS
+                    total = 0
+                    for slot in range(MOOD_SLOTS):
+                        total += moods[base + slot]
+                    if total:
+                        pick = rng.randrange(total)
+                        for slot in range(MOOD_SLOTS):
+                            pick -= moods[base + slot]
+                            if pick < 0:
+                                moods[base + slot] -= 1
+                                discards[WILD_MOOD_ID if slot == WILD_SLOT else slot] += 1
+                                break
+
+            # Win check: every missing mood covered by a wild
+            base = seat * MOOD_SLOTS
+            missing = 0
+            for slot in range(NUM_MOODS):
+                if not moods[base + slot]:
+                    missing += 1
+            if missing <= moods[base + WILD_SLOT]:
+                return seat
+
+        # Discard a random card
+        total = 0
+        for card_id in range(NUM_CARD_TYPES):
+            total += hands[own + card_id]
+        if total:
+            pick = rng.randrange(total)
+            for card_id in range(NUM_CARD_TYPES):
+                pick -= hands[own + card_id]
+                if pick < 0:
+                    hands[own + card_id] -= 1
+                    discards[card_id] += 1
+                    break
+
+        turns += 1
+        seat = (seat + 1) % players
+        if blocked[seat]:
+            blocked[seat] -= 1
+        phase = 'draw'
+        if turns >= limit:
+            return leader(state) if score is None else score(state)
+        if not deck and not (state.reshuffle_discards and any(discards)) and not any(hands):
+            return -1
+
+def leader(state):
+    """Score an unfinished rollout: the seat needing the fewest moods, or -1 on a tie"""
+    best, best_needed, tied = -1, NUM_MOODS + 1, False
+    for seat in range(state.num_players):
+        needed = state.moods_needed(seat)
+        if needed < best_needed:
+            best, best_needed, tied = seat, needed, False
+        elif needed == best_needed:
+            tied = True
+    return -1 if tied else best
+
+class ISMCTS:
+    """Anytime single-observer ISMCTS over SearchState positions"""
+
+    def __init__(self, rng=None, exploration=EXPLORATION, rollout_turns=DEFAULT_ROLLOUT_TURNS,
+                 table_size=DEFAULT_TABLE_SIZE, odds=None):
+        self.rng = rng or random.Random()
+        self.exploration = exploration
+        self.rollout_turns = rollout_turns
+        self.table = TranspositionTable(table_size)  # Kept across searches to reuse results
+        self.generation = 0  # Ages out entries from earlier searches
+        self.root = None
+        self.root_state = None
+        self.seat = None
+        self.scratch = None
+        self.iterations = 0
+        self.stopped = False
+        self.solver = None  # EndgameSolver used at small-deck leaves, if any
+        self.deadline = None
+        # Unfinished rollouts go to the likeliest to flip out once the odds table is built
+        odds = odds if odds is not None else load_odds()
+        self.score = odds.leader if odds is not None else None
+
+    def set_root(self, state, seat=None):
+        """Start a new search from a position, as seen by seat (default: the player to move)"""
+        self.root_state = state
+        self.seat = state.current if seat is None else seat
+        self.scratch = state.clone()
+        self.scratch.rng = self.rng
+        self.scratch.rehash()
+        self.generation += 1
+        self.root = self.node(self.scratch, 0)
+        self.iterations = 0
+        self.stopped = False
+
+    def node(self, state, depth):
+        """Get the node for a position, sharing it with any transposition"""
+        key = observer_hash(state, self.seat)
+        node = self.table.get(key)
+        if node is None:
+            node = Node((state.current - 1) % state.num_players if state.phase == 'draw'
+                        else state.current)
+            self.table.store(key, node, self.generation * 1024 - depth)
+        return node
+
+    def determinize(self):
+        """Copy the root into the scratch state and deal the unseen cards at random"""
+        root, scratch, rng = self.root_state, self.scratch, self.rng
+        scratch.hands[:] = root.hands
+        scratch.moods[:] = root.moods
+        scratch.blocked[:] = root.blocked
+        scratch.discards[:] = root.discards
+        scratch.current, scratch.phase = root.current, root.phase
+        scratch.turns, scratch.winner = root.turns, root.winner
+
+        unseen = root.deck[:]
+        sizes = []
+        for seat in range(root.num_players):
+            if seat == self.seat:
+                continue
+            base = seat * NUM_CARD_TYPES
+            size = 0
+            for card_id in range(NUM_CARD_TYPES):
+                count = root.hands[base + card_id]
+                if count:
+                    unseen.extend([card_id] * count)
+                    size += count
+                    scratch.hands[base + card_id] = 0
+            sizes.append((base, size))
+        rng.shuffle(unseen)
+        for base, size in sizes:
+            for _ in range(size):
+                scratch.hands[base + unseen.pop()] += 1
+        scratch.deck[:] = unseen
+        scratch.rehash()
+        return scratch
+
+    def iterate(self):
+        """Run one determinize/select/expand/rollout/backpropagate iteration"""
+        state = self.determinize()
+        node = self.root
+        path = [node]
+        while not state.is_terminal():
+            actions = state.legal_actions()
+            children = node.children
+            untried = []
+            for action in actions:
+                child = children.get(action)
+                if child is None:
+                    untried.append(action)
+                else:
+                    child.available += 1
+            if untried:
+                action = self.rng.choice(untried)
+                state.apply(action)
+                child = self.node(state, len(path))
+                child.available += 1
+                children[action] = child
+                path.append(child)
+                break
+            action = max(actions, key=lambda a: children[a].ucb(self.exploration))
+            state.apply(action)
+            node = children[action]
+            path.append(node)
+
+        values = None
+        if state.is_terminal():
+            winner = state.winner
+        else:
+            if self.solver is not None and len(state.deck) <= self.solver.max_deck:
+                values = self.solver.solve(state, self.deadline)
+            if values is None:
+                winner = rollout(state, self.rng, self.rollout_turns, self.score)
+        for node in path:
+            node.visits += 1
+            if values is not None:
+                node.reward += values[node.player]
+            elif winner == node.player:
+                node.reward += 1.0
+        self.iterations += 1
+
+    def stop(self):
+        """Interrupt a running search; it returns its best action so far"""
+        self.stopped = True
+
+    def search(self, time_budget=DEFAULT_TIME_BUDGET, iterations=None, should_stop=None):
+        """Iterate until the time budget or iteration count runs out, or until interrupted
+
+        should_stop is polled between iterations, for stop requests from
+        another process
+        """
+        deadline = time.perf_counter() + time_budget if time_budget is not None else None
+        self.deadline = deadline
+        done = 0
+        while iterations is None or done < iterations:
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            if self.stopped or (should_stop is not None and should_stop()):
+                break
+            self.iterate()
+            done += 1
+        return self.best_action()
+
+    def best_action(self):
+        """Get the most visited legal action so far; callable at any time"""
+        legal = self.root_state.legal_actions()
+        children = self.root.children
+        searched = [action for action in legal if action in children]
+        if not searched:
+            return legal[0]
+        return max(searched, key=lambda action: children[action].visits)
+
+    def set_budget(self, budget):
+        """Use a difficulty budget's rollout length and endgame solver"""
+        self.rollout_turns = budget['rollout_turns']
+        endgame_deck = budget.get('endgame_deck', 0)
+        if not endgame_deck:
+            self.solver = None
+        elif self.solver is None or self.solver.max_deck != endgame_deck:
+            self.solver = EndgameSolver(endgame_deck)
+
+    def search_budget(self, budget, should_stop=None):
+        """Search within a difficulty budget
+
+        budget holds 'iterations', 'time', 'rollout_turns' and optionally
+        'endgame_deck', the deck size at which exact endgame values replace rollouts
+        """
+        self.set_budget(budget)
+        iterations = budget['iterations']
+        if iterations is not None and self.root.children:
+            # Visits left by earlier searches of this position, such as pondering, count
+            iterations = max(0, iterations - self.root.visits)
+        return self.search(budget['time'], iterations, should_stop)
+
+    def ponder(self, state, seat, policy, time_budget=None, should_stop=None,
+               chunk=PONDER_CHUNK):
+        """Search seat's likely next positions while other players are on turn
+
+        Each round deals the cards seat cannot see, plays the other players'
+        moves with policy(state) and seat's draw, and searches the position seat
+        then plays from for chunk iterations. The results stay in the table,
+        where seat's search of the real position finds them. Returns the
+        iterations run
+        """
+        deadline = time.perf_counter() + time_budget if time_budget is not None else None
+        total = 0
+        while not self.stopped and not (should_stop is not None and should_stop()):
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            self.set_root(state, seat)
+            outcome = self.determinize()
+            while not outcome.is_terminal() and (outcome.current != seat or
+                                                 outcome.phase != 'play'):
+                if outcome.current == seat:
+                    outcome.apply(outcome.legal_actions()[0])  # DRAW, or PASS once exhausted
+                else:
+                    outcome.apply(policy(outcome))
+            if outcome.is_terminal():
+                if deadline is None:
+                    break  # Nothing to search, and no deadline would end the loop
+                continue
+            self.set_root(outcome.clone(), seat)
+            remaining = deadline - time.perf_counter() if deadline is not None else None
+            self.search(remaining, chunk, should_stop)
+            if not self.iterations:
+                break
+            total += self.iterations
+        return total
+
+def difficulty_budget(difficulty=None):
+    """Get the search budget for a difficulty (default: AI_SETTINGS['difficulty'])"""
+    budgets = get_setting('AI_SETTINGS', 'difficulty_budgets')
+    if difficulty is None:
+        difficulty = get_setting('AI_SETTINGS', 'difficulty', 'medium')
+    return dict(budgets.get(str(difficulty).lower(), budgets['medium']))
+
+def choose_action(state, seat=None, budget=None, rng=None):
+    """Search a position within a budget (default: the current difficulty's); return the action"""
+    search = ISMCTS(rng)
+    search.set_root(state, seat)
+    return search.search_budget(budget or difficulty_budget())
+
+def hand_index(hand, card_id):
+    """Get the index of a card with the given id in a hand"""
+    return next(i for i, card in enumerate(hand) if card.card_id == card_id)
+
+class ISMCTSPolicy(PriorityPolicy):
+    """Engine policy that picks plays and discards with ISMCTS"""
+    name = 'ismcts'
+
+    def __init__(self, rng=None, budget=None):
+        super().__init__(rng)
+        self.budget = budget or difficulty_budget()
+
+    def search(self, game):
+        state = SearchState.from_game(game)
+        state.rng = self.rng
+        return choose_action(state, budget=self.budget, rng=self.rng)
+
+    def choose_play(self, game, player):
+        """Pick (card_index, target_player) to play, or None to skip"""
+        kind, card_id, target = decode_action(self.search(game))
+        if kind == 'play_mood':
+            return hand_index(player.hand, card_id), None
+        if kind == 'play_swing':
+            target_player = None if card_id == WILD_MOOD_ID else game.players[target]
+            return hand_index(player.hand, card_id), target_player
+        return None
+
+    def choose_discard(self, game, player):
+        """Pick a card index to discard, or None to keep the hand"""
+        kind, card_id, _ = decode_action(self.search(game))
+        return hand_index(player.hand, card_id) if kind == 'discard' else None
+
+POLICIES[ISMCTSPolicy.name] = ISMCTSPolicy
+
+class LookupPolicy(ISMCTSPolicy):
+    """Base for policies whose search() looks moves up in a trained table or network
+
+    Until that is trained, ready is False and PriorityPolicy picks the moves
+    """
+
+    def __init__(self, rng=None, budget=None):
+        super().__init__(rng, budget)
+        self.fallback = PriorityPolicy(self.rng)
+
+    @property
+    def ready(self):
+        """Check if the trained table or network is loaded"""
+        return False
+
+    def choose_play(self, game, player):
+        """Pick (card_index, target_player) to play, or None to skip"""
+        if not self.ready:
+            return self.fallback.choose_play(game, player)
+        return super().choose_play(game, player)
+
+    def choose_discard(self, game, player):
+        """Pick a card index to discard, or None to keep the hand"""
+        if not self.ready:
+            return self.fallback.choose_discard(game, player)
+        return super().choose_discard(game, player)
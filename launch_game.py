@@ -5,6 +5,7 @@ Launch script for Py_Card - The Mood Swing Card Game
 
 import sys
 import os
+import argparse
 
 def check_dependencies():
     """Check if required dependencies are installed"""
@@ -29,11 +30,166 @@ def check_assets():
     
     return True
 
+def parse_args(argv=None):
+    """Parse launcher command line options"""
+    parser = argparse.ArgumentParser(description="Py_Card - The Mood Swing Card Game")
+    parser.add_argument('--headless', action='store_true',
+                        help="play AI-only games without opening a window")
+    parser.add_argument('--games', type=int, default=1,
+                        help="number of headless games to play")
+    parser.add_argument('--batch', action='store_true',
+                        help="simulate headless games in lockstep with NumPy")
+    parser.add_argument('--tournament', action='store_true',
+                        help="play a headless tournament between the AI_SETTINGS policies")
+    parser.add_argument('--fuzz', action='store_true',
+                        help="fuzz the rules engine with --games seeds of --steps steps each")
+    parser.add_argument('--build-odds', action='store_true',
+                        help="precompute the win-probability table used by the AI and UI")
+    parser.add_argument('--endgame', action='store_true',
+                        help="solve --games random small-deck endgames and report the solve rate")
+    parser.add_argument('--cfr', action='store_true',
+                        help="train the CFR policy table for --games more self-play games")
+    parser.add_argument('--selfplay', action='store_true',
+                        help="train the policy network for --generations self-play generations")
+    parser.add_argument('--generations', type=int, default=10,
+                        help="self-play generations, each of --games games (default 10)")
+    parser.add_argument('--steps', type=int, default=10000,
+                        help="fuzz steps per seed")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes for tournaments (default: all cores)")
+    parser.add_argument('--players', type=int, default=4,
+                        help="number of players in each headless game")
+    parser.add_argument('--engine-process', action='store_true',
+                        help="run rules and AI in a separate process from the game window")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="random seed for reproducible headless runs")
+    return parser.parse_args(argv)
+
+def run_headless(args):
+    """Play headless games and report throughput"""
+    if args.batch:
+        from batch_sim import run_batch as run_games
+    else:
+        from engine import run_games
+    
+    stats = run_games(args.games, num_players=args.players, seed=args.seed)
+    print(f"✓ Played {stats['games']} games in {stats['elapsed']:.2f}s "
+          f"({stats['games_per_second']:.1f} games/s)")
+    print(f"  Average game length: {stats['average_turns']:.1f} turns")
+    for seat, wins in enumerate(stats['wins']):
+        print(f"  Seat {seat + 1}: {wins} wins")
+    print(f"  No winner: {stats['draws']}")
+
+def run_tournament(args):
+    """Play an AI tournament across worker processes and report results"""
+    from tournament import run_tournament as play_tournament
+    
+    stats = play_tournament(args.games, num_players=args.players, seed=args.seed,
+                            workers=args.workers)
+    print(f"✓ Played {stats['games']} games on {stats['workers']} workers in "
+          f"{stats['elapsed']:.2f}s ({stats['games_per_second']:.1f} games/s)")
+    print(f"  Average game length: {stats['average_turns']:.1f} turns")
+    for name, rate in stats['win_rates'].items():
+        print(f"  {name}: {rate:.1%} win rate")
+    for seat, rate in enumerate(stats['seat_win_rates']):
+        print(f"  Seat {seat + 1}: {rate:.1%} of games won")
+    print(f"  No winner: {stats['draws']}")
+
+def run_fuzz(args):
+    """Fuzz the rules engine and report any shrunk invariant failures"""
+    from fuzz import run_fuzz as fuzz_rules
+    
+    stats = fuzz_rules(args.games, args.steps, seed=args.seed, num_players=args.players,
+                       workers=args.workers)
+    print(f"✓ Fuzzed {stats['steps']} steps on {stats['workers']} workers in "
+          f"{stats['elapsed']:.2f}s ({stats['steps_per_second']:.0f} steps/s)")
+    for failure in stats['failures']:
+        print(f"❌ Seed {failure['seed']}: {failure['message']}")
+        print(f"   Minimal sequence: {failure['ops']}")
+    if not stats['failures']:
+        print("  All invariants held")
+
+def build_odds(args):
+    """Precompute and save the memory-mapped win-probability table"""
+    import time
+    from odds import DEFAULT_ODDS_PATH, build_table, save_table
+    from scenarios import deck_composition
+    
+    start = time.perf_counter()
+    table = build_table()
+    save_table(table)
+    print(f"✓ Built a {table.nbytes / 1e6:.1f} MB win-probability table for the "
+          f"{sum(deck_composition())}-card deck in {time.perf_counter() - start:.2f}s")
+    print(f"  Saved to {DEFAULT_ODDS_PATH}")
+
+def run_endgame(args):
+    """Solve sampled endgame positions, memoizing them on disk, and report the results"""
+    from endgame import DEFAULT_MEMO_PATH, survey
+    
+    stats = survey(args.games, num_players=args.players, seed=args.seed,
+                   memo_path=DEFAULT_MEMO_PATH)
+    print(f"✓ Solved {stats['solved']} of {stats['attempted']} new endgames "
+          f"({stats['solve_rate']:.0%}) in {stats['elapsed']:.2f}s")
+    print(f"  Table size: {stats['table_size']} positions "
+          f"({stats['memo_hits']} memo hits, {stats['too_large']} too large)")
+    print(f"  Memo saved to {DEFAULT_MEMO_PATH}")
+
+def run_cfr(args):
+    """Train the CFR policy from its checkpoint and export the policy table"""
+    import time
+    from cfr import DEFAULT_CHECKPOINT_PATH, DEFAULT_POLICY_PATH, NUM_INFO_SETS, train
+    
+    start = time.perf_counter()
+    trainer, table = train(args.games, num_players=args.players, seed=args.seed)
+    print(f"✓ Trained {args.games} self-play games in {time.perf_counter() - start:.2f}s "
+          f"({trainer.games} in total)")
+    print(f"  Information sets visited: {trainer.visited()} of {NUM_INFO_SETS}")
+    print(f"  Checkpoint saved to {DEFAULT_CHECKPOINT_PATH}")
+    print(f"  {table.nbytes / 1e3:.0f} KB policy table saved to {DEFAULT_POLICY_PATH}")
+
+def run_selfplay(args):
+    """Train the policy network by gated self-play and report each generation"""
+    from selfplay import DEFAULT_GAMES, DEFAULT_NETWORK_PATH, run_selfplay as train_network
+    
+    games = args.games if args.games > 1 else DEFAULT_GAMES  # --games defaults to one game
+    _, history = train_network(args.generations, games, num_players=args.players,
+                               seed=args.seed, workers=args.workers)
+    for report in history:
+        verdict = "kept" if report['accepted'] else "rejected"
+        print(f"  Generation {report['generation'] + 1}: {report['samples']} samples, "
+              f"candidate won {report['win_rate']:.0%} ({verdict}) in {report['elapsed']:.2f}s")
+    kept = sum(report['accepted'] for report in history)
+    print(f"✓ Kept {kept} of {len(history)} candidates; network saved to {DEFAULT_NETWORK_PATH}")
+
 def main():
     """Main launcher function"""
+    args = parse_args()
+    
     print("🎴 Py_Card - The Mood Swing Card Game")
     print("=" * 40)
     
+    if args.tournament:
+        run_tournament(args)
+        return
+    if args.fuzz:
+        run_fuzz(args)
+        return
+    if args.build_odds:
+        build_odds(args)
+        return
+    if args.endgame:
+        run_endgame(args)
+        return
+    if args.cfr:
+        run_cfr(args)
+        return
+    if args.selfplay:
+        run_selfplay(args)
+        return
+    if args.headless:
+        run_headless(args)
+        return
+    
     # Check dependencies
     if not check_dependencies():
         sys.exit(1)
@@ -50,7 +206,7 @@ def main():
     try:
         # Import and run the game
         from main import FlipOutGame
-        game = FlipOutGame()
+        game = FlipOutGame(remote_engine=args.engine_process)
         game.run()
     except Exception as e:
         print(f"\n❌ Error launching game: {e}")
@@ -2,9 +2,22 @@ import pygame
 import sys
 import random
 import time
-from game_logic import Card, Deck, Player
+from concurrent.futures import Future
+from game_logic import Card, Deck, GameLogic, Player
+from card import CARD_KIND_SWING, WILD_MOOD_ID
 from ui_manager import UIManager
 from constants import *
+from game_config import get_setting
+from game_log import game_log, configure_from_settings
+from events import EventBus, ANY_EVENT, MOOD_ADDED, MOOD_REMOVED, PHASE_CHANGED
+from history import GameHistory
+from actions import DRAW, PASS, DISCARD, PLAY_MOOD, play_swing_action, decode_action
+from search_state import SearchState
+from ismcts import ISMCTSPolicy, difficulty_budget, hand_index
+from ai_worker import AIWorker
+from cfr import load_policy, table_action
+from selfplay import load_network
+from odds import READOUT_TURNS, load_odds
 
 class GameState:
     """Centralized game state management"""
@@ -12,6 +25,7 @@ class GameState:
         self.phase = 'title'  # title, tutorial, playing, game_over
         self.turn_phase = 'draw'  # draw, play, discard
         self.current_player_index = 0
+        self.turn_number = 0  # Turns completed since the game started
         self.selected_card = None
         self.target_player = None
         self.dragging_card = None
@@ -20,6 +34,7 @@ class GameState:
         self.game_message = ""
         self.message_timer = 0
         self.winner = None
+        self.flip_out_chance = None  # Your chance to flip out within READOUT_TURNS turns
         
         # Tutorial state
         self.tutorial_mode = False
@@ -43,7 +58,7 @@ class DragManager:
         self.drag_start_pos = start_pos
         self.original_pos = original_pos
         self.drag_offset = (0, 0)
-        print(f"🎴 Started dragging {card.name}")
+        game_log.debug('drag_started', "🎴 Started dragging {card}", card=card.name)
     
     def update_drag(self, current_pos):
         """Update drag position"""
@@ -63,7 +78,8 @@ class DragManager:
         self.drag_offset = (0, 0)
         self.original_pos = None
         
-        print(f"🎴 Ended drag at {end_pos}, target: {drop_info}")
+        game_log.debug('drag_ended', "🎴 Ended drag at {position}, target: {target}",
+                       position=end_pos, target=drop_info)
         return drop_info
     
     def find_drop_target(self, pos):
@@ -71,10 +87,55 @@ class DragManager:
         # This will be implemented to detect opponents, discard pile, etc.
         return {'type': 'none', 'target': None, 'position': pos}
 
+class AITurnScheduler:
+    """Spreads AI draw, play and discard steps across frames instead of sleeping"""
+    STEPS = ('draw', 'play', 'discard')
+    
+    # Delay multipliers for GAME_SETTINGS['game_speed']
+    SPEED_MULTIPLIERS = {'slow': 1.5, 'normal': 1.0, 'fast': 0.5}
+    
+    def __init__(self):
+        self.active = False
+        self.player = None
+        self.step_index = 0
+        self.next_step_time = 0.0
+    
+    def get_delays(self):
+        """Get (thinking, step) delays in seconds from the AI and game settings"""
+        speed = str(get_setting('GAME_SETTINGS', 'game_speed', 'normal')).lower()
+        multiplier = self.SPEED_MULTIPLIERS.get(speed, 1.0)
+        thinking_delay = get_setting('AI_SETTINGS', 'thinking_delay', 1.0) * multiplier
+        return thinking_delay, thinking_delay / 2
+    
+    def start(self, player, now):
+        """Begin an AI turn; the first step runs after the thinking delay"""
+        self.active = True
+        self.player = player
+        self.step_index = 0
+        self.next_step_time = now + self.get_delays()[0]
+    
+    def update(self, now):
+        """Get the step that is due now, or None if the AI is still waiting"""
+        if not self.active or now < self.next_step_time:
+            return None
+        step = self.STEPS[self.step_index]
+        self.step_index += 1
+        if self.step_index >= len(self.STEPS):
+            self.active = False
+        else:
+            self.next_step_time = now + self.get_delays()[1]
+        return step
+    
+    def cancel(self):
+        """Abandon any AI turn in progress"""
+        self.active = False
+        self.player = None
+
 class FlipOutGame:
     """Main game class with robust architecture"""
     
-    def __init__(self):
+    def __init__(self, remote_engine=False):
+        configure_from_settings()
         pygame.init()
         self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
         pygame.display.set_caption("Flip Out! - The Mood Swing Card Game")
@@ -85,12 +146,35 @@ class FlipOutGame:
         self.state = GameState()
         self.drag_manager = DragManager()
         self.ui_manager = UIManager(self.screen)
+        self.ai_scheduler = AITurnScheduler()
+        self.history = GameHistory()  # One snapshot per turn for rewind and the debug view
+        self.logic = GameLogic()  # Resolves AI swing card effects
+        self.ai_worker = AIWorker()  # Searches AI moves in another process
+        self.ai_request = None  # (state, future) of the AI decision being searched
+        self.ai_rng = random.Random()
+        self.ai_policy = ISMCTSPolicy(self.ai_rng)
+        self.cfr_table = load_policy()  # Trained CFR policy table, if one has been exported
+        self.network = load_network()  # Self-play policy network, if one has been trained
+        self.odds = load_odds()  # Win-probability table, if launch_game.py --build-odds has run
+        self.target_fps = get_setting('PERFORMANCE_SETTINGS', 'target_fps', 60)
+        
+        # Model change events drive win checks and redraws instead of polling every frame
+        self.events = EventBus()
+        self.events.subscribe(MOOD_ADDED, self.on_moods_changed)
+        self.events.subscribe(MOOD_REMOVED, self.on_moods_changed)
+        self.events.subscribe(ANY_EVENT, self.on_model_changed)
+        self.win_check_pending = True
+        self.needs_redraw = True
         
         # Game objects
         self.players = []
         self.deck = None
         self.discard_pile = []
         
+        # Optional engine process; rules and AI then run outside the render loop
+        self.remote_engine = remote_engine
+        self.engine = None
+        
         # Initialize game
         self.setup_game()
         
@@ -102,7 +186,7 @@ class FlipOutGame:
         self.setup_players()
         self.setup_deck()
         self.deal_initial_cards()
-        print("✓ Game setup complete")
+        game_log.info('game_setup', "✓ Game setup complete")
     
     def setup_players(self):
         """Create players"""
@@ -112,21 +196,25 @@ class FlipOutGame:
             Player("AI Player 2", is_ai=True),
             Player("AI Player 3", is_ai=True)
         ]
+        for player in self.players:
+            player.attach_events(self.events)
     
     def setup_deck(self):
         """Create and shuffle the deck"""
-        self.deck = Deck()
+        self.deck = Deck(reshuffle_discards=get_setting('BALANCE_SETTINGS', 'reshuffle_discards', True),
+                         events=self.events)
         self.deck.shuffle()
-        print(f"✓ Created deck with {len(self.deck.cards)} cards")
+        self.discard_pile = self.deck.discard_pile
+        game_log.info('deck_created', "✓ Created deck with {cards} cards", cards=self.deck.get_card_count())
     
     def deal_initial_cards(self):
         """Deal initial cards to all players"""
         for player in self.players:
             for _ in range(5):
-                if self.deck.cards:
-                    card = self.deck.draw()
+                card = self.deck.draw()
+                if card:
                     player.add_card_to_hand(card)
-        print("✓ Dealt initial cards to all players")
+        game_log.info('cards_dealt', "✓ Dealt initial cards to all players")
     
     def setup_tutorial(self):
         """Setup tutorial system"""
@@ -172,6 +260,8 @@ class FlipOutGame:
     def handle_events(self):
         """Main event handling system"""
         for event in pygame.event.get():
+            # Input can move the mouse, drag cards or open overlays, so redraw
+            self.needs_redraw = True
             if event.type == pygame.QUIT:
                 self.running = False
                 return
@@ -256,6 +346,11 @@ class FlipOutGame:
     
     def handle_game_events(self, event):
         """Handle events during actual gameplay"""
+        if self.ai_scheduler.active:
+            # Only quitting is allowed while an AI player is taking its turn
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                self.running = False
+            return
         if event.type == pygame.KEYDOWN:
             self.handle_game_keydown(event)
         elif event.type == pygame.MOUSEBUTTONDOWN:
@@ -273,6 +368,10 @@ class FlipOutGame:
             self.advance_turn_phase()
         elif event.key == pygame.K_r:
             self.reset_game()
+        elif event.key == pygame.K_u:
+            self.rewind_turn()
+        elif event.key == pygame.K_y:
+            self.replay_turn()
     
     def handle_game_click(self, event):
         """Handle mouse clicks during gameplay"""
@@ -318,30 +417,80 @@ class FlipOutGame:
         self.state.phase = 'tutorial'
         self.state.tutorial_step = 0
         self.state.tutorial_mode = True
-        print("🎓 Tutorial started!")
+        game_log.info('tutorial_started', "🎓 Tutorial started!")
     
     def next_tutorial_step(self):
         """Advance to next tutorial step"""
         self.state.tutorial_step += 1
         if self.state.tutorial_step >= len(self.tutorial_steps):
             self.state.tutorial_completed = True
-            print("🎓 Tutorial completed!")
+            game_log.info('tutorial_completed', "🎓 Tutorial completed!")
         else:
             current_step = self.tutorial_steps[self.state.tutorial_step]
-            print(f"🎓 Tutorial Step {self.state.tutorial_step + 1}: {current_step['title']}")
+            game_log.info('tutorial_step', "🎓 Tutorial Step {step}: {title}",
+                          step=self.state.tutorial_step + 1, title=current_step['title'])
     
     def start_game(self):
         """Start the actual game"""
         self.state.phase = 'playing'
         self.state.tutorial_mode = False
         self.state.current_player_index = 0
-        self.state.turn_phase = 'draw'
-        print("🎮 Game started!")
+        self.state.turn_number = 0
+        self.set_turn_phase('draw')
+        self.history.clear()
+        self.history.record(self)
+        if self.remote_engine:
+            self.start_engine()
+        elif get_setting('AI_SETTINGS', 'ai_type', 'ismcts') != 'random':
+            self.ai_worker.start()  # Warm up before the first AI turn
+        game_log.info('game_started', "🎮 Game started!")
+    
+    def start_engine(self):
+        """Hand rules and AI to an engine process and mirror its snapshots"""
+        from engine_process import EngineProcess, RemoteDeck
+        self.stop_engine()
+        self.engine = EngineProcess(len(self.players), human_seats=(0,),
+                                    step_delay=self.ai_scheduler.get_delays()[1])
+        self.engine.start()
+        self.deck = RemoteDeck(self.deck.get_card_count())
+    
+    def stop_engine(self):
+        """Shut down the engine process, if one is running"""
+        if self.engine is not None:
+            self.engine.stop()
+            self.engine = None
+    
+    def sync_engine(self):
+        """Mirror the newest engine snapshot into the local players, deck and discard pile"""
+        from engine_process import hand_cards, mood_cards, cards_from_counts
+        snapshot = self.engine.poll()
+        if self.engine.rejected:
+            self.show_message("⚠️ You can't do that right now")
+        if self.engine.result and self.engine.result['winner'] is None and snapshot:
+            self.show_message("🤝 The game ended with no winner")
+        if snapshot is None:
+            return
+        for seat, player in enumerate(self.players):
+            player.hand = hand_cards(snapshot, seat)
+            player.mood_cards = mood_cards(snapshot, seat)
+            player.blocked_until = snapshot['blocked'][seat]
+        self.deck.size = snapshot['deck_size']
+        self.discard_pile.clear()
+        self.discard_pile.extend(cards_from_counts(snapshot['discards']))
+        self.state.current_player_index = snapshot['current']
+        self.state.turn_number = snapshot['turns']
+        if snapshot['phase'] != self.state.turn_phase:
+            self.set_turn_phase(snapshot['phase'])
+        self.win_check_pending = True
+        self.needs_redraw = True
     
     def draw_card(self):
         """Draw a card from the deck"""
-        if self.deck.cards:
-            card = self.deck.draw()
+        if self.engine:
+            self.engine.act(DRAW)
+            return
+        card = self.deck.draw()
+        if card:
             self.players[0].add_card_to_hand(card)
             self.show_message(f"🎴 Drew: {card.name}")
             self.advance_turn_phase()
@@ -350,11 +499,14 @@ class FlipOutGame:
     
     def advance_turn_phase(self):
         """Move to next turn phase"""
+        if self.engine:
+            self.engine.act(PASS)
+            return
         if self.state.turn_phase == 'draw':
-            self.state.turn_phase = 'play'
+            self.set_turn_phase('play')
             self.show_message("🎯 Your turn: Play a card (optional)")
         elif self.state.turn_phase == 'play':
-            self.state.turn_phase = 'discard'
+            self.set_turn_phase('discard')
             self.show_message("🗑️ Your turn: Discard a card (optional)")
         elif self.state.turn_phase == 'discard':
             self.end_turn()
@@ -362,44 +514,160 @@ class FlipOutGame:
     def end_turn(self):
         """End current player's turn"""
         self.state.current_player_index = (self.state.current_player_index + 1) % len(self.players)
-        self.state.turn_phase = 'draw'
+        self.state.turn_number += 1
+        self.set_turn_phase('draw')
         self.state.selected_card = None
+        self.history.record(self)
         
-        if self.players[self.state.current_player_index].is_ai:
-            self.handle_ai_turn()
+        ai_player = self.players[self.state.current_player_index]
+        if ai_player.is_ai:
+            # AI steps run from the main loop, so the window keeps rendering
+            self.show_message(f"🤖 {ai_player.name}'s turn")
+            self.ai_scheduler.start(ai_player, time.perf_counter())
         else:
             self.show_message("🎴 Your turn! Click deck to draw")
     
     def handle_ai_turn(self):
-        """Handle AI player turns"""
-        ai_player = self.players[self.state.current_player_index]
-        self.show_message(f"🤖 {ai_player.name}'s turn")
+        """Run the AI turn step that is due this frame, if any"""
+        ai_player = self.ai_scheduler.player
+        step = self.ai_scheduler.update(time.perf_counter())
+        if step is None:
+            return
         
-        # Simple AI: draw, play random card, discard random card
-        time.sleep(1)
-        if self.deck.cards:
+        if step == 'draw':
             card = self.deck.draw()
-            ai_player.add_card_to_hand(card)
+            if card:
+                ai_player.add_card_to_hand(card)
+            self.set_turn_phase('play')
+            self.request_ai_action(ai_player)
+        elif step == 'play':
+            self.play_ai_action(ai_player, self.collect_ai_action())
+            self.set_turn_phase('discard')
+            self.request_ai_action(ai_player)
+        elif step == 'discard':
+            self.play_ai_action(ai_player, self.collect_ai_action())
+            self.end_turn()
+    
+    def request_ai_action(self, ai_player):
+        """Start searching the AI's decision for this phase while the window keeps rendering"""
+        if not ai_player.hand:
+            return
+        seat = self.players.index(ai_player)
+        state = SearchState.from_objects(self.players, self.deck, seat, self.state.turn_phase,
+                                         self.state.turn_number, rng=self.ai_rng)
+        future = None
+        ai_type = get_setting('AI_SETTINGS', 'ai_type', 'ismcts')
+        action = self.instant_action(state, ai_type)
+        if action is not None:
+            future = Future()
+            future.set_result(action)
+        elif ai_type != 'random':
+            # Leave headroom so the answer is back before the step is due; a search that
+            # runs over is interrupted then and answers with its best move so far
+            budget = difficulty_budget()
+            budget['time'] = min(budget['time'], self.ai_scheduler.get_delays()[1] * 0.8)
+            future = self.ai_worker.submit(state.clone(), seat, budget)
+        self.ai_request = (state, future)
+    
+    def instant_action(self, state, ai_type):
+        """Get the move of an AI that needs no search (a table or network lookup), if trained"""
+        if ai_type == 'cfr' and self.cfr_table is not None:
+            return table_action(self.cfr_table, state)
+        if ai_type == 'network' and self.network is not None:
+            return self.network.action(state)
+        return None
+    
+    def collect_ai_action(self):
+        """Get the searched AI decision, or a fallback move if the search is not back in time"""
+        if self.ai_request is None:
+            return PASS
+        state, future = self.ai_request
+        self.ai_request = None
+        if future is None:
+            return self.ai_rng.choice(state.legal_actions())
+        action, searched = self.ai_worker.result(future, state)
+        if not searched:
+            game_log.debug('ai_fallback', "⏱️ AI search ran out of time; playing a fallback move")
+        return action
+    
+    def cancel_ai_request(self):
+        """Drop any AI decision still being searched, and stop pondering"""
+        if self.ai_request is not None and self.ai_request[1] is not None:
+            self.ai_request[1].cancel()
+        self.ai_request = None
+        self.ai_worker.stop_pondering()
+    
+    def ai_searches(self):
+        """Check if AI moves come from the ISMCTS worker rather than a lookup or random play"""
+        ai_type = get_setting('AI_SETTINGS', 'ai_type', 'ismcts')
+        if ai_type == 'cfr':
+            return self.cfr_table is None
+        if ai_type == 'network':
+            return self.network is None
+        return ai_type != 'random'
+    
+    def ponder(self):
+        """On a human's turn, let the next AI search the likely outcomes of the human's move
         
-        time.sleep(0.5)
-        if ai_player.hand:
-            # Play a random card
-            card = random.choice(ai_player.hand)
-            ai_player.hand.remove(card)
+        The worker keeps what it finds, so the AI's own search starts from it
+        """
+        if self.state.phase != 'playing' or self.remote_engine or not self.ai_searches():
+            return
+        if not get_setting('AI_SETTINGS', 'ponder', True):
+            return
+        seat = self.state.current_player_index
+        players = len(self.players)
+        if self.players[seat].is_ai:
+            return
+        ai_seat = next((other % players for other in range(seat + 1, seat + players)
+                        if self.players[other % players].is_ai), None)
+        if ai_seat is None:
+            return
+        state = SearchState.from_objects(self.players, self.deck, seat, self.state.turn_phase,
+                                         self.state.turn_number, rng=self.ai_rng)
+        self.ai_worker.ponder(state, ai_seat)
+        game_log.debug('ai_ponder', "💭 {name} is thinking ahead",
+                       name=self.players[ai_seat].name)
+    
+    def play_ai_action(self, ai_player, action):
+        """Carry out an AI play or discard action on the game objects"""
+        kind, card_id, target = decode_action(action)
+        if kind == 'pass':
+            return
+        card = ai_player.hand[hand_index(ai_player.hand, card_id)]
+        ai_player.hand.remove(card)
+        if kind == 'discard':
             self.discard_pile.append(card)
-        
-        time.sleep(0.5)
-        if ai_player.hand:
-            # Discard a random card
-            card = random.choice(ai_player.hand)
-            ai_player.hand.remove(card)
+        elif card.card_id == WILD_MOOD_ID:
+            self.show_message(f"🎴 {self.logic.resolve_wild_mood(ai_player, card)}")
+        elif kind == 'play_mood':
+            if not ai_player.add_mood_card(card):
+                ai_player.hand.append(card)  # Not a mood card; keep it rather than lose it
+                return
+            self.show_message(f"🎴 {ai_player.name} collected {card.name}")
+        else:
+            target_player = self.players[target]
+            message = self.logic.execute_swing_card_effect(card, ai_player, target_player)
+            if card.card_type == 'double_trouble':
+                mood_index = self.ai_policy.choose_double_trouble(self, ai_player, target_player)
+                if mood_index is not None:
+                    discarded = self.logic.resolve_double_trouble(target_player, mood_index)
+                    if discarded:
+                        self.discard_pile.append(discarded)
             self.discard_pile.append(card)
-        
-        self.end_turn()
+            self.show_message(f"🎴 {ai_player.name}: {message}")
     
     def play_card_on_opponent(self, card, target_player):
         """Play a card on an opponent"""
-        if card.card_type == 'mood_swing':
+        if self.engine:
+            if card.card_id == WILD_MOOD_ID:
+                self.engine.act(play_swing_action(card.card_id, 0))  # Wilds join your own moods
+            elif card.kind == CARD_KIND_SWING:
+                self.engine.act(play_swing_action(card.card_id, self.players.index(target_player)))
+            else:
+                self.engine.act(PLAY_MOOD + card.card_id)
+            return
+        if card.kind == CARD_KIND_SWING:
             self.handle_mood_swing_card(card, target_player)
         else:
             # Regular mood card
@@ -425,16 +693,90 @@ class FlipOutGame:
     
     def discard_card(self, card):
         """Discard a card"""
+        if self.engine:
+            self.engine.act(DISCARD + card.card_id)
+            return
         self.players[0].hand.remove(card)
         self.discard_pile.append(card)
         self.show_message(f"🗑️ Discarded: {card.name}")
         self.advance_turn_phase()
     
+    def rewind_turn(self):
+        """Go back to the start of your previous turn"""
+        snapshot = self.history.undo()
+        while snapshot and self.players[snapshot.current_player_index].is_ai:
+            snapshot = self.history.undo()
+        if snapshot is None:
+            self.show_message("⏪ Nothing to rewind")
+            # Undo may have stepped back over AI turns; stay where the game is
+            self.history.jump_to_turn(self.state.turn_number)
+            return
+        self.restore_snapshot(snapshot)
+        self.show_message(f"⏪ Rewound to turn {snapshot.turn + 1}")
+    
+    def replay_turn(self):
+        """Redo a rewound turn, up to your next turn or the latest one recorded"""
+        snapshot = self.history.redo()
+        while snapshot and self.players[snapshot.current_player_index].is_ai and self.history.can_redo():
+            snapshot = self.history.redo()
+        if snapshot is None:
+            self.show_message("⏩ Nothing to redo")
+            return
+        self.restore_snapshot(snapshot)
+        self.show_message(f"⏩ Back to turn {snapshot.turn + 1}")
+    
+    def jump_to_turn(self, turn):
+        """Show the game as it was at the start of any recorded turn"""
+        snapshot = self.history.jump_to_turn(turn)
+        if snapshot:
+            self.restore_snapshot(snapshot)
+        return snapshot
+    
+    def restore_snapshot(self, snapshot):
+        """Load a history snapshot into the live game"""
+        self.ai_scheduler.cancel()
+        self.cancel_ai_request()
+        self.drag_manager = DragManager()
+        self.state.selected_card = None
+        self.history.restore(self, snapshot)
+        self.set_turn_phase(snapshot.turn_phase)
+        self.win_check_pending = True
+        self.needs_redraw = True
+        
+        player = self.players[self.state.current_player_index]
+        if player.is_ai:
+            self.ai_scheduler.start(player, time.perf_counter())
+    
+    def set_turn_phase(self, phase):
+        """Change the turn phase and notify listeners"""
+        self.state.turn_phase = phase
+        self.events.emit(PHASE_CHANGED, turn_phase=phase)
+        self.update_flip_out_chance()
+        self.ponder()  # Each human phase refines the position being pondered
+    
+    def update_flip_out_chance(self):
+        """Look up your chance to flip out soon, as shown on the game screen"""
+        if self.odds is None or self.remote_engine:
+            self.state.flip_out_chance = None
+            return
+        state = SearchState.from_objects(self.players, self.deck, self.state.current_player_index,
+                                         self.state.turn_phase, self.state.turn_number)
+        self.state.flip_out_chance = self.odds.state_chance(state, 0, READOUT_TURNS)
+    
+    def on_moods_changed(self, event_type, data):
+        """Only a change to some mood collection can produce a winner"""
+        self.win_check_pending = True
+    
+    def on_model_changed(self, event_type, data):
+        """Any model change invalidates the rendered game screen"""
+        self.needs_redraw = True
+    
     def show_message(self, message):
         """Show a game message"""
+        self.needs_redraw = True
         self.state.game_message = message
         self.state.message_timer = 120  # 2 seconds at 60 FPS
-        print(f"💬 {message}")
+        game_log.info('message', "💬 {text}", text=message)
     
     def update_message_timer(self):
         """Update message display timer"""
@@ -442,11 +784,12 @@ class FlipOutGame:
             self.state.message_timer -= 1
             if self.state.message_timer == 0:
                 self.state.game_message = ""
+                self.needs_redraw = True
     
     def check_win_condition(self):
         """Check if any player has won"""
         for player in self.players:
-            if len(player.mood_cards) >= 5:  # Need one of each mood
+            if player.is_winner():  # Constant time, from the player's running mood counts
                 return player
         return None
     
@@ -454,8 +797,14 @@ class FlipOutGame:
         """Reset the game to initial state"""
         self.state = GameState()
         self.drag_manager = DragManager()
+        self.ai_scheduler.cancel()
+        self.cancel_ai_request()
+        self.stop_engine()
+        self.history.clear()
         self.setup_game()
-        print("🔄 Game reset!")
+        self.win_check_pending = True
+        self.needs_redraw = True
+        game_log.info('game_reset', "🔄 Game reset!")
     
     def run(self):
         """Main game loop"""
@@ -466,12 +815,25 @@ class FlipOutGame:
             # Update game state
             if self.state.phase == 'playing':
                 self.update_message_timer()
+                if self.engine:
+                    self.sync_engine()
+                if self.ai_scheduler.active:
+                    self.handle_ai_turn()
+                
+                # Check win condition only after a mood collection changed
+                if self.win_check_pending:
+                    self.win_check_pending = False
+                    winner = self.check_win_condition()
+                    if winner:
+                        self.state.winner = winner
+                        self.state.phase = 'game_over'
+                        self.ai_worker.stop_pondering()
                 
-                # Check win condition
-                winner = self.check_win_condition()
-                if winner:
-                    self.state.winner = winner
-                    self.state.phase = 'game_over'
+                # The game screen is static until the model or input changes it
+                if not self.needs_redraw:
+                    self.clock.tick(self.target_fps)
+                    continue
+            self.needs_redraw = False
             
             # Render appropriate screen
             if self.state.phase == 'title':
@@ -497,7 +859,10 @@ class FlipOutGame:
             
             # Update display
             pygame.display.flip()
-            self.clock.tick(60)
+            self.clock.tick(self.target_fps)
+        
+        self.stop_engine()
+        self.ai_worker.shutdown()
 
 if __name__ == "__main__":
     game = FlipOutGame()
@@ -0,0 +1,187 @@
+"""
+Precomputed "chance to flip out" table for Flip Out! - The Mood Swing Card Game
+An offline dynamic-programming pass finds, for every solo position, the
+probability of completing the mood collection within k turns when each
+turn draws one unseen card and then plays a missing mood or a wild mood.
+The table is saved as a .npy file, with the deck composition it was built
+for beside it, and memory-mapped, so the AI and UI look chances up in O(1)
+instead of simulating.
+
+Moods are interchangeable, so a position reduces to:
+  unheld  - missing moods with no copy in hand (all their copies unseen)
+  held    - missing moods with a copy in hand
+  needed  - moods still needed once collected wilds are counted
+  wilds   - wild moods in hand
+  unseen_wilds, unseen - wild moods and cards the player has not seen
+Opponents are ignored; their hands count as unseen cards. Every copy of a
+missing mood not in hand is taken to be unseen, so once copies sit in the
+discard pile or in mood areas the chances are optimistic rather than exact
+"""
+
+import json
+import os
+import numpy as np
+from constants import *
+from card import WILD_MOOD_ID
+from scenarios import deck_composition
+from search_state import MOOD_SLOTS, WILD_SLOT
+
+NUM_MOODS = len(MOOD_TYPES)
+DEFAULT_MAX_TURNS = 20
+SCORE_TURNS = 8  # Turns looked ahead when scoring unfinished positions
+READOUT_TURNS = 5  # Horizon of the chance shown on the game screen
+DEFAULT_ODDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'win_odds.npy')
+
+def build_table(max_turns=DEFAULT_MAX_TURNS, composition='deck'):
+    """Compute the win-probability table
+
+    Indexed [turns, unheld, held, needed, wilds, unseen_wilds, unseen]; turns
+    runs from 0 to max_turns. The deck composition defaults to the dealt deck
+    (Deck.create_deck); pass 'balance' for BALANCE_SETTINGS
+    """
+    if isinstance(composition, str):
+        composition = deck_composition(composition)
+    copies = composition[0]  # Copies of each mood; all moods have the same count
+    total_wilds = composition[WILD_MOOD_ID]
+    deck_size = sum(composition)
+    shape = (NUM_MOODS + 1, NUM_MOODS + 1, NUM_MOODS + 1, total_wilds + 1, total_wilds + 1,
+             deck_size + 1)
+    unheld, held, needed, wilds, unseen_wilds, unseen = np.indices(shape)
+
+    # Play step: a held missing mood first, else a wild mood
+    play_mood = (held > 0) & (needed > 0)
+    play_wild = ~play_mood & (wilds > 0) & (needed > 0)
+    after_held = held - play_mood
+    after_wilds = wilds - play_wild
+    after_needed = needed - (play_mood | play_wild)
+
+    # Draw step outcomes, each followed by the play step
+    cards = np.maximum(unseen, 1)
+    p_mood = np.where(unseen > 0, np.minimum(unheld * copies, unseen) / cards, 0.0)
+    p_wild = np.where(unseen > 0, np.minimum(unseen_wilds, unseen) / cards, 0.0)
+    p_mood = np.minimum(p_mood, 1.0 - p_wild)
+    p_other = np.where(unseen > 0, 1.0 - p_mood - p_wild, 0.0)
+    no_draw = (unseen == 0).astype(np.float64)
+    fewer = np.maximum(unseen - 1, 0)
+
+    def played(board, u, h, w, uw, n):
+        """Look up board values after the play step from post-draw indices"""
+        h = np.minimum(h, NUM_MOODS)
+        w = np.minimum(w, total_wilds)
+        mood = (h > 0)
+        wild = ~mood & (w > 0)
+        return board[u, h - mood, np.maximum(needed - (mood | wild), 0), w - wild, uw, n]
+
+    table = np.zeros((max_turns + 1,) + shape, dtype=np.float32)
+    table[:, :, :, 0] = 1.0  # Nothing needed: already flipped out
+    for turns in range(1, max_turns + 1):
+        board = table[turns - 1]
+        value = p_other * played(board, unheld, held, wilds, unseen_wilds, fewer)
+        value += p_mood * played(board, np.maximum(unheld - 1, 0), held + 1, wilds, unseen_wilds,
+                                 fewer)
+        value += p_wild * played(board, unheld, held, wilds + 1, np.maximum(unseen_wilds - 1, 0),
+                                 fewer)
+        value += no_draw * board[unheld, after_held, after_needed, after_wilds, unseen_wilds, unseen]
+        table[turns] = np.where(needed == 0, 1.0, value)
+    return table
+
+def composition_path(path):
+    """Get the file recording the deck composition a table was built for"""
+    return os.path.splitext(path)[0] + '.json'
+
+def save_table(table, path=DEFAULT_ODDS_PATH, composition='deck'):
+    """Write the table as a plain .npy file that can be memory-mapped, and its composition"""
+    if isinstance(composition, str):
+        composition = deck_composition(composition)
+    np.save(path, table)
+    with open(composition_path(path), 'w') as f:
+        json.dump({'composition': list(composition)}, f)
+
+def table_composition(path):
+    """Get the deck composition a saved table was built for, or None if unknown"""
+    try:
+        with open(composition_path(path)) as f:
+            return json.load(f)['composition']
+    except (OSError, ValueError, KeyError):
+        return None
+
+def load_table(path=DEFAULT_ODDS_PATH, build=True, composition='deck', **build_options):
+    """Memory-map the table, building and saving it first if it is missing or stale
+
+    A table built for another deck composition is rebuilt, or refused with a
+    ValueError when build is False
+    """
+    if isinstance(composition, str):
+        composition = deck_composition(composition)
+    if not os.path.exists(path):
+        if not build:
+            raise FileNotFoundError(path)
+    elif table_composition(path) != list(composition):
+        if not build:
+            raise ValueError(f"{path} was built for a different deck composition")
+    else:
+        return np.load(path, mmap_mode='r')
+    save_table(build_table(composition=composition, **build_options), path, composition)
+    return np.load(path, mmap_mode='r')
+
+def load_odds(path=DEFAULT_ODDS_PATH):
+    """Get lookups against a built table, or None if launch_game.py --build-odds has not run"""
+    return WinOdds(path) if os.path.exists(path) else None
+
+class WinOdds:
+    """O(1) "chance to flip out" lookups against a memory-mapped table"""
+
+    def __init__(self, path=DEFAULT_ODDS_PATH, table=None, composition='deck'):
+        self.path = path
+        self.table = table  # Loaded on first use unless given
+        self.composition = composition  # Deck the table must have been built for
+
+    def get_table(self):
+        if self.table is None:
+            self.table = load_table(self.path, composition=self.composition)
+        return self.table
+
+    def chance(self, turns, unheld, held, needed, wilds, unseen_wilds, unseen):
+        """Get the probability of completing the collection within turns turns"""
+        table = self.get_table()
+        if needed <= 0:
+            return 1.0
+        turns = min(turns, table.shape[0] - 1)
+        wilds = min(wilds, table.shape[4] - 1)
+        unseen_wilds = min(unseen_wilds, table.shape[5] - 1)
+        unseen = min(unseen, table.shape[6] - 1)
+        return float(table[turns, unheld, held, needed, wilds, unseen_wilds, unseen])
+
+    def state_position(self, state, seat):
+        """Reduce what a player can see to (unheld, held, needed, wilds, unseen_wilds, unseen)"""
+        hand = state.hand_counts(seat)
+        moods = state.moods[seat * MOOD_SLOTS:(seat + 1) * MOOD_SLOTS]
+        missing = [mood for mood in range(NUM_MOODS) if not moods[mood]]
+        held = sum(1 for mood in missing if hand[mood])
+        seen_wilds = hand[WILD_MOOD_ID] + state.discards[WILD_MOOD_ID] + sum(
+            state.moods[other * MOOD_SLOTS + WILD_SLOT] for other in range(state.num_players))
+        others_hands = sum(state.hands) - sum(hand)
+        unseen = len(state.deck) + others_hands
+        total_wilds = self.get_table().shape[5] - 1
+        return (len(missing) - held, held, state.moods_needed(seat), hand[WILD_MOOD_ID],
+                max(0, total_wilds - seen_wilds), unseen)
+
+    def state_chance(self, state, seat, turns):
+        """Get a player's chance to flip out within turns turns, from what they can see"""
+        return self.chance(turns, *self.state_position(state, seat))
+
+    def score(self, state, seat, turns=SCORE_TURNS):
+        """Sum a player's chances to flip out within 1 to turns turns; higher means sooner"""
+        position = self.state_position(state, seat)
+        return sum(self.chance(k, *position) for k in range(1, turns + 1))
+
+    def leader(self, state, turns=SCORE_TURNS):
+        """Get the seat likeliest to flip out soonest, or -1 on a tie"""
+        best, best_score, tied = -1, -1.0, False
+        for seat in range(state.num_players):
+            score = self.score(state, seat, turns)
+            if score > best_score:
+                best, best_score, tied = seat, score, False
+            elif score == best_score:
+                tied = True
+        return -1 if tied else best
@@ -1,14 +1,152 @@
 from constants import *
+from card import CARD_KIND_MOOD, CARD_KIND_SWING, WILD_MOOD_ID, NUM_CARD_TYPES
+from events import CARD_MOVED, MOOD_ADDED, MOOD_REMOVED, HAND_SWAPPED, BLOCK_CHANGED
+
+NUM_MOODS = len(MOOD_TYPES)
+ALL_MOODS_MASK = (1 << NUM_MOODS) - 1
+# Number of distinct moods in each mood bitmask
+MOOD_MASK_SIZES = [bin(mask).count('1') for mask in range(1 << NUM_MOODS)]
+
+class CardPile(list):
+    """A list of cards that keeps per-type counts and a mood bitmask up to date"""
+    
+    def __init__(self, cards=(), listener=None):
+        super().__init__()
+        self.counts = [0] * NUM_CARD_TYPES
+        self.mood_mask = 0
+        self.version = 0  # Bumped on every change, so caches can tell the pile changed
+        self.listener = listener  # Optional listener(card, added) called on every change
+        self.extend(cards)
+    
+    def __reduce__(self):
+        # Rebuild through __init__ so the counters exist before the cards are added back;
+        # the listener is restored afterwards so reloading the cards emits no events
+        return (self.__class__, (list(self),), {'listener': self.listener})
+    
+    def _card_added(self, card):
+        self.version += 1
+        card_id = card.card_id
+        if card_id is not None:
+            self.counts[card_id] += 1
+            if card_id < NUM_MOODS:
+                self.mood_mask |= 1 << card_id
+        if self.listener is not None:
+            self.listener(card, True)
+    
+    def _card_removed(self, card):
+        self.version += 1
+        card_id = card.card_id
+        if card_id is not None:
+            self.counts[card_id] -= 1
+            if card_id < NUM_MOODS and self.counts[card_id] == 0:
+                self.mood_mask &= ~(1 << card_id)
+        if self.listener is not None:
+            self.listener(card, False)
+    
+    def append(self, card):
+        super().append(card)
+        self._card_added(card)
+    
+    def extend(self, cards):
+        for card in cards:
+            self.append(card)
+    
+    def __iadd__(self, cards):
+        self.extend(cards)
+        return self
+    
+    def insert(self, index, card):
+        super().insert(index, card)
+        self._card_added(card)
+    
+    def remove(self, card):
+        super().remove(card)
+        self._card_removed(card)
+    
+    def pop(self, index=-1):
+        card = super().pop(index)
+        self._card_removed(card)
+        return card
+    
+    def clear(self):
+        removed = list(self) if self.listener is not None else ()
+        super().clear()
+        self.counts = [0] * NUM_CARD_TYPES
+        self.mood_mask = 0
+        self.version += 1
+        for card in removed:
+            self.listener(card, False)
+    
+    def __setitem__(self, index, value):
+        removed = self[index] if isinstance(index, slice) else [self[index]]
+        added = list(value) if isinstance(index, slice) else [value]
+        super().__setitem__(index, added if isinstance(index, slice) else value)
+        for card in removed:
+            self._card_removed(card)
+        for card in added:
+            self._card_added(card)
+    
+    def __delitem__(self, index):
+        removed = self[index] if isinstance(index, slice) else [self[index]]
+        super().__delitem__(index)
+        for card in removed:
+            self._card_removed(card)
 
 class Player:
     """Represents a player in the game"""
-    def __init__(self, name, is_ai=False):
+    def __init__(self, name, is_ai=False, events=None):
         self.name = name
+        self.events = None  # Optional EventBus notified of every change
         self.hand = []  # Cards in hand
-        self.mood_cards = []  # Mood cards played face up
+        self.mood_cards = CardPile()  # Mood cards played face up, with running counts
         self.color = None  # Player color for UI
         self.is_ai = is_ai  # Whether this is an AI player
-        self.blocked_until = 0  # Turns blocked from certain actions
+        self._blocked_until = 0  # Turns blocked from certain actions
+        if events is not None:
+            self.attach_events(events)
+    
+    @property
+    def hand(self):
+        return self._hand
+    
+    @hand.setter
+    def hand(self, cards):
+        self._hand = cards if isinstance(cards, CardPile) else CardPile(cards)
+        self._hand.listener = self._hand_changed if self.events is not None else None
+        if self.events is not None:
+            self.events.emit(HAND_SWAPPED, player=self)
+    
+    @property
+    def mood_cards(self):
+        return self._mood_cards
+    
+    @mood_cards.setter
+    def mood_cards(self, cards):
+        self._mood_cards = cards if isinstance(cards, CardPile) else CardPile(cards)
+        self._mood_cards.listener = self._mood_changed if self.events is not None else None
+    
+    @property
+    def blocked_until(self):
+        return self._blocked_until
+    
+    @blocked_until.setter
+    def blocked_until(self, turns):
+        if turns != self._blocked_until:
+            self._blocked_until = turns
+            if self.events is not None:
+                self.events.emit(BLOCK_CHANGED, player=self, turns=turns)
+    
+    def attach_events(self, events):
+        """Start emitting change events to an EventBus"""
+        self.events = events
+        self._hand.listener = self._hand_changed
+        self._mood_cards.listener = self._mood_changed
+    
+    def _hand_changed(self, card, added):
+        self.events.emit(CARD_MOVED, player=self, zone='hand', card=card, added=added)
+    
+    def _mood_changed(self, card, added):
+        self.events.emit(MOOD_ADDED if added else MOOD_REMOVED, player=self, card=card)
     
     def add_card_to_hand(self, card):
         """Add a card to the player's hand"""
@@ -24,7 +162,7 @@ class Player:
         """Play a mood card from hand to the table"""
         if 0 <= card_index < len(self.hand):
             card = self.hand[card_index]
-            if hasattr(card, 'mood'):  # Check if it's a mood card
+            if card.kind == CARD_KIND_MOOD:
                 self.hand.pop(card_index)
                 self.mood_cards.append(card)
                 return card
@@ -34,14 +172,14 @@ class Player:
         """Play a mood swing card from hand"""
         if 0 <= card_index < len(self.hand):
             card = self.hand[card_index]
-            if hasattr(card, 'card_type'):  # Check if it's a swing card
+            if card.kind == CARD_KIND_SWING:
                 self.hand.pop(card_index)
                 return card
         return None
     
     def add_mood_card(self, card):
         """Add a mood card to the player's collection"""
-        if hasattr(card, 'mood'):
+        if card.kind == CARD_KIND_MOOD:
             self.mood_cards.append(card)
             return True
         return False
@@ -53,25 +191,33 @@ class Player:
             return True
         return False
     
+    def get_mood_mask(self):
+        """Get a bitmask of the moods collected, one bit per MOOD_TYPES entry"""
+        return self.mood_cards.mood_mask
+    
+    def get_wild_count(self):
+        """Get the number of wild moods in the player's collection"""
+        return self.mood_cards.counts[WILD_MOOD_ID]
+    
+    def get_missing_moods(self):
+        """Get the moods not yet collected, ignoring wild moods"""
+        mask = self.mood_cards.mood_mask
+        return [mood for i, mood in enumerate(MOOD_TYPES) if not mask & (1 << i)]
+    
+    def get_moods_needed(self):
+        """Get how many more moods are needed to win, after wild moods"""
+        missing = NUM_MOODS - MOOD_MASK_SIZES[self.mood_cards.mood_mask]
+        return max(0, missing - self.mood_cards.counts[WILD_MOOD_ID])
+    
     def get_mood_count(self):
-        """Get the count of unique moods the player has"""
-        unique_moods = set()
-        for card in self.mood_cards:
-            if hasattr(card, 'mood'):
-                unique_moods.add(card.mood)
-            elif hasattr(card, 'card_type') and card.card_type == 'wild_mood':
-                # Wild mood can represent any mood
-                return 5  # Maximum possible
-        return len(unique_moods)
+        """Get the count of unique moods the player has, each wild mood filling one gap"""
+        return NUM_MOODS - self.get_moods_needed()
     
     def has_mood(self, mood):
         """Check if player has a specific mood"""
-        for card in self.mood_cards:
-            if hasattr(card, 'mood') and card.mood == mood:
-                return True
-            elif hasattr(card, 'card_type') and card.card_type == 'wild_mood':
-                return True  # Wild mood can represent any mood
-        return False
+        if mood in MOOD_TYPES and self.mood_cards.mood_mask & (1 << MOOD_TYPES.index(mood)):
+            return True
+        return self.mood_cards.counts[WILD_MOOD_ID] > 0  # Wild mood can represent any mood
     
     def get_hand_size(self):
         """Get the number of cards in hand"""
@@ -83,7 +229,7 @@ class Player:
     
     def is_winner(self):
         """Check if player has won (all 5 moods)"""
-        return self.get_mood_count() >= 5
+        return self.get_moods_needed() == 0
     
     def is_blocked(self):
         """Check if player is currently blocked from certain actions"""
@@ -0,0 +1,236 @@
+"""
+Scenario and position generator for Flip Out! - The Mood Swing Card Game
+Builds valid mid-game positions directly from the deck composition instead
+of playing games until one looks right. Positions come out one at a time
+as SearchStates, as Player/Deck objects, or as NumPy arrays in a binary batch
+"""
+
+import random
+import numpy as np
+from constants import *
+from card import CARD_IDS, CARD_NAMES, CARD_KINDS, CARD_KIND_MOOD, NUM_CARD_TYPES, WILD_MOOD_ID
+from card import MoodCard, MoodSwingCard
+from game_config import BALANCE_SETTINGS
+from game_logic import Deck
+from player import Player, CardPile
+from search_state import SearchState, MOOD_SLOTS, WILD_SLOT
+
+NUM_MOODS = len(MOOD_TYPES)
+
+def deck_composition(source='deck'):
+    """Get copies per card id: 'deck' matches Deck.create_deck, 'balance' BALANCE_SETTINGS"""
+    if source == 'balance':
+        swing_counts = BALANCE_SETTINGS['swing_card_counts']
+        return ([BALANCE_SETTINGS['mood_cards_per_type']] * NUM_MOODS +
+                [swing_counts.get(name, 0) for name in SWING_CARD_TYPES])
+    return [DECK_MOOD_COPIES] * NUM_MOODS + [DECK_SWING_COPIES] * len(SWING_CARD_TYPES)
+
+class ScenarioError(ValueError):
+    """The requested scenario cannot be built from the deck composition"""
+
+class ScenarioGenerator:
+    """Builds random positions that satisfy a scenario spec, a NumPy batch at a time
+
+    needed: {seat: moods still needed (1-5, wilds counted)}
+    holds: {seat: card names that must be in the hand}
+    blocked: {seat: blocked_until}
+    Seats without a constraint get random values. Each collected mood is a
+    single card, plus a wild mood for about one seat in five
+    """
+
+    def __init__(self, num_players=4, seed=None, needed=None, holds=None, blocked=None,
+                 hand_sizes=(1, 8), max_discards=10, composition='deck', chunk_size=4096):
+        self.num_players = num_players
+        self.rng = np.random.default_rng(seed)
+        self.state_rng = random.Random(seed)  # Shared by the SearchStates streamed out
+        self.needed = dict(needed or {})
+        holds = holds or {}
+        unknown = [name for names in holds.values() for name in names if name not in CARD_IDS]
+        if unknown:
+            raise ScenarioError(f"Unknown cards: {', '.join(unknown)}")
+        self.holds = {seat: [CARD_IDS[name] for name in names] for seat, names in holds.items()}
+        self.blocked = dict(blocked or {})
+        self.hand_sizes = hand_sizes
+        self.max_discards = max_discards
+        if isinstance(composition, str):
+            composition = deck_composition(composition)
+        self.composition = np.asarray(composition, dtype=np.int16)
+        self.chunk_size = chunk_size
+        for seat, count in self.needed.items():
+            if not 1 <= count <= NUM_MOODS:
+                raise ScenarioError(f"Seat {seat} must need between 1 and {NUM_MOODS} moods")
+
+        # Deck slots in card id order, and each slot's rank among copies of its card
+        self.template = np.repeat(np.arange(NUM_CARD_TYPES, dtype=np.int8), self.composition)
+        starts = np.repeat(np.cumsum(self.composition) - self.composition, self.composition)
+        self.slot_ranks = np.arange(len(self.template)) - starts
+
+    def build_moods(self, batch, remaining, seat):
+        """Lay out one seat's mood collections so each needs the requested number of moods"""
+        rng, count = self.rng, len(remaining)
+        available = remaining[:, :NUM_MOODS] > 0
+        needed = self.needed.get(seat)
+        if needed is None:
+            # Unconstrained seats settle for whatever moods are left
+            floor = NUM_MOODS - available.sum(axis=1)
+            needed = np.maximum(rng.integers(1, NUM_MOODS + 1, size=count), np.maximum(floor, 1))
+        else:
+            needed = np.full(count, needed)
+        wilds = ((rng.random(count) < 0.2) & (remaining[:, WILD_MOOD_ID] > 0) &
+                 (needed < NUM_MOODS)).astype(np.int16)
+        collected = NUM_MOODS - needed - wilds
+        if np.any(collected > available.sum(axis=1)):
+            raise ScenarioError(f"Seat {seat} cannot collect {NUM_MOODS - self.needed[seat]} "
+                                "different moods with the cards left")
+
+        # Random ranks over the moods still available; the lowest ranks are collected
+        keys = np.where(available, rng.random((count, NUM_MOODS)), 2.0)
+        ranks = np.argsort(np.argsort(keys, axis=1), axis=1)
+        chosen = (ranks < collected[:, None]).astype(np.int16)
+        batch['moods'][:, seat, :NUM_MOODS] = chosen
+        batch['moods'][:, seat, WILD_SLOT] = wilds
+        remaining[:, :NUM_MOODS] -= chosen
+        remaining[:, WILD_MOOD_ID] -= wilds
+
+    def generate_batch(self, count):
+        """Generate count positions as a dict of NumPy arrays, one row per position"""
+        rng, players = self.rng, self.num_players
+        deck_size = len(self.template)
+        rows = np.arange(count)
+        batch = {
+            'hands': np.zeros((count, players, NUM_CARD_TYPES), dtype=np.int8),
+            'moods': np.zeros((count, players, MOOD_SLOTS), dtype=np.int8),
+            'blocked': np.zeros((count, players), dtype=np.int8),
+            'deck': np.full((count, deck_size), -1, dtype=np.int8),  # Top card last, -1 padded
+            'deck_size': np.zeros(count, dtype=np.int16),
+            'discards': np.zeros((count, NUM_CARD_TYPES), dtype=np.int8),
+            'current': rng.integers(0, players, size=count).astype(np.int8),
+            'turns': rng.integers(0, 61, size=count).astype(np.int16),
+        }
+        remaining = np.tile(self.composition, (count, 1))
+
+        # Constrained cards first, so random deals cannot use up what the spec needs
+        held = np.zeros(players, dtype=np.int64)
+        for seat, card_ids in self.holds.items():
+            for card_id in card_ids:
+                if remaining[0, card_id] == 0:
+                    raise ScenarioError(f"Not enough {CARD_NAMES[card_id]} cards for this scenario")
+                batch['hands'][:, seat, card_id] += 1
+                remaining[:, card_id] -= 1
+                held[seat] += 1
+        for seat in sorted(range(players), key=lambda seat: seat not in self.needed):
+            self.build_moods(batch, remaining, seat)
+
+        # Shuffle what is left of each row's deck, then deal hands, discards and the deck from it
+        left = remaining.sum(axis=1)
+        in_play = self.slot_ranks < remaining[:, self.template]
+        keys = np.where(in_play, rng.random(in_play.shape), 2.0)
+        cards = self.template[np.argsort(keys, axis=1)]
+
+        low, high = self.hand_sizes
+        sizes = np.maximum(rng.integers(low, high + 1, size=(count, players)) - held, 0)
+        ends = np.minimum(np.cumsum(sizes, axis=1), left[:, None])
+        dealt = ends[:, -1]
+        discard_end = dealt + np.minimum(rng.integers(0, self.max_discards + 1, size=count),
+                                         left - dealt)
+        slots = np.arange(deck_size)
+        # Seat each dealt slot goes to; slots past the hands get num_players
+        owner = (slots[None, :, None] >= ends[:, None, :]).sum(axis=2)
+        to_hand = owner < players
+        row_index = np.broadcast_to(rows[:, None], cards.shape)
+        hand_slots = (row_index[to_hand] * players + owner[to_hand]) * NUM_CARD_TYPES + cards[to_hand]
+        batch['hands'] += np.bincount(hand_slots, minlength=batch['hands'].size).reshape(
+            batch['hands'].shape).astype(np.int8)
+        to_discard = ~to_hand & (slots[None, :] < discard_end[:, None])
+        discard_slots = row_index[to_discard] * NUM_CARD_TYPES + cards[to_discard]
+        batch['discards'] += np.bincount(discard_slots, minlength=batch['discards'].size).reshape(
+            batch['discards'].shape).astype(np.int8)
+
+        deck_slots = discard_end[:, None] + slots[None, :]
+        in_deck = deck_slots < left[:, None]
+        deck_cards = np.take_along_axis(cards, np.minimum(deck_slots, deck_size - 1), axis=1)
+        batch['deck'] = np.where(in_deck, deck_cards, -1).astype(np.int8)
+        batch['deck_size'] = (left - discard_end).astype(np.int16)
+
+        batch['blocked'][:] = np.where(rng.random((count, players)) < 0.1, 2, 0)
+        for seat, turns in self.blocked.items():
+            batch['blocked'][:, seat] = turns
+        return batch
+
+    def __iter__(self):
+        """Stream positions as SearchStates forever"""
+        while True:
+            batch = self.generate_batch(self.chunk_size)
+            for row in range(self.chunk_size):
+                yield batch_state(batch, row, self.state_rng)
+
+def generate_positions(count, num_players=4, seed=None, **spec):
+    """Stream count positions matching a scenario spec as SearchStates"""
+    generator = ScenarioGenerator(num_players, seed, chunk_size=min(count, 4096) or 1, **spec)
+    for _, state in zip(range(count), generator):
+        yield state
+
+def generate_batch(count, num_players=4, seed=None, **spec):
+    """Generate count positions matching a scenario spec as a dict of NumPy arrays"""
+    return ScenarioGenerator(num_players, seed, **spec).generate_batch(count)
+
+def to_game(state):
+    """Turn a SearchState into (players, deck) game objects"""
+    piles = {card_id: [] for card_id in range(NUM_CARD_TYPES)}
+
+    def cards(card_id, count):
+        made = [MoodCard(CARD_NAMES[card_id]) if CARD_KINDS[card_id] == CARD_KIND_MOOD
+                else MoodSwingCard(CARD_NAMES[card_id]) for _ in range(count)]
+        piles[card_id].extend(made)
+        return made
+
+    players = []
+    for seat in range(state.num_players):
+        player = Player("You" if seat == 0 else f"AI Player {seat}", is_ai=seat != 0)
+        hand = []
+        for card_id in range(NUM_CARD_TYPES):
+            hand.extend(cards(card_id, state.hands[seat * NUM_CARD_TYPES + card_id]))
+        state.rng.shuffle(hand)
+        player.hand = hand
+        moods = []
+        for slot in range(MOOD_SLOTS):
+            card_id = WILD_MOOD_ID if slot == WILD_SLOT else slot
+            moods.extend(cards(card_id, state.moods[seat * MOOD_SLOTS + slot]))
+        player.mood_cards = moods
+        player.blocked_until = state.blocked[seat]
+        players.append(player)
+
+    deck = Deck(state.rng, state.reshuffle_discards)
+    deck_cards = [cards(card_id, 1)[0] for card_id in state.deck]
+    discards = [card for card_id, count in enumerate(state.discards)
+                for card in cards(card_id, count)]
+    deck.pool = [card for pile in piles.values() for card in pile]
+    deck.pool_index = {id(card): i for i, card in enumerate(deck.pool)}
+    deck.owns_pool = True
+    deck.order = [deck.pool_index[id(card)] for card in deck_cards]
+    deck.reorders += 1
+    deck.discard_pile = CardPile(discards)
+    return players, deck
+
+def save_batch(path, batch):
+    """Write a position batch to a compressed .npz file"""
+    np.savez_compressed(path, **batch)
+
+def load_batch(path):
+    """Read a position batch written by save_batch"""
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+def batch_state(batch, row, rng=None):
+    """Get one row of a position batch as a SearchState, current player about to draw"""
+    num_players = batch['hands'].shape[1]
+    state = SearchState(num_players, rng, BALANCE_SETTINGS['reshuffle_discards'])
+    state.hands = batch['hands'][row].ravel().tolist()
+    state.moods = batch['moods'][row].ravel().tolist()
+    state.blocked = batch['blocked'][row].tolist()
+    state.deck = batch['deck'][row, :batch['deck_size'][row]].tolist()
+    state.discards = batch['discards'][row].tolist()
+    state.current = int(batch['current'][row])
+    state.turns = int(batch['turns'][row])
+    state.rehash()
+    return state
@@ -0,0 +1,322 @@
+"""
+Compact game state for AI search in Flip Out! - The Mood Swing Card Game
+Hands, mood collections and the deck are flat lists of small integers, so
+clone() copies a few short lists and apply()/undo() step through
+hypothetical moves without creating or copying card objects. Every move
+also updates the position's Zobrist hash
+"""
+
+import random
+from constants import *
+from card import CARD_IDS, NUM_CARD_TYPES, WILD_MOOD_ID
+from actions import DRAW, PASS, DISCARD, card_actions, decode_action
+from engine import MAX_TURNS
+from zobrist import (MAX_COUNT, HAND_KEYS, MOOD_KEYS, DISCARD_KEYS, BLOCKED_KEYS, CURRENT_KEYS,
+                     PHASE_KEYS, full_hash)
+
+NUM_MOODS = len(MOOD_TYPES)
+MOOD_SLOTS = NUM_MOODS + 1  # One slot per mood plus a final slot for played wild moods
+WILD_SLOT = NUM_MOODS
+BLOCK_TURNS = 2
+
+STEAL_MOOD = CARD_IDS['steal_mood']
+SWAP_HANDS = CARD_IDS['swap_hands']
+BLOCK_MOOD = CARD_IDS['block_mood']
+DOUBLE_TROUBLE = CARD_IDS['double_trouble']
+
+class SearchState:
+    """Game position as card counts, with make/unmake moves for tree search"""
+
+    def __init__(self, num_players=4, rng=None, reshuffle_discards=False, max_turns=MAX_TURNS):
+        self.num_players = num_players
+        self.rng = rng if rng is not None else random.Random()  # Resolves random steals
+        self.reshuffle_discards = reshuffle_discards
+        self.max_turns = max_turns
+        self.hands = [0] * (num_players * NUM_CARD_TYPES)  # seat * NUM_CARD_TYPES + card id
+        self.moods = [0] * (num_players * MOOD_SLOTS)  # seat * MOOD_SLOTS + mood slot
+        self.blocked = [0] * num_players
+        self.deck = []  # Card ids still in the deck; the top card is last
+        self.discards = [0] * NUM_CARD_TYPES
+        self.current = 0
+        self.phase = 'draw'  # draw, play, discard
+        self.turns = 0
+        self.winner = -1
+        self.hash = full_hash(self)  # Kept current by apply()/undo(); call rehash() after edits
+
+    @classmethod
+    def from_game(cls, game):
+        """Capture a HeadlessGame"""
+        winner = game.logic.winner
+        return cls.from_objects(game.players, game.deck, game.current_seat(), game.turn_phase,
+                                game.turns_played, game.players.index(winner) if winner else -1,
+                                random.Random(game.rng.random()), game.max_turns)
+
+    @classmethod
+    def from_objects(cls, players, deck, current, phase='draw', turns=0, winner=-1, rng=None,
+                     max_turns=MAX_TURNS):
+        """Capture players and a Deck, such as those of the game window"""
+        state = cls(len(players), rng, deck.reshuffle_discards, max_turns)
+        for seat, player in enumerate(players):
+            base = seat * NUM_CARD_TYPES
+            for card_id, count in enumerate(player.hand.counts):
+                state.hands[base + card_id] = count
+            for card in player.mood_cards:
+                slot = WILD_SLOT if card.card_id == WILD_MOOD_ID else card.card_id
+                state.moods[seat * MOOD_SLOTS + slot] += 1
+            state.blocked[seat] = player.blocked_until
+        state.deck = [deck.pool[index].card_id for index in deck.order]
+        state.discards = list(deck.discard_pile.counts)
+        state.current = current
+        state.phase = phase
+        state.turns = turns
+        state.winner = winner
+        state.rehash()
+        return state
+
+    def clone(self):
+        """Copy the position; only the small count lists are duplicated"""
+        state = SearchState.__new__(SearchState)
+        state.num_players = self.num_players
+        state.rng = self.rng
+        state.reshuffle_discards = self.reshuffle_discards
+        state.max_turns = self.max_turns
+        state.hands = self.hands[:]
+        state.moods = self.moods[:]
+        state.blocked = self.blocked[:]
+        state.deck = self.deck[:]
+        state.discards = self.discards[:]
+        state.current = self.current
+        state.phase = self.phase
+        state.turns = self.turns
+        state.winner = self.winner
+        state.hash = self.hash
+        return state
+
+    def rehash(self):
+        """Recompute the hash after the lists were changed directly"""
+        self.hash = full_hash(self)
+        return self.hash
+
+    def bump(self, counts, keys, index, delta):
+        """Add delta to one count and update the hash to match"""
+        count = counts[index]
+        counts[index] = count + delta
+        self.hash ^= keys[index * MAX_COUNT + count] ^ keys[index * MAX_COUNT + count + delta]
+
+    def set_phase(self, phase):
+        self.hash ^= PHASE_KEYS[self.phase] ^ PHASE_KEYS[phase]
+        self.phase = phase
+
+    def hand_counts(self, seat):
+        """Get one player's hand as a list of counts per card id"""
+        base = seat * NUM_CARD_TYPES
+        return self.hands[base:base + NUM_CARD_TYPES]
+
+    def moods_needed(self, seat):
+        """Get how many moods a player still needs once wilds are counted"""
+        base = seat * MOOD_SLOTS
+        missing = sum(1 for slot in range(NUM_MOODS) if not self.moods[base + slot])
+        return max(0, missing - self.moods[base + WILD_SLOT])
+
+    def is_terminal(self):
+        """Check if the game has a winner or can no longer progress"""
+        if self.winner >= 0 or self.turns >= self.max_turns:
+            return True
+        exhausted = not self.deck and not (self.reshuffle_discards and any(self.discards))
+        return exhausted and not any(self.hands)
+
+    def legal_actions(self):
+        """Get the legal actions for the current player, as in actions.legal_actions"""
+        if self.phase == 'draw':
+            exhausted = not self.deck and not (self.reshuffle_discards and any(self.discards))
+            return [PASS] if exhausted else [DRAW]
+        seat = self.current
+        base = seat * NUM_CARD_TYPES
+        actions = [PASS]
+        if self.phase == 'play':
+            blocked = self.blocked[seat] > 0
+            for card_id in range(NUM_CARD_TYPES):
+                if self.hands[base + card_id]:
+                    actions.extend(card_actions(card_id, seat, self.num_players, blocked))
+        else:
+            for card_id in range(NUM_CARD_TYPES):
+                if self.hands[base + card_id]:
+                    actions.append(DISCARD + card_id)
+        return actions
+
+    def pick_card(self, seat):
+        """Pick a random card id from a player's hand, weighted by count (-1 if empty)"""
+        base = seat * NUM_CARD_TYPES
+        total = sum(self.hands[base:base + NUM_CARD_TYPES])
+        if not total:
+            return -1
+        pick = self.rng.randrange(total)
+        for card_id in range(NUM_CARD_TYPES):
+            pick -= self.hands[base + card_id]
+            if pick < 0:
+                return card_id
+        return -1
+
+    def apply(self, action, detail=None):
+        """Make a move and return the record undo() needs to take it back
+
+        detail fixes a random or chosen outcome: the card id taken by a steal, or
+        the mood slot removed by double trouble. When None, steals are drawn from
+        rng and double trouble removes the target's first collected mood
+        """
+        record = [action, self.phase, self.current, self.turns, self.winner, None, None, self.hash]
+        seat = self.current
+        kind, card_id, target = decode_action(action)
+
+        if self.phase == 'draw':
+            if action == DRAW:
+                if not self.deck and self.reshuffle_discards:
+                    record[6] = self.discards[:]  # Rare; restore the pile wholesale on undo
+                    self.recycle_discards()
+                if not self.deck:
+                    raise ValueError("Cannot draw from an exhausted deck; PASS is the legal move")
+                card = self.deck.pop()
+                self.bump(self.hands, HAND_KEYS, seat * NUM_CARD_TYPES + card, 1)
+                record[5] = card
+            self.set_phase('play')
+            return record
+
+        if self.phase == 'play':
+            if kind == 'play_mood':
+                self.bump(self.hands, HAND_KEYS, seat * NUM_CARD_TYPES + card_id, -1)
+                self.bump(self.moods, MOOD_KEYS, seat * MOOD_SLOTS + card_id, 1)
+            elif kind == 'play_swing':
+                record[5] = self.play_swing(seat, card_id, target, detail)
+            if self.moods_needed(seat) == 0:
+                self.winner = seat
+            self.set_phase('discard')
+            return record
+
+        if kind == 'discard':
+            self.bump(self.hands, HAND_KEYS, seat * NUM_CARD_TYPES + card_id, -1)
+            self.bump(self.discards, DISCARD_KEYS, card_id, 1)
+        self.turns += 1
+        self.current = (seat + 1) % self.num_players
+        self.hash ^= CURRENT_KEYS[seat] ^ CURRENT_KEYS[self.current]
+        record[5] = self.blocked[self.current]
+        if record[5]:
+            self.bump(self.blocked, BLOCKED_KEYS, self.current, -1)
+        self.set_phase('draw')
+        return record
+
+    def play_swing(self, seat, card_id, target, detail):
+        """Play a swing card and return what undo needs to reverse its effect"""
+        own = seat * NUM_CARD_TYPES
+        self.bump(self.hands, HAND_KEYS, own + card_id, -1)
+        if card_id == WILD_MOOD_ID:
+            self.bump(self.moods, MOOD_KEYS, seat * MOOD_SLOTS + WILD_SLOT, 1)
+            return None
+        self.bump(self.discards, DISCARD_KEYS, card_id, 1)
+        other = target * NUM_CARD_TYPES
+
+        if card_id == STEAL_MOOD:
+            stolen = self.pick_card(target) if detail is None else detail
+            if stolen >= 0:
+                self.bump(self.hands, HAND_KEYS, other + stolen, -1)
+                self.bump(self.hands, HAND_KEYS, own + stolen, 1)
+            return stolen
+        if card_id == SWAP_HANDS:
+            self.swap_hands(own, other)
+            return None
+        if card_id == BLOCK_MOOD:
+            previous = self.blocked[target]
+            self.bump(self.blocked, BLOCKED_KEYS, target, BLOCK_TURNS - previous)
+            return previous
+        if card_id == DOUBLE_TROUBLE:
+            base = target * MOOD_SLOTS
+            slot = detail
+            if slot is None:
+                slot = next((s for s in range(MOOD_SLOTS) if self.moods[base + s]), -1)
+            if slot >= 0 and self.moods[base + slot]:
+                self.bump(self.moods, MOOD_KEYS, base + slot, -1)
+                discarded = WILD_MOOD_ID if slot == WILD_SLOT else slot
+                self.bump(self.discards, DISCARD_KEYS, discarded, 1)
+                return slot
+            return -1
+        return None
+
+    def swap_hands(self, own, other):
+        """Exchange two hands, given their offsets in the hands list"""
+        hands = self.hands
+        for index in range(own, own + NUM_CARD_TYPES):
+            mine, theirs = hands[index], hands[index + other - own]
+            if mine != theirs:
+                self.hash ^= (HAND_KEYS[index * MAX_COUNT + mine] ^
+                              HAND_KEYS[index * MAX_COUNT + theirs] ^
+                              HAND_KEYS[(index + other - own) * MAX_COUNT + theirs] ^
+                              HAND_KEYS[(index + other - own) * MAX_COUNT + mine])
+        hands[own:own + NUM_CARD_TYPES], hands[other:other + NUM_CARD_TYPES] = \
+            hands[other:other + NUM_CARD_TYPES], hands[own:own + NUM_CARD_TYPES]
+
+    def undo(self, record):
+        """Take back a move made by apply()"""
+        action, phase, seat, turns, winner, undo_data, saved_discards, hash_value = record
+        kind, card_id, target = decode_action(action)
+        self.phase, self.current, self.turns, self.winner = phase, seat, turns, winner
+        self.hash = hash_value
+
+        if phase == 'draw':
+            if action == DRAW:
+                self.hands[seat * NUM_CARD_TYPES + undo_data] -= 1
+                self.deck.append(undo_data)
+                if saved_discards is not None:
+                    self.deck.clear()
+                    self.discards = saved_discards
+            return
+
+        if phase == 'play':
+            if kind == 'play_mood':
+                self.moods[seat * MOOD_SLOTS + card_id] -= 1
+                self.hands[seat * NUM_CARD_TYPES + card_id] += 1
+            elif kind == 'play_swing':
+                self.undo_swing(seat, card_id, target, undo_data)
+            return
+
+        if kind == 'discard':
+            self.discards[card_id] -= 1
+            self.hands[seat * NUM_CARD_TYPES + card_id] += 1
+        self.blocked[(seat + 1) % self.num_players] = undo_data
+
+    def undo_swing(self, seat, card_id, target, undo_data):
+        """Reverse play_swing()"""
+        own = seat * NUM_CARD_TYPES
+        if card_id == WILD_MOOD_ID:
+            self.moods[seat * MOOD_SLOTS + WILD_SLOT] -= 1
+            self.hands[own + card_id] += 1
+            return
+        self.discards[card_id] -= 1
+        other = target * NUM_CARD_TYPES
+
+        if card_id == STEAL_MOOD:
+            if undo_data >= 0:
+                self.hands[own + undo_data] -= 1
+                self.hands[other + undo_data] += 1
+        elif card_id == SWAP_HANDS:
+            hands = self.hands
+            hands[own:own + NUM_CARD_TYPES], hands[other:other + NUM_CARD_TYPES] = \
+                hands[other:other + NUM_CARD_TYPES], hands[own:own + NUM_CARD_TYPES]
+        elif card_id == BLOCK_MOOD:
+            self.blocked[target] = undo_data
+        elif card_id == DOUBLE_TROUBLE and undo_data >= 0:
+            self.moods[target * MOOD_SLOTS + undo_data] += 1
+            self.discards[WILD_MOOD_ID if undo_data == WILD_SLOT else undo_data] -= 1
+        # Returned last, so a reversed swap leaves the card in the player's own hand
+        self.hands[own + card_id] += 1
+
+    def recycle_discards(self):
+        """Shuffle the discard pile back in as the new deck"""
+        for card_id, count in enumerate(self.discards):
+            self.deck.extend([card_id] * count)
+            self.hash ^= DISCARD_KEYS[card_id * MAX_COUNT + count]
+        self.discards = [0] * NUM_CARD_TYPES
+        self.rng.shuffle(self.deck)
+
+    def key(self):
+        """Get a hashable snapshot of the position, for tests and tables"""
+        return (tuple(self.hands), tuple(self.moods), tuple(self.blocked), tuple(self.deck),
+                tuple(self.discards), self.current, self.phase, self.turns, self.winner)
@@ -0,0 +1,469 @@
+"""
+Self-play training for Flip Out! - The Mood Swing Card Game
+A small policy/value network reads each player's hand and mood area and
+scores every action of the fixed action space, and estimates the player's
+chance to win. Each generation plays games with the current network across
+a process pool. A candidate learns from them: its policy moves towards
+one-move lookahead with the win-chance head, and its win chance moves
+towards the games' outcomes. The candidate is kept only if it beats the
+current network head to head. Games run in lockstep, so the pending
+decisions of every AI seat in every running game are scored with one
+batched forward pass per step, and a learned AI move costs two small matrix
+products instead of a search
+"""
+
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from constants import *
+from card import NUM_CARD_TYPES, WILD_MOOD_ID
+from actions import ACTION_COUNT, PLAY_SWING, DISCARD
+from engine import POLICIES, HeadlessGame
+from ismcts import LookupPolicy
+from search_state import SearchState, MOOD_SLOTS
+
+NUM_MOODS = len(MOOD_TYPES)
+
+# Feature layout: own hand, own mood area and block, then each opponent in turn order
+# (hand size, block, mood area), then the discard pile, deck size and phase
+OWN_HAND = 0
+OWN_MOODS = OWN_HAND + NUM_CARD_TYPES
+OWN_BLOCKED = OWN_MOODS + MOOD_SLOTS
+OPPONENTS = OWN_BLOCKED + 1
+OPPONENT_FEATURES = 2 + MOOD_SLOTS
+DISCARDS = OPPONENTS + (MAX_PLAYERS - 1) * OPPONENT_FEATURES
+DECK_SIZE = DISCARDS + NUM_CARD_TYPES
+PHASE = DECK_SIZE + 1  # + 0 for play, + 1 for discard
+NUM_FEATURES = PHASE + 2
+COUNT_SCALE = 0.25
+DECK_SCALE = 1.0 / (NUM_MOODS * DECK_MOOD_COPIES + len(SWING_CARD_TYPES) * DECK_SWING_COPIES)
+
+HIDDEN_UNITS = 64
+LEARNING_RATE = 1e-3
+VALUE_WEIGHT = 0.5
+TARGET_TEMPERATURE = 0.02  # Win-chance gap that makes one move e times likelier in targets
+WEIGHT_DECAY = 1e-4
+DEFAULT_EPOCHS = 2
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_GAMES = 256  # Self-play games per generation
+DEFAULT_GATE_GAMES = 200  # Head-to-head games deciding whether a candidate is kept
+GATE_THRESHOLD = 0.55  # Share of decided head-to-head games a candidate must win
+DEFAULT_CHUNK_SIZE = 64  # Games one worker task plays in lockstep
+DEFAULT_MAX_TURNS = 200
+DEFAULT_NETWORK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'policy_net.npz')
+
+def encode_counts(row, hands, moods, blocked, seat, phase, deck_size, discards):
+    """Write one seat's view of a position into a feature row
+
+    hands, moods and blocked hold one entry per seat: hand counts by card id,
+    mood area counts by mood slot and turns blocked. Opponents' hands show only
+    their size
+    """
+    row[:] = 0.0
+    players = len(hands)
+    row[OWN_HAND:OWN_MOODS] = hands[seat]
+    row[OWN_MOODS:OWN_BLOCKED] = moods[seat]
+    row[OWN_BLOCKED] = blocked[seat]
+    for step in range(1, players):
+        other = (seat + step) % players
+        base = OPPONENTS + (step - 1) * OPPONENT_FEATURES
+        row[base] = sum(hands[other])
+        row[base + 1] = blocked[other]
+        row[base + 2:base + OPPONENT_FEATURES] = moods[other]
+    row[DISCARDS:DECK_SIZE] = discards
+    row[:DECK_SIZE] *= COUNT_SCALE
+    row[DECK_SIZE] = deck_size * DECK_SCALE
+    row[PHASE + (0 if phase == 'play' else 1)] = 1.0
+    return row
+
+def encode_state(state, seat=None, row=None):
+    """Encode a SearchState from one seat's view (default: the player to move)"""
+    seat = state.current if seat is None else seat
+    if row is None:
+        row = np.zeros(NUM_FEATURES, dtype=np.float32)
+    players = range(state.num_players)
+    return encode_counts(row, [state.hand_counts(other) for other in players],
+                         [state.moods[other * MOOD_SLOTS:(other + 1) * MOOD_SLOTS]
+                          for other in players],
+                         state.blocked, seat, state.phase, len(state.deck), state.discards)
+
+def encode_players(players, seat, phase, deck_size, discards, row=None):
+    """Encode Player objects' hands and mood areas from one seat's view
+
+    discards is the discard pile's counts by card id
+    """
+    if row is None:
+        row = np.zeros(NUM_FEATURES, dtype=np.float32)
+    moods = [player.mood_cards.counts[:NUM_MOODS] + [player.mood_cards.counts[WILD_MOOD_ID]]
+             for player in players]
+    return encode_counts(row, [player.hand.counts for player in players], moods,
+                         [player.blocked_until for player in players], seat, phase, deck_size,
+                         discards)
+
+def relative_action(action, seat, num_players, inverse=False):
+    """Number a swing card's target from the acting seat, as the features number opponents
+
+    With inverse=True, turn a relative action back into the action index
+    """
+    if not PLAY_SWING <= action < DISCARD:
+        return action
+    swing, target = divmod(action - PLAY_SWING, MAX_PLAYERS)
+    target = (target + seat if inverse else target - seat) % num_players
+    return PLAY_SWING + swing * MAX_PLAYERS + target
+
+def masked_softmax(logits, masks):
+    """Softmax over the legal actions of each row"""
+    logits = np.where(masks, logits, -np.inf)
+    logits -= logits.max(axis=1, keepdims=True)
+    weights = np.exp(logits)
+    return weights / weights.sum(axis=1, keepdims=True)
+
+def sigmoid(values):
+    """Squash win-chance logits into probabilities"""
+    return 1.0 / (1.0 + np.exp(-values))
+
+def sample_rows(probabilities, rng):
+    """Pick one action per row with the row's probabilities"""
+    cumulative = probabilities.cumsum(axis=1)
+    draws = rng.random(len(probabilities)) * cumulative[:, -1]
+    picks = (cumulative <= draws[:, None]).sum(axis=1)
+    return np.minimum(picks, probabilities.shape[1] - 1)
+
+class PolicyValueNet:
+    """One hidden layer shared by a policy head over the action space and a win-chance head"""
+
+    def __init__(self, params=None, hidden=HIDDEN_UNITS, seed=None):
+        if params is None:
+            rng = np.random.default_rng(seed)
+            params = {
+                'w1': rng.normal(0.0, NUM_FEATURES ** -0.5, (NUM_FEATURES, hidden)),
+                'b1': np.zeros(hidden),
+                'w2': rng.normal(0.0, 0.01, (hidden, ACTION_COUNT + 1)),
+                'b2': np.zeros(ACTION_COUNT + 1),
+            }
+        self.params = {name: value.astype(np.float32) for name, value in params.items()}
+        self.moments = None  # Adam state, created by the first training step
+        self.steps = 0
+
+    def copy(self):
+        """Get an independent network with the same weights"""
+        return PolicyValueNet({name: value.copy() for name, value in self.params.items()})
+
+    def forward(self, features):
+        """Get (hidden activations, action logits and win-chance logit) for a batch"""
+        params = self.params
+        hidden = np.maximum(features @ params['w1'] + params['b1'], 0.0)
+        return hidden, hidden @ params['w2'] + params['b2']
+
+    def evaluate(self, features, masks):
+        """Get (action probabilities, win chances) for a batch of rows and legal masks"""
+        _, outputs = self.forward(features)
+        return masked_softmax(outputs[:, :ACTION_COUNT], masks), sigmoid(outputs[:, ACTION_COUNT])
+
+    def action(self, state):
+        """Get the most likely legal action for the player to move in a SearchState"""
+        legal = state.legal_actions()
+        if len(legal) == 1:
+            return legal[0]
+        _, outputs = self.forward(encode_state(state)[None, :])
+        seat, players = state.current, state.num_players
+        return max(legal, key=lambda action: outputs[0, relative_action(action, seat, players)])
+
+    def train_step(self, features, masks, targets, outcomes, successors,
+                   learning_rate=LEARNING_RATE):
+        """One Adam step on the policy cross-entropy and win-chance losses; return the losses
+
+        successors are the positions the chosen moves led to, seen by the same
+        seats; they train only the win chance, which lookahead scores them with
+        """
+        params = self.params
+        count = len(features)
+        inputs = np.concatenate([features, successors])
+        outcomes = np.concatenate([outcomes, outcomes])
+        hidden, outputs = self.forward(inputs)
+        probabilities = masked_softmax(outputs[:count, :ACTION_COUNT], masks)
+        chances = sigmoid(outputs[:, ACTION_COUNT])
+
+        grad_outputs = np.zeros_like(outputs)
+        grad_outputs[:count, :ACTION_COUNT] = probabilities - targets
+        grad_outputs[:, ACTION_COUNT] = VALUE_WEIGHT * (chances - outcomes)
+        grad_outputs /= count
+        grad_hidden = (grad_outputs @ params['w2'].T) * (hidden > 0)
+        grads = {
+            'w2': hidden.T @ grad_outputs + WEIGHT_DECAY * params['w2'],
+            'b2': grad_outputs.sum(axis=0),
+            'w1': inputs.T @ grad_hidden + WEIGHT_DECAY * params['w1'],
+            'b1': grad_hidden.sum(axis=0),
+        }
+
+        if self.moments is None:
+            self.moments = {name: (np.zeros_like(value), np.zeros_like(value))
+                            for name, value in params.items()}
+        self.steps += 1
+        beta1, beta2 = 0.9, 0.999
+        for name, grad in grads.items():
+            first, second = self.moments[name]
+            first *= beta1
+            first += (1 - beta1) * grad
+            second *= beta2
+            second += (1 - beta2) * grad * grad
+            step = first / (1 - beta1 ** self.steps)
+            scale = np.sqrt(second / (1 - beta2 ** self.steps)) + 1e-8
+            params[name] -= (learning_rate * step / scale).astype(np.float32)
+
+        log_probabilities = np.log(np.maximum(probabilities, 1e-12))
+        policy_loss = float(-(targets * log_probabilities).sum(axis=1).mean())
+        value_loss = float(((chances - outcomes) ** 2).mean())
+        return policy_loss, value_loss
+
+    def fit(self, samples, epochs=DEFAULT_EPOCHS, batch_size=DEFAULT_BATCH_SIZE, seed=None):
+        """Train the policy towards the lookahead targets and the win chance towards outcomes"""
+        rng = np.random.default_rng(seed)
+        losses = (0.0, 0.0)
+        for _ in range(epochs):
+            order = rng.permutation(len(samples['outcomes']))
+            for start in range(0, len(order), batch_size):
+                batch = order[start:start + batch_size]
+                losses = self.train_step(samples['features'][batch], samples['masks'][batch],
+                                         samples['targets'][batch], samples['outcomes'][batch],
+                                         samples['successors'][batch])
+        return losses
+
+    def save(self, path=DEFAULT_NETWORK_PATH):
+        """Write the weights, replacing any earlier file whole"""
+        temporary = path + '.tmp.npz'
+        np.savez(temporary, **self.params)
+        os.replace(temporary, path)
+
+def load_network(path=DEFAULT_NETWORK_PATH):
+    """Load saved weights, or None if no network has been trained"""
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return PolicyValueNet({name: data[name] for name in data.files})
+
+def lookahead_targets(net, states, chosen, temperature=TARGET_TEMPERATURE):
+    """Get policy targets by scoring every legal move's result with the win-chance head
+
+    All successors of all states go through one forward pass, and a winning
+    move scores 1. chosen holds the relative action each state will take.
+    Returns (one row of relative-action probabilities per state, the features
+    of each chosen successor)
+    """
+    rows, owners, slots, wins, picked = [], [], [], [], []
+    for index, state in enumerate(states):
+        seat = state.current
+        for action in state.legal_actions():
+            child = state.clone()
+            child.apply(action)
+            slot = relative_action(action, seat, state.num_players)
+            if slot == chosen[index]:
+                picked.append(len(rows))
+            rows.append(encode_state(child, seat))
+            owners.append(index)
+            slots.append(slot)
+            wins.append(child.winner == seat)
+    rows = np.array(rows)
+    _, outputs = net.forward(rows)
+    values = np.where(wins, 1.0, sigmoid(outputs[:, ACTION_COUNT]))
+    logits = np.full((len(states), ACTION_COUNT), -np.inf)
+    logits[owners, slots] = values / temperature
+    logits -= logits.max(axis=1, keepdims=True)
+    weights = np.exp(logits)
+    return (weights / weights.sum(axis=1, keepdims=True)).astype(np.float32), rows[picked]
+
+def advance_forced(state):
+    """Make moves that offer no choice: draws, and phases where only passing is legal"""
+    while not state.is_terminal():
+        legal = state.legal_actions()
+        if state.phase != 'draw' and len(legal) > 1:
+            return legal
+        state.apply(legal[0])
+    return None
+
+def play_lockstep(nets, num_games, num_players=4, seed=None, seat_nets=None, greedy=False,
+                  record=False, max_turns=DEFAULT_MAX_TURNS):
+    """Play games side by side, scoring each network's pending decisions in one forward pass
+
+    seat_nets[game][seat] is the index in nets of the network playing that seat
+    (default: nets[0] everywhere). Returns (winner per game, samples), where
+    samples holds the features, masks, lookahead policy targets and final
+    outcomes of every decision when record is set
+    """
+    py_rng = random.Random(seed)
+    rng = np.random.default_rng(py_rng.getrandbits(32))
+    states = []
+    for _ in range(num_games):
+        state = SearchState.from_game(HeadlessGame(num_players, seed=py_rng.random()))
+        state.rng = py_rng
+        state.max_turns = max_turns
+        states.append(state)
+    if seat_nets is None:
+        seat_nets = [[0] * num_players for _ in range(num_games)]
+    features = np.zeros((num_games, NUM_FEATURES), dtype=np.float32)
+    masks = np.zeros((num_games, ACTION_COUNT), dtype=bool)
+    recorded = {'features': [], 'masks': [], 'targets': [], 'successors': [], 'games': [],
+                'seats': []}
+
+    active = list(range(num_games))
+    while active:
+        pending = [[] for _ in nets]
+        running = []
+        for game in active:
+            state = states[game]
+            legal = advance_forced(state)
+            if legal is None:
+                continue
+            running.append(game)
+            encode_state(state, row=features[game])
+            masks[game] = False
+            for action in legal:
+                masks[game, relative_action(action, state.current, num_players)] = True
+            pending[seat_nets[game][state.current]].append(game)
+        active = running
+        for net, games in zip(nets, pending):
+            if not games:
+                continue
+            rows = np.array(games)
+            probabilities, _ = net.evaluate(features[rows], masks[rows])
+            if greedy:
+                actions = probabilities.argmax(axis=1)
+            else:
+                actions = sample_rows(probabilities, rng)
+            if record:
+                recorded['features'].append(features[rows].copy())
+                recorded['masks'].append(masks[rows].copy())
+                targets, successors = lookahead_targets(net, [states[g] for g in games], actions)
+                recorded['targets'].append(targets)
+                recorded['successors'].append(successors)
+                recorded['games'].append(rows)
+                recorded['seats'].append(np.array([states[game].current for game in games]))
+            for game, action in zip(games, actions.tolist()):
+                state = states[game]
+                state.apply(relative_action(action, state.current, num_players, inverse=True))
+
+    winners = np.array([state.winner for state in states])
+    if not record:
+        return winners, None
+    if not recorded['games']:
+        return winners, empty_samples()
+    samples = {name: np.concatenate(parts) for name, parts in recorded.items()}
+    samples['outcomes'] = (winners[samples['games']] == samples['seats']).astype(np.float32)
+    return winners, samples
+
+def empty_samples():
+    """Create the samples of games in which no decision was recorded"""
+    return {'features': np.zeros((0, NUM_FEATURES), dtype=np.float32),
+            'masks': np.zeros((0, ACTION_COUNT), dtype=bool),
+            'targets': np.zeros((0, ACTION_COUNT), dtype=np.float32),
+            'successors': np.zeros((0, NUM_FEATURES), dtype=np.float32),
+            'games': np.zeros(0, dtype=np.int64), 'seats': np.zeros(0, dtype=np.int64),
+            'outcomes': np.zeros(0, dtype=np.float32)}
+
+def selfplay_chunk(task):
+    """Play a chunk of self-play games in a worker and return the recorded samples"""
+    params, num_games, num_players, seed, max_turns = task
+    _, samples = play_lockstep([PolicyValueNet(params)], num_games, num_players, seed,
+                               record=True, max_turns=max_turns)
+    return samples
+
+def gate_chunk(task):
+    """Play a chunk of candidate-against-incumbent games; return (candidate, incumbent) wins"""
+    candidate, incumbent, first_game, num_games, num_players, seed, max_turns = task
+    # Alternate the networks around the table, starting each game on the other network
+    seat_nets = [[(seat + first_game + game) % 2 for seat in range(num_players)]
+                 for game in range(num_games)]
+    winners, _ = play_lockstep([PolicyValueNet(candidate), PolicyValueNet(incumbent)], num_games,
+                               num_players, seed, seat_nets, greedy=True, max_turns=max_turns)
+    wins = [0, 0]
+    for game, winner in enumerate(winners.tolist()):
+        if winner >= 0:
+            wins[seat_nets[game][winner]] += 1
+    return wins
+
+def run_tasks(function, tasks, workers):
+    """Run tasks inline or across a process pool, keeping their order"""
+    if workers == 1:
+        return [function(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(function, tasks))
+
+def chunk_sizes(num_games, chunk_size):
+    """Split num_games into worker tasks of at most chunk_size games"""
+    return [min(chunk_size, num_games - start) for start in range(0, num_games, chunk_size)]
+
+def generate(net, num_games, num_players=4, seed=None, workers=1, chunk_size=DEFAULT_CHUNK_SIZE,
+             max_turns=DEFAULT_MAX_TURNS):
+    """Play self-play games with a network across workers and gather their samples"""
+    seed_rng = random.Random(seed)
+    tasks = [(net.params, size, num_players, seed_rng.getrandbits(32), max_turns)
+             for size in chunk_sizes(num_games, chunk_size)]
+    parts = run_tasks(selfplay_chunk, tasks, workers)
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+def gate(candidate, incumbent, num_games=DEFAULT_GATE_GAMES, num_players=4, seed=None, workers=1,
+         chunk_size=DEFAULT_CHUNK_SIZE, max_turns=DEFAULT_MAX_TURNS):
+    """Get the candidate's share of the decided head-to-head games against the incumbent"""
+    seed_rng = random.Random(seed)
+    tasks = []
+    first_game = 0
+    for size in chunk_sizes(num_games, chunk_size):
+        tasks.append((candidate.params, incumbent.params, first_game, size, num_players,
+                      seed_rng.getrandbits(32), max_turns))
+        first_game += size
+    wins = [0, 0]
+    for candidate_wins, incumbent_wins in run_tasks(gate_chunk, tasks, workers):
+        wins[0] += candidate_wins
+        wins[1] += incumbent_wins
+    decided = wins[0] + wins[1]
+    return wins[0] / decided if decided else 0.0
+
+def run_selfplay(generations, games=DEFAULT_GAMES, gate_games=DEFAULT_GATE_GAMES, num_players=4,
+                 seed=None, workers=None, path=DEFAULT_NETWORK_PATH):
+    """Run self-play generations from the saved network (or a fresh one) and keep the winners
+
+    Returns (network, one report per generation)
+    """
+    workers = workers or os.cpu_count() or 1
+    seed_rng = random.Random(seed)
+    net = (load_network(path) if path else None) or PolicyValueNet(seed=seed_rng.getrandbits(32))
+    history = []
+    for generation in range(generations):
+        start = time.perf_counter()
+        samples = generate(net, games, num_players, seed_rng.getrandbits(32), workers)
+        candidate = net.copy()
+        policy_loss, value_loss = candidate.fit(samples, seed=seed_rng.getrandbits(32))
+        win_rate = gate(candidate, net, gate_games, num_players, seed_rng.getrandbits(32),
+                        workers)
+        accepted = win_rate >= GATE_THRESHOLD
+        if accepted:
+            net = candidate
+            if path:
+                net.save(path)
+        history.append({'generation': generation, 'samples': len(samples['outcomes']),
+                        'policy_loss': policy_loss, 'value_loss': value_loss,
+                        'win_rate': win_rate, 'accepted': accepted,
+                        'elapsed': time.perf_counter() - start})
+    return net, history
+
+class NetworkPolicy(LookupPolicy):
+    """Engine policy that plays the trained network, or PriorityPolicy moves without one"""
+    name = 'network'
+
+    def __init__(self, rng=None, net=None):
+        super().__init__(rng)
+        self.net = net if net is not None else load_network()
+
+    @property
+    def ready(self):
+        return self.net is not None
+
+    def search(self, game):
+        """Score the legal moves with the network instead of searching"""
+        state = SearchState.from_game(game)
+        state.rng = self.rng
+        return self.net.action(state)
+
+POLICIES[NetworkPolicy.name] = NetworkPolicy
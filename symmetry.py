@@ -0,0 +1,122 @@
+"""
+Position symmetries for Flip Out! - The Mood Swing Card Game
+The five moods play identical roles in the rules, and seats only matter
+relative to the player to move. canonical() picks one representative of
+all mood relabelings and seat rotations of a position, so caches, opening
+books and precomputed tables store a position once instead of up to 120
+times per seat
+"""
+
+from constants import *
+from card import NUM_CARD_TYPES
+from actions import PLAY_MOOD, DISCARD, decode_action, play_swing_action
+from search_state import MOOD_SLOTS
+
+NUM_MOODS = len(MOOD_TYPES)
+
+class Symmetry:
+    """A mood relabeling plus a seat rotation
+
+    mood_map[m] is the new label of mood m, and seat s becomes seat
+    (s - offset) % num_players, so the player to move becomes seat 0
+    """
+    __slots__ = ('mood_map', 'offset', 'num_players')
+
+    def __init__(self, mood_map, offset, num_players):
+        self.mood_map = mood_map
+        self.offset = offset
+        self.num_players = num_players
+
+    def card(self, card_id):
+        """Relabel a card id; only mood cards change"""
+        return self.mood_map[card_id] if card_id < NUM_MOODS else card_id
+
+    def seat(self, seat):
+        return (seat - self.offset) % self.num_players
+
+    def action(self, action):
+        """Map an action in the original position to the canonical one"""
+        kind, card_id, target = decode_action(action)
+        if kind == 'play_mood':
+            return PLAY_MOOD + self.mood_map[card_id]
+        if kind == 'play_swing':
+            return play_swing_action(card_id, self.seat(target))
+        if kind == 'discard':
+            return DISCARD + self.card(card_id)
+        return action
+
+    def inverse(self):
+        """Get the symmetry that maps the canonical position back"""
+        mood_map = [0] * NUM_MOODS
+        for mood, label in enumerate(self.mood_map):
+            mood_map[label] = mood
+        return Symmetry(mood_map, -self.offset % self.num_players, self.num_players)
+
+    def apply(self, state):
+        """Build the relabeled copy of a position"""
+        players = state.num_players
+        result = state.clone()
+        card_map = list(self.mood_map) + list(range(NUM_MOODS, NUM_CARD_TYPES))
+        for seat in range(players):
+            new = self.seat(seat)
+            for card_id in range(NUM_CARD_TYPES):
+                result.hands[new * NUM_CARD_TYPES + card_map[card_id]] = \
+                    state.hands[seat * NUM_CARD_TYPES + card_id]
+            for slot in range(MOOD_SLOTS):
+                new_slot = self.mood_map[slot] if slot < NUM_MOODS else slot
+                result.moods[new * MOOD_SLOTS + new_slot] = state.moods[seat * MOOD_SLOTS + slot]
+            result.blocked[new] = state.blocked[seat]
+        for card_id in range(NUM_CARD_TYPES):
+            result.discards[card_map[card_id]] = state.discards[card_id]
+        result.deck = [card_map[card_id] for card_id in state.deck]
+        result.current = self.seat(state.current)
+        result.winner = self.seat(state.winner) if state.winner >= 0 else -1
+        result.rehash()
+        return result
+
+def mood_signature(state, mood, offset, deck_order):
+    """Everything the position says about one mood, seen from the player to move"""
+    players = state.num_players
+    signature = []
+    for step in range(players):
+        seat = (offset + step) % players
+        signature.append(state.hands[seat * NUM_CARD_TYPES + mood])
+        signature.append(state.moods[seat * MOOD_SLOTS + mood])
+    signature.append(state.discards[mood])
+    if deck_order:
+        signature.extend(position for position, card_id in enumerate(state.deck) if card_id == mood)
+    else:
+        signature.append(state.deck.count(mood))
+    return tuple(signature)
+
+def canonical_symmetry(state, deck_order=True):
+    """Find the symmetry that takes a position to its canonical form
+
+    Moods are relabeled in order of their signatures. Moods with equal
+    signatures are interchangeable, so ties cannot change the result. With
+    deck_order=False only the deck's contents count, as for a player who
+    cannot see the deck order
+    """
+    offset = state.current
+    signatures = [mood_signature(state, mood, offset, deck_order) for mood in range(NUM_MOODS)]
+    order = sorted(range(NUM_MOODS), key=signatures.__getitem__)
+    mood_map = [0] * NUM_MOODS
+    for label, mood in enumerate(order):
+        mood_map[mood] = label
+    return Symmetry(mood_map, offset, state.num_players)
+
+def canonical(state, deck_order=True):
+    """Get (canonical position, symmetry that maps the given position onto it)"""
+    symmetry = canonical_symmetry(state, deck_order)
+    result = symmetry.apply(state)
+    if not deck_order:
+        result.deck.sort()
+    return result, symmetry
+
+def canonical_key(state, deck_order=True):
+    """Get a hashable key shared by every symmetric variant of a position"""
+    return canonical(state, deck_order)[0].key()
+
+def canonical_hash(state, deck_order=True):
+    """Get the Zobrist hash of a position's canonical form"""
+    return canonical(state, deck_order)[0].hash
@@ -21,6 +21,13 @@ def test_card_classes():
     print(f"  Description: {steal_card.description}")
     print(f"  Effect: {steal_card.get_effect_description()}")
     
+    # Test flyweight layout: kind tags, shared ids and no per-card __dict__
+    from card import CARD_KIND_MOOD, CARD_KIND_SWING, CARD_IDS
+    assert angry_card.kind == CARD_KIND_MOOD and steal_card.kind == CARD_KIND_SWING
+    assert angry_card.card_id == CARD_IDS['angry']
+    assert not hasattr(angry_card, '__dict__') and not hasattr(steal_card, '__dict__')
+    print(f"✓ Card ids: {angry_card.card_id}, {steal_card.card_id}")
+    
     print()
 
 def test_player_class():
@@ -44,6 +51,32 @@ def test_player_class():
     print(f"  Mood cards: {len(player.mood_cards)}")
     print(f"  Hand_size: {len(player.hand)}")
     
+    # Test running mood counters through every way a collection changes
+    for mood in ['angry', 'happy', 'happy', 'sad']:
+        player.mood_cards.append(MoodCard(mood))
+    assert player.get_missing_moods() == ['scared', 'silly']
+    player.mood_cards.pop()
+    player.mood_cards.remove(player.mood_cards[1])
+    assert player.has_mood('happy') and not player.has_mood('sad')
+    player.mood_cards += [MoodSwingCard('wild_mood'), MoodCard('scared')]
+    assert player.get_moods_needed() == 2 and not player.is_winner()
+    player.mood_cards[0] = MoodCard('silly')
+    player.mood_cards.insert(0, MoodCard('angry'))
+    assert player.get_moods_needed() == 0 and player.is_winner()
+    player.mood_cards = []
+    assert player.get_mood_count() == 0
+    print("✓ Mood counters stay in sync with the collection")
+    assert not player.has_mood('grumpy'), "Unknown moods are simply not held"
+    
+    # Test players and their piles survive a pickle round trip, as for a process pool
+    import pickle
+    player.mood_cards += [MoodCard('sad'), MoodSwingCard('wild_mood')]
+    copy = pickle.loads(pickle.dumps(player))
+    assert [str(c) for c in copy.hand] == [str(c) for c in player.hand]
+    assert copy.mood_cards.counts == player.mood_cards.counts
+    assert copy.mood_cards.mood_mask == player.mood_cards.mood_mask and copy.has_mood('sad')
+    print("✓ Pickled a player with its counted piles")
+    
     print()
 
 def test_game_logic():
@@ -118,6 +151,829 @@ def test_deck_setup():
     
     print()
 
+def test_deck_recycling():
+    """Test seeded decks and discard pile recycling"""
+    print("Testing Deck Recycling...")
+    
+    import random
+    from game_logic import Deck
+    
+    first = Deck(random.Random(9))
+    second = Deck(random.Random(9))
+    first.shuffle()
+    second.shuffle()
+    assert [str(c) for c in first.cards] == [str(c) for c in second.cards]
+    print("✓ Decks with the same seed shuffle identically")
+    
+    deck = Deck(random.Random(1), reshuffle_discards=True)
+    total = deck.get_card_count()
+    drawn = [deck.draw() for _ in range(total)]
+    assert deck.is_empty() and deck.is_exhausted()
+    for card in drawn[:10]:
+        deck.discard(card)
+    assert deck.draw() in drawn[:10], "Empty deck should refill from the discard pile"
+    assert deck.get_card_count() == 9 and not deck.discard_pile
+    print(f"✓ Recycled discards into a {deck.get_card_count() + 1}-card deck")
+    
+    print()
+
+def test_change_events():
+    """Test the game model emits change events"""
+    print("Testing Change Events...")
+    
+    from events import EventBus, ANY_EVENT, CARD_MOVED, MOOD_ADDED, HAND_SWAPPED, BLOCK_CHANGED
+    from player import Player
+    from card import MoodCard
+    from engine import HeadlessGame
+    
+    bus = EventBus()
+    seen = []
+    bus.subscribe(ANY_EVENT, lambda event_type, data: seen.append(event_type))
+    
+    alice, bob = Player("Alice", events=bus), Player("Bob", events=bus)
+    alice.add_card_to_hand(MoodCard('sad'))
+    alice.play_mood_card(0)
+    alice.hand, bob.hand = bob.hand, alice.hand
+    bob.blocked_until = 2
+    assert seen == [CARD_MOVED, CARD_MOVED, MOOD_ADDED, HAND_SWAPPED, HAND_SWAPPED, BLOCK_CHANGED]
+    print(f"✓ Player emitted {len(seen)} events")
+    
+    seen.clear()
+    HeadlessGame(seed=3, events=bus).run()
+    assert MOOD_ADDED in seen and CARD_MOVED in seen
+    print(f"✓ Headless game emitted {len(seen)} events")
+    
+    print()
+
+def test_game_log():
+    """Test levelled logging, the ring buffer and the JSON-lines sink"""
+    print("Testing Game Log...")
+    
+    import json
+    import os
+    import tempfile
+    from game_log import GameLog, DEBUG, INFO
+    
+    path = os.path.join(tempfile.mkdtemp(), 'events.jsonl')
+    log = GameLog(level=INFO, capacity=3, sink_path=path)
+    log.debug('drag_started', card='happy')
+    for turn in range(5):
+        log.info('turn', turn=turn)
+    log.close_sink()
+    
+    assert [r['turn'] for r in log.recent()] == [2, 3, 4], "Ring buffer keeps the newest records"
+    with open(path) as f:
+        lines = [json.loads(line) for line in f]
+    assert len(lines) == 5 and all(line['event'] == 'turn' for line in lines)
+    print(f"✓ Buffered {len(log.recent())} records, wrote {len(lines)} JSON lines")
+    
+    print()
+
+def test_headless_engine():
+    """Test full headless games run without pygame or recursion"""
+    print("Testing Headless Engine...")
+    
+    from engine import play_game, run_games
+    
+    result = play_game(seed=42)
+    print(f"✓ Played seeded game: winner={result['winner']}, turns={result['turns']}")
+    assert result == play_game(seed=42), "Seeded games should be reproducible"
+    
+    stats = run_games(20, num_players=3, seed=7)
+    assert stats['games'] == 20
+    assert sum(stats['wins']) + stats['draws'] == 20
+    print(f"✓ Ran {stats['games']} games at {stats['games_per_second']:.0f} games/s")
+    
+    print()
+
+def test_batch_simulator():
+    """Test the NumPy batch simulator matches the object engine"""
+    print("Testing Batch Simulator...")
+    
+    import numpy as np
+    from batch_sim import BatchSimulator
+    from engine import run_games
+    
+    sim = BatchSimulator(2000, num_players=4, seed=3)
+    batch_stats = sim.run()
+    print(f"✓ Simulated {batch_stats['games']} games at {batch_stats['games_per_second']:.0f} games/s")
+    
+    # Every card is still accounted for once all games have finished
+    in_deck = sim.deck_size - sim.deck_top
+    in_play = sim.hands.sum(axis=(1, 2)) + sim.moods.sum(axis=(1, 2)) + sim.discards.sum(axis=1)
+    assert np.all(in_deck + in_play == sim.deck_size), "Cards must be conserved"
+    
+    engine_stats = run_games(500, num_players=4, seed=3)
+    batch_draw_rate = batch_stats['draws'] / batch_stats['games']
+    engine_draw_rate = engine_stats['draws'] / engine_stats['games']
+    assert abs(batch_draw_rate - engine_draw_rate) < 0.06
+    assert abs(batch_stats['average_turns'] - engine_stats['average_turns']) < 0.1 * engine_stats['average_turns']
+    print(f"✓ Draw rate {batch_draw_rate:.2f} vs {engine_draw_rate:.2f}, "
+          f"length {batch_stats['average_turns']:.1f} vs {engine_stats['average_turns']:.1f} turns")
+    
+    print()
+
+def test_tournament():
+    """Test chunked AI tournaments give the same results on any worker count"""
+    print("Testing Tournament Runner...")
+    
+    from tournament import run_tournament
+    
+    serial = run_tournament(40, ['random', 'priority'], seed=5, workers=1, chunk_size=15)
+    parallel = run_tournament(40, ['random', 'priority'], seed=5, workers=2, chunk_size=15)
+    assert serial['games'] == 40
+    assert serial['win_rates'] == parallel['win_rates']
+    assert serial['seat_win_rates'] == parallel['seat_win_rates']
+    default = run_tournament(40, ['random', 'priority'], seed=5, workers=2)
+    assert default['win_rates'] == serial['win_rates'], "Chunking must not change results"
+    print(f"✓ Win rates: {serial['win_rates']}")
+    
+    # Search and trained policies are imported on first lookup
+    from engine import POLICIES
+    assert 'network' in POLICIES and POLICIES['network'].name == 'network'
+    
+    print()
+
+def test_legal_actions():
+    """Test cached legal action masks agree with the game rules"""
+    print("Testing Legal Actions...")
+    
+    import random
+    from actions import (legal_actions, legal_action_mask, decode_action, ActionMaskCache,
+                         ACTION_COUNT, DRAW, PASS)
+    from engine import HeadlessGame, RandomPolicy
+    
+    cache = ActionMaskCache()
+    checked = []
+    
+    class CheckingPolicy(RandomPolicy):
+        def check(self, game, player):
+            actions, mask = legal_actions(game, player, cache)
+            assert len(mask) == ACTION_COUNT and PASS in actions
+            assert mask == legal_action_mask(game, player), "Cached mask must match a fresh one"
+            for action in actions:
+                kind, card_id, target = decode_action(action)
+                if kind == 'play_swing' and target != game.players.index(player):
+                    index = next(i for i, c in enumerate(player.hand) if c.card_id == card_id)
+                    assert game.logic.can_play_card(player, index)
+            checked.append(len(actions))
+        
+        def choose_play(self, game, player):
+            self.check(game, player)
+            return super().choose_play(game, player)
+        
+        def choose_discard(self, game, player):
+            self.check(game, player)
+            return super().choose_discard(game, player)
+    
+    game = HeadlessGame(seed=11, policies=[CheckingPolicy(random.Random(i)) for i in range(4)])
+    assert legal_actions(game, game.players[0])[0] == [DRAW]
+    game.run()
+    print(f"✓ Checked {len(checked)} masks, {sum(checked) / len(checked):.1f} legal actions on average")
+    
+    print()
+
+def test_search_state():
+    """Test make/unmake moves and cloning on the compact search state"""
+    print("Testing Search State...")
+    
+    import random
+    from actions import DRAW, PASS
+    from engine import HeadlessGame
+    from search_state import SearchState
+    
+    game = HeadlessGame(seed=21)
+    state = SearchState.from_game(game)
+    assert sum(state.hands) + len(state.deck) == 40
+    start = state.key()
+    
+    rng = random.Random(4)
+    records = []
+    while not state.is_terminal():
+        before = state.key()
+        copy = state.clone()
+        record = state.apply(rng.choice(state.legal_actions()))
+        assert copy.key() == before, "Clones must not share mutable state"
+        records.append(record)
+        if len(records) % 7 == 0:
+            state.undo(record)
+            assert state.key() == before, "Undo must restore the exact position"
+            records[-1] = state.apply(record[0])
+    total = sum(state.hands) + sum(state.moods) + len(state.deck) + sum(state.discards)
+    assert total == 40, "Cards must be conserved"
+    print(f"✓ Played {len(records)} moves to turn {state.turns}, winner seat {state.winner}")
+    
+    for record in reversed(records):
+        state.undo(record)
+    assert state.key() == start
+    print("✓ Undid every move back to the starting position")
+    
+    # With no deck and no discards to recycle, a draw is refused rather than crashing
+    state = SearchState(2)
+    assert state.legal_actions() == [PASS]
+    try:
+        state.apply(DRAW)
+        assert False, "Drawing from an exhausted deck must be refused"
+    except ValueError:
+        pass
+    assert state.phase == 'draw' and state.key() == SearchState(2).key()
+    print("✓ Refused a draw from an exhausted deck")
+    
+    print()
+
+def test_history():
+    """Test turn snapshots share unchanged parts and restore exactly"""
+    print("Testing Game History...")
+    
+    from types import SimpleNamespace
+    from engine import HeadlessGame
+    from history import GameHistory
+    
+    game = HeadlessGame(seed=8)
+    game.state = SimpleNamespace(turn_number=0, current_player_index=0, turn_phase='draw')
+    history = GameHistory()
+    history.record(game)
+    for turn in range(1, 13):
+        game.play_turn()
+        game.state.turn_number = turn
+        game.state.current_player_index = game.current_seat()
+        history.record(game)
+    
+    first, second = history.snapshots[0], history.snapshots[1]
+    assert first.deck is second.deck, "Draws should share the deck tuple"
+    assert any(a is b for a, b in zip(first.hands, second.hands)), "Untouched hands are shared"
+    
+    def view(g):
+        return ([list(p.hand) for p in g.players], [list(p.mood_cards) for p in g.players],
+                list(g.deck.order), list(g.deck.discard_pile))
+    
+    latest = view(game)
+    history.restore(game, history.jump_to_turn(4))
+    assert history.snapshots[4].deck_size == len(game.deck.order)
+    history.restore(game, history.jump_to_turn(12))
+    assert view(game) == latest, "Jumping back to the latest turn restores it exactly"
+    assert history.undo().turn == 11 and history.redo().turn == 12
+    print(f"✓ Recorded {len(history.snapshots)} turns; undo, redo and jumps restore them")
+    
+    print()
+
+def test_engine_process():
+    """Test the engine process plays AI games and answers renderer commands"""
+    print("Testing Engine Process...")
+    
+    import time
+    from types import SimpleNamespace
+    from actions import DRAW, PASS
+    from engine_process import EngineProcess, EngineServer, play_remote_game, hand_cards
+    
+    result = play_remote_game(seed=5, ai_type='random')
+    assert result is not None and result['turns'] > 0
+    print(f"✓ Remote AI game finished: winner={result['winner']}, turns={result['turns']}")
+    
+    engine = EngineProcess(seed=5, human_seats=(0,))
+    engine.start()
+    try:
+        def next_snapshot():
+            deadline = time.time() + 10
+            while time.time() < deadline:
+                snapshot = engine.poll()
+                if snapshot or engine.rejected:
+                    return snapshot
+                time.sleep(0.01)
+            raise AssertionError("Engine process did not answer")
+        
+        snapshot = next_snapshot()
+        assert snapshot['current'] == 0 and snapshot['legal_actions'] == [DRAW]
+        engine.act(PASS)
+        next_snapshot()
+        assert engine.rejected == [PASS], "Illegal actions are refused"
+        engine.act(DRAW)
+        snapshot = next_snapshot()
+        assert snapshot['phase'] == 'play' and len(hand_cards(snapshot, 0)) == 6
+        print("✓ Human actions are checked and applied in the engine process")
+    finally:
+        engine.stop()
+    
+    # AI seats search as in the window rather than playing at random
+    server = EngineServer(None, seed=5, ai_type='ismcts', difficulty='easy')
+    server.conn = SimpleNamespace(poll=lambda: False)
+    server.state.apply(DRAW)
+    action = server.ai_action()
+    assert action in server.state.legal_actions() and server.search.root.visits > 0
+    print(f"✓ Engine AI searched {server.search.root.visits} iterations for its move")
+    
+    print()
+
+def test_rules_fuzzer():
+    """Test the invariant fuzzer passes the rules and shrinks a planted bug"""
+    print("Testing Rules Fuzzer...")
+    
+    from fuzz import RulesFuzzer, run_fuzz, fuzz_seed, replay
+    from game_logic import GameLogic
+    
+    stats = run_fuzz(num_seeds=3, steps=3000, seed=2)
+    assert not stats['failures'], stats['failures']
+    print(f"✓ Fuzzed {stats['steps']} steps at {stats['steps_per_second']:.0f} steps/s")
+    
+    # Plant the old off-by-sign index check and let the fuzzer find it
+    original = GameLogic.can_play_card
+    GameLogic.can_play_card = lambda self, player, index: index < len(player.hand)
+    try:
+        violation = fuzz_seed(5, 3000)
+        assert violation is not None and violation.invariant == 'rejection'
+        assert len(violation.ops) < violation.step, "Shrinking should drop unrelated steps"
+        replayed = replay(violation.seed, violation.ops)
+        assert replayed is not None, "Shrunk sequence must still fail"
+        assert replayed.invariant == violation.invariant
+        assert replayed.step == len(violation.ops) - 1, "It must fail on its last operation"
+    finally:
+        GameLogic.can_play_card = original
+    print(f"✓ Shrunk a planted bug from {violation.step + 1} steps to {violation.ops}")
+    
+    # Replaying the recorded operations reproduces the run exactly, double trouble included
+    fuzzer = RulesFuzzer(7)
+    ops = []
+    for _ in range(3000):
+        ops.append(fuzzer.random_op())
+        fuzzer.step(ops[-1], generated=True)
+    again = RulesFuzzer(7)
+    again.run(ops)
+    assert any(len(op) == 3 for op in ops), "The run should include a double trouble"
+    assert (again.games, again.fingerprint()) == (fuzzer.games, fuzzer.fingerprint())
+    print(f"✓ Replayed {len(ops)} recorded operations to the same position")
+    
+    print()
+
+def test_scenarios():
+    """Test generated positions meet their spec and keep card totals"""
+    print("Testing Scenario Generator...")
+    
+    import os
+    import tempfile
+    import numpy as np
+    from scenarios import generate_positions, generate_batch, save_batch, load_batch, to_game
+    from card import CARD_IDS
+    
+    swap = CARD_IDS['swap_hands']
+    for state in generate_positions(500, seed=1, needed={0: 1}, holds={1: ['swap_hands']}):
+        assert state.moods_needed(0) == 1 and state.hand_counts(1)[swap] >= 1
+        assert sum(state.hands) + sum(state.moods) + len(state.deck) + sum(state.discards) == 40
+    print("✓ Streamed 500 positions with player 0 one mood short and a swap_hands opposite")
+    
+    batch = generate_batch(20000, seed=2)
+    totals = (batch['hands'].sum(axis=(1, 2)) + batch['moods'].sum(axis=(1, 2)) +
+              batch['discards'].sum(axis=1) + batch['deck_size'])
+    assert np.all(totals == 40)
+    path = os.path.join(tempfile.mkdtemp(), 'positions.npz')
+    save_batch(path, batch)
+    assert np.array_equal(load_batch(path)['deck'], batch['deck'])
+    print(f"✓ Saved and reloaded a {len(totals)}-position binary batch")
+    
+    players, deck = to_game(next(generate_positions(1, seed=3, needed={2: 2})))
+    assert players[2].get_moods_needed() == 2
+    in_game = deck.get_card_count() + len(deck.discard_pile)
+    in_game += sum(len(p.hand) + len(p.mood_cards) for p in players)
+    assert in_game == 40
+    print("✓ Built Player and Deck objects for a position")
+    
+    print()
+
+def test_ismcts():
+    """Test the ISMCTS AI finds a winning play and drives headless games"""
+    print("Testing ISMCTS AI...")
+    
+    import random
+    from actions import PLAY_MOOD
+    from engine import HeadlessGame, PriorityPolicy
+    from ismcts import ISMCTS, ISMCTSPolicy
+    from search_state import SearchState, MOOD_SLOTS
+    
+    # Seat 0 has four moods and holds the fifth
+    state = SearchState(3, random.Random(8))
+    for mood in range(4):
+        state.moods[mood] = 1
+        state.moods[MOOD_SLOTS + mood] = 1
+    state.hands[4] = 1
+    state.hands[10 + 5] = 2
+    state.hands[20 + 6] = 2
+    state.deck = [0, 1, 2, 3, 4, 8, 9, 7] * 3
+    state.phase = 'play'
+    start = state.key()
+    
+    search = ISMCTS(random.Random(3))
+    search.set_root(state)
+    assert search.best_action() in state.legal_actions(), "An unsearched root must still answer"
+    action = search.search(time_budget=None, iterations=300)
+    assert action == PLAY_MOOD + 4, "The search must take the winning mood"
+    assert state.key() == start, "Searching must not change the root position"
+    print(f"✓ Found the winning play in {search.iterations} iterations")
+    
+    budget = {'iterations': 30, 'time': None, 'rollout_turns': 16}
+    policies = [ISMCTSPolicy(random.Random(1), budget),
+                PriorityPolicy(random.Random(2)), PriorityPolicy(random.Random(3))]
+    result = HeadlessGame(3, policies=policies, seed=12, max_turns=60).run()
+    assert result['turns'] <= 60
+    print(f"✓ Played a headless game against priority AIs: winner={result['winner']}")
+    
+    print()
+
+def test_zobrist():
+    """Test incremental hashing and the transposition table"""
+    print("Testing Zobrist Hashing...")
+    
+    import random
+    from engine import HeadlessGame
+    from search_state import SearchState
+    from zobrist import TranspositionTable, full_hash, HAND_KEYS, MOOD_KEYS
+    
+    state = SearchState.from_game(HeadlessGame(seed=33))
+    rng = random.Random(6)
+    records = []
+    while not state.is_terminal():
+        records.append(state.apply(rng.choice(state.legal_actions())))
+        assert state.hash == full_hash(state), "The incremental hash must match a full rehash"
+    for record in reversed(records):
+        state.undo(record)
+    assert state.hash == full_hash(state)
+    print(f"✓ Incremental hash matched a full rehash over {len(records)} moves and undos")
+    
+    # Two mood cards collected in either order reach the same position
+    first, second = SearchState(2), SearchState(2)
+    for copy in (first, second):
+        copy.hands[0:2] = [1, 1]
+        copy.rehash()
+    first.hands[0], first.moods[0] = 0, 1
+    first.hands[1], first.moods[1] = 0, 1
+    second.bump(second.hands, HAND_KEYS, 1, -1)
+    second.bump(second.moods, MOOD_KEYS, 1, 1)
+    second.bump(second.hands, HAND_KEYS, 0, -1)
+    second.bump(second.moods, MOOD_KEYS, 0, 1)
+    assert second.hash == first.rehash(), "Transposed move orders must hash equally"
+    print("✓ Transposed move orders share a hash")
+    
+    table = TranspositionTable(4)
+    table.store(1, 'deep', priority=5)
+    table.store(5, 'shallow', priority=1)  # Same bucket; goes to the always-replace slot
+    table.store(9, 'newer', priority=1)  # Evicts 'shallow', keeps the preferred entry
+    assert table.get(1) == 'deep' and table.get(9) == 'newer' and table.get(5) is None
+    table.store(13, 'best', priority=7)  # Takes the preferred slot and demotes 'deep'
+    assert table.get(13) == 'best' and table.get(1) == 'deep' and table.get(9) is None
+    print("✓ Transposition table keeps high-priority entries when buckets collide")
+    
+    print()
+
+def test_symmetry():
+    """Test mood relabelings and seat rotations share one canonical form"""
+    print("Testing Symmetry Canonicalization...")
+    
+    import random
+    from engine import HeadlessGame
+    from search_state import SearchState
+    from symmetry import Symmetry, canonical, canonical_key
+    
+    rng = random.Random(9)
+    state = SearchState.from_game(HeadlessGame(seed=44))
+    for _ in range(60):
+        state.apply(rng.choice(state.legal_actions()))
+    canon, symmetry = canonical(state)
+    assert canonical(canon)[0].key() == canon.key(), "Canonical forms must be fixed points"
+    assert sorted(symmetry.action(a) for a in state.legal_actions()) == canon.legal_actions()
+    assert symmetry.inverse().apply(canon).key() == state.key()
+    
+    for _ in range(20):
+        moods = list(range(5))
+        rng.shuffle(moods)
+        variant = Symmetry(moods, rng.randrange(4), 4).apply(state)
+        assert canonical_key(variant) == canonical_key(state), "Symmetric positions must agree"
+    print("✓ 20 relabeled and rotated variants share one canonical form")
+    
+    positions = [state.clone() for _ in range(10)]
+    for position in positions:
+        for _ in range(30):
+            if not position.is_terminal():
+                position.apply(rng.choice(position.legal_actions()))
+    raw = {position.key() for position in positions}
+    assert len({canonical_key(p, deck_order=False) for p in positions}) <= len(raw)
+    print("✓ Legal actions and the inverse map carry over to the canonical form")
+    
+    print()
+
+def test_win_odds():
+    """Test the precomputed win-probability table against exact small cases"""
+    print("Testing Win Odds Table...")
+    
+    import os
+    import random
+    import tempfile
+    import numpy as np
+    from ismcts import ISMCTS
+    from odds import WinOdds, build_table, load_table, save_table
+    from search_state import SearchState
+    
+    table = build_table(max_turns=6)
+    assert np.all(np.diff(table, axis=0) >= -1e-6), "More turns can never lower the chance"
+    # One mood needed and held: certain next turn, impossible with no turns left
+    assert table[1, 0, 1, 1, 0, 0, 30] == 1.0 and table[0, 0, 1, 1, 0, 0, 30] == 0.0
+    # One unheld mood needed, 5 copies among 20 unseen cards, no wilds: 1 - (15/20)(14/19)
+    assert abs(table[2, 1, 0, 1, 0, 0, 20] - (1 - 15 / 20 * 14 / 19)) < 1e-6
+    print(f"✓ Built a {table.nbytes // 1024} KB table matching exact draw odds")
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'odds.npy')
+        save_table(table, path)
+        mapped = load_table(path, build=False)
+        assert isinstance(mapped, np.memmap) and np.array_equal(mapped, table)
+        odds = WinOdds(path)
+        state = SearchState(2)
+        state.moods[0:4] = [1, 1, 1, 1]
+        state.hands[4] = 1
+        state.deck = [0] * 20
+        assert odds.state_chance(state, 0, 1) == 1.0
+        assert odds.state_chance(state, 1, 4) == 0.0, "Five moods take at least five turns"
+        assert odds.leader(state) == 0, "Unfinished rollouts go to the player closest to winning"
+        search = ISMCTS(random.Random(3), odds=odds)
+        search.set_root(state)
+        search.search(None, 20)
+        assert search.score == odds.leader and search.iterations == 20
+        del odds, mapped, search
+        
+        # A table saved for another deck composition is refused rather than used
+        save_table(table, path, composition='balance')
+        try:
+            load_table(path, build=False)
+            assert False, "A stale table must not be loaded"
+        except ValueError:
+            pass
+    print("✓ Memory-mapped lookups answer for a search state")
+    
+    print()
+
+def test_ai_worker():
+    """Test background AI searches and the timeout fallback"""
+    print("Testing AI Worker...")
+    
+    import random
+    import time
+    from actions import PLAY_MOOD
+    from ai_worker import AIWorker, fallback_action
+    from engine import HeadlessGame
+    from search_state import SearchState
+    
+    state = SearchState.from_game(HeadlessGame(seed=55))
+    state.apply(state.legal_actions()[0])  # Draw; now in the play phase
+    worker = AIWorker()
+    try:
+        budget = {'iterations': 200, 'time': 5.0, 'rollout_turns': 8}
+        future = worker.submit(state.clone(), budget=budget)
+        future.result(timeout=30)
+        action, searched = worker.result(future, state)
+        assert searched and action in state.legal_actions()
+        print(f"✓ Worker process searched a move: action {action}")
+        
+        slow = worker.submit(state.clone(), budget={'iterations': None, 'time': 60.0,
+                                                    'rollout_turns': 8})
+        time.sleep(0.2)
+        start = time.perf_counter()
+        action, searched = worker.result(slow, state, grace=5.0)  # Due now: interrupt it
+        assert searched and action in state.legal_actions()
+        assert time.perf_counter() - start < 2.0, "An interrupted search must answer promptly"
+        print("✓ An interrupted search answers with its best move so far")
+    finally:
+        worker.shutdown()
+    
+    action, searched = worker.result(None, state)
+    assert not searched and action == fallback_action(state)
+    print("✓ Without a search result the window gets a quick fallback move")
+    
+    # The fallback plays a missing mood when it holds one
+    state = SearchState(2, random.Random(1))
+    state.hands[2] = 1
+    state.phase = 'play'
+    assert fallback_action(state) == PLAY_MOOD + 2
+    
+    print()
+
+def test_endgame_solver():
+    """Test exact endgame values, symmetry reuse and the disk memo"""
+    print("Testing Endgame Solver...")
+    
+    import os
+    import random
+    import tempfile
+    from actions import PLAY_MOOD
+    from endgame import EndgameSolver, survey
+    from card import NUM_CARD_TYPES
+    from search_state import MOOD_SLOTS, SearchState
+    from symmetry import Symmetry
+    
+    # Both seats hold their last missing mood, so the player to move must play it now
+    state = SearchState(2, random.Random(2))
+    state.moods[0:4] = [1, 1, 1, 1]
+    state.moods[MOOD_SLOTS:MOOD_SLOTS + 4] = [1, 1, 1, 1]
+    state.hands[4] = 1
+    state.hands[NUM_CARD_TYPES + 4] = 1
+    state.deck = [1, 2]
+    state.phase = 'play'
+    state.rehash()
+    solver = EndgameSolver(max_deck=2)
+    assert solver.solve(state) == (1.0, 0.0)
+    assert solver.best_action(state) == PLAY_MOOD + 4
+    
+    # Past the play step, seat 1 wins instead
+    state.phase = 'discard'
+    state.rehash()
+    assert solver.solve(state) == (0.0, 1.0)
+    variant = Symmetry([3, 0, 4, 1, 2], 1, 2).apply(state)
+    hits = solver.stats['memo_hits']
+    assert solver.solve(variant) == (1.0, 0.0), "A relabeled, rotated position reuses the memo"
+    assert solver.stats['memo_hits'] > hits
+    print("✓ Solved a forced win and reused it for a symmetric position")
+    
+    # The same cards under the other reshuffle rule are a different memo entry
+    reshuffled = state.clone()
+    reshuffled.reshuffle_discards = True
+    assert solver.canonicalize(reshuffled)[1] != solver.canonicalize(state)[1]
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'memo')
+        report = survey(5, max_deck=1, num_players=3, seed=8, memo_path=path)
+        assert report['solve_rate'] == 1.0 and report['table_size'] > 0
+        again = survey(5, max_deck=1, num_players=3, seed=8, memo_path=path)
+        assert again['attempted'] == 0, "Solved positions must be read back from disk"
+    print(f"✓ Solved {report['solved']} endgames into a {report['table_size']}-position disk memo")
+    
+    print()
+
+def test_cfr():
+    """Test the CFR abstraction, checkpoints and the exported policy table"""
+    print("Testing CFR Trainer...")
+    
+    import os
+    import random
+    import tempfile
+    import numpy as np
+    from cfr import (LEGAL, NUM_INFO_SETS, CFRPolicy, CFRTrainer, concrete_action, info_index,
+                     table_action)
+    from engine import HeadlessGame
+    from search_state import SearchState
+    
+    # Every abstract action legal in an information set maps to a legal move
+    rng = random.Random(4)
+    for seed in range(20):
+        state = SearchState.from_game(HeadlessGame(4, seed=seed))
+        state.rng = rng
+        while not state.is_terminal():
+            if state.phase != 'draw':
+                index = info_index(state)
+                assert 0 <= index < NUM_INFO_SETS
+                legal = state.legal_actions()
+                for abstract in np.flatnonzero(LEGAL[index]):
+                    assert concrete_action(state, abstract) in legal
+            state.apply(rng.choice(state.legal_actions()))
+    print("✓ Abstract actions map to legal moves in every information set reached")
+    
+    trainer = CFRTrainer(seed=1, horizon=4, batch_size=2)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'checkpoint.npz')
+        trainer.train(4, path)
+        assert trainer.games == 4 and trainer.iterations == 2 and trainer.visited() > 0
+        resumed = CFRTrainer()
+        resumed.load(path)
+        assert resumed.games == 4 and np.array_equal(resumed.regrets, trainer.regrets)
+        assert np.array_equal(resumed.strategy, trainer.strategy)
+    print(f"✓ Trained 4 games over {trainer.visited()} information sets and resumed a checkpoint")
+    
+    table = trainer.policy_table()
+    assert table.dtype == np.uint8 and not (table[~LEGAL]).any()
+    assert np.all(np.abs(table.sum(axis=1).astype(int) - 255) <= LEGAL.sum(axis=1))
+    state = SearchState.from_game(HeadlessGame(4, seed=9))
+    state.apply(state.legal_actions()[0])
+    assert table_action(table, state) in state.legal_actions()
+    policies = [CFRPolicy(random.Random(seat), table) for seat in range(4)]
+    result = HeadlessGame(4, policies, seed=9).run()
+    assert result['turns'] > 0
+    print(f"✓ A {table.nbytes // 1000} KB policy table played a full game "
+          f"in {result['turns']} turns")
+    
+    print()
+
+def test_selfplay():
+    """Test the network encodings, batched self-play, training and gating"""
+    print("Testing Self-Play Pipeline...")
+    
+    import os
+    import random
+    import tempfile
+    import numpy as np
+    from actions import ACTION_COUNT, play_swing_action
+    from card import CARD_IDS
+    from engine import HeadlessGame
+    from search_state import SearchState
+    from selfplay import (NUM_FEATURES, NetworkPolicy, PolicyValueNet, encode_players,
+                          encode_state, gate, generate, load_network, relative_action)
+    
+    # Player objects and the search state they are captured in encode the same way
+    game = HeadlessGame(4, seed=6)
+    for _ in range(12):
+        game.play_turn()
+    state = SearchState.from_game(game)
+    seat = state.current
+    if state.phase == 'draw':
+        state.phase = 'play'
+    row = encode_players(game.players, seat, state.phase, len(state.deck), state.discards)
+    assert row.shape == (NUM_FEATURES,) and np.array_equal(row, encode_state(state, seat))
+    steal = play_swing_action(CARD_IDS['steal_mood'], 3)
+    assert relative_action(relative_action(steal, 2, 4), 2, 4, inverse=True) == steal
+    print("✓ Player objects and search states encode identically")
+    
+    net = PolicyValueNet(seed=1)
+    samples = generate(net, 6, seed=2, chunk_size=3)
+    count = len(samples['outcomes'])
+    assert count > 0 and samples['features'].shape == (count, NUM_FEATURES)
+    assert samples['targets'].shape == (count, ACTION_COUNT)
+    assert np.allclose(samples['targets'].sum(axis=1), 1.0)
+    assert not (samples['targets'] * ~samples['masks']).any(), "Targets must be legal moves"
+    candidate = net.copy()
+    policy_loss, value_loss = candidate.fit(samples, epochs=1, seed=3)
+    assert np.isfinite(policy_loss) and np.isfinite(value_loss)
+    assert not np.array_equal(candidate.params['w1'], net.params['w1'])
+    print(f"✓ Trained a candidate on {count} batched self-play decisions")
+    
+    win_rate = gate(candidate, net, 4, seed=4, chunk_size=2)
+    assert 0.0 <= win_rate <= 1.0
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'net.npz')
+        candidate.save(path)
+        loaded = load_network(path)
+        assert all(np.array_equal(loaded.params[name], candidate.params[name])
+                   for name in candidate.params)
+    policies = [NetworkPolicy(random.Random(seat), loaded) for seat in range(4)]
+    result = HeadlessGame(4, policies, seed=5).run()
+    assert result['turns'] > 0
+    print(f"✓ Gated the candidate ({win_rate:.0%}) and played a game with the saved network")
+    
+    print()
+
+def test_pondering():
+    """Test that pondering another player's turn warms the AI's next search"""
+    print("Testing AI Pondering...")
+    
+    import random
+    import time
+    from actions import PASS
+    from ai_worker import AIWorker, fallback_action
+    from engine import HeadlessGame
+    from ismcts import ISMCTS
+    from search_state import SearchState
+    
+    # Seat 0 (the human) is in its discard phase; seat 1 moves next
+    state = SearchState.from_game(HeadlessGame(seed=31))
+    state.apply(state.legal_actions()[0])
+    state.apply(PASS)
+    budget = {'iterations': 300, 'time': None, 'rollout_turns': 8}
+    search = ISMCTS()
+    search.set_root(state, 1)
+    search.search_budget(budget)
+    
+    # Once the human keeps their hand, seat 1's search starts from the pondered subtree
+    state.apply(PASS)
+    search.set_root(state, 1)
+    reused = search.root.visits
+    assert reused > 0, "The position after the human's move was explored while pondering"
+    search.search_budget(dict(budget, iterations=reused))
+    assert search.iterations == 0, "A budget already covered by pondering needs no new search"
+    print(f"✓ Reused {reused} pondered visits for the AI's turn")
+    
+    # Pondering plays out likely moves and searches the positions seat 1 will play from
+    search = ISMCTS(random.Random(31))
+    assert search.ponder(state, 1, fallback_action, 0.3) > 0
+    assert search.root_state.current == 1 and search.root_state.phase == 'play'
+    assert search.root.visits > 0
+    print("✓ Pondering searched the AI's likely play positions")
+    
+    # Late in a game without reshuffles the pondering seat passes instead of drawing
+    late = state.clone()
+    late.deck, late.discards, late.reshuffle_discards = [], [0] * len(late.discards), False
+    late.rehash()
+    assert ISMCTS(random.Random(32)).ponder(late, 1, fallback_action, 0.3) >= 0
+    print("✓ Pondered a position with an exhausted deck")
+    
+    worker = AIWorker(use_processes=False)
+    try:
+        pondering = worker.ponder(state.clone(), 2, budget, ponder_time=30.0)
+        time.sleep(0.2)
+        start = time.perf_counter()
+        future = worker.submit(state.clone(), budget=dict(budget, iterations=50))
+        action = future.result(timeout=10)
+        assert action in state.legal_actions()
+        assert pondering.result(timeout=1) > 0
+        assert time.perf_counter() - start < 5.0, "A decision must interrupt pondering"
+    finally:
+        worker.shutdown()
+    print("✓ A decision interrupts pondering and is answered")
+    
+    print()
+
 def main():
     """Run all tests"""
     print("🎴 Testing Flip Out! Game Components\n")
@@ -127,6 +983,27 @@ def main():
         test_player_class()
         test_game_logic()
         test_deck_setup()
+        test_deck_recycling()
+        test_change_events()
+        test_game_log()
+        test_legal_actions()
+        test_search_state()
+        test_history()
+        test_engine_process()
+        test_rules_fuzzer()
+        test_scenarios()
+        test_ismcts()
+        test_zobrist()
+        test_symmetry()
+        test_win_odds()
+        test_ai_worker()
+        test_endgame_solver()
+        test_cfr()
+        test_selfplay()
+        test_pondering()
+        test_headless_engine()
+        test_batch_simulator()
+        test_tournament()
         
         print("🎉 All tests passed! The game is ready to play.")
         print("\nTo run the game:")
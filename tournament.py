@@ -0,0 +1,109 @@
+"""
+Process-pool AI tournament runner for Flip Out! - The Mood Swing Card Game
+Deals seeded games out to worker processes in chunks and gathers win
+rates, average game length and per-seat advantage
+"""
+
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from engine import MAX_TURNS, POLICIES, HeadlessGame
+from game_config import AI_SETTINGS
+
+# Worker tasks per worker: enough to balance uneven chunks, few enough to amortize IPC
+CHUNKS_PER_WORKER = 4
+
+def seat_assignment(competitors, game_index, num_players):
+    """Rotate competitors through the seats so no policy keeps the first move"""
+    return [competitors[(seat + game_index) % len(competitors)] for seat in range(num_players)]
+
+def empty_totals(competitors, num_players):
+    """Create zeroed tournament counters"""
+    return {
+        'games': 0,
+        'turns': 0,
+        'draws': 0,
+        'policy_wins': {name: 0 for name in competitors},
+        'policy_seats': {name: 0 for name in competitors},
+        'seat_wins': [0] * num_players,
+    }
+
+def play_chunk(task):
+    """Play a chunk of seeded games in a worker and return aggregated counts"""
+    competitors, first_game, seeds, num_players, max_turns = task
+    totals = empty_totals(competitors, num_players)
+
+    for offset, seed in enumerate(seeds):
+        names = seat_assignment(competitors, first_game + offset, num_players)
+        policy_rng = random.Random(seed)
+        policies = [POLICIES[name](random.Random(policy_rng.random())) for name in names]
+        result = HeadlessGame(num_players, policies, seed, max_turns).run()
+
+        totals['games'] += 1
+        totals['turns'] += result['turns']
+        for name in names:
+            totals['policy_seats'][name] += 1
+        if result['winner'] is None:
+            totals['draws'] += 1
+        else:
+            totals['seat_wins'][result['winner']] += 1
+            totals['policy_wins'][names[result['winner']]] += 1
+    return totals
+
+def merge_totals(combined, totals):
+    """Fold one chunk's counts into the running tournament totals"""
+    for key in ('games', 'turns', 'draws'):
+        combined[key] += totals[key]
+    for key in ('policy_wins', 'policy_seats'):
+        for name, count in totals[key].items():
+            combined[key][name] += count
+    for seat, wins in enumerate(totals['seat_wins']):
+        combined['seat_wins'][seat] += wins
+
+def run_tournament(num_games, competitors=None, num_players=4, seed=None, workers=None,
+                   chunk_size=None, max_turns=MAX_TURNS):
+    """Play a seeded AI tournament across a process pool
+
+    chunk_size defaults to an even share of CHUNKS_PER_WORKER tasks per worker
+    """
+    if competitors is None:
+        competitors = AI_SETTINGS['tournament_policies']
+    unknown = [name for name in competitors if name not in POLICIES]
+    if unknown:
+        raise ValueError(f"Unknown AI policies: {', '.join(unknown)}")
+
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(1, math.ceil(num_games / (workers * CHUNKS_PER_WORKER)))
+    seed_rng = random.Random(seed)
+    seeds = [seed_rng.getrandbits(32) for _ in range(num_games)]
+    tasks = [(competitors, start, seeds[start:start + chunk_size], num_players, max_turns)
+             for start in range(0, num_games, chunk_size)]
+
+    combined = empty_totals(competitors, num_players)
+
+    start_time = time.perf_counter()
+    if workers == 1:
+        for task in tasks:
+            merge_totals(combined, play_chunk(task))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for totals in executor.map(play_chunk, tasks):
+                merge_totals(combined, totals)
+    elapsed = time.perf_counter() - start_time
+
+    games = combined['games']
+    return {
+        'games': games,
+        'workers': workers,
+        'draws': combined['draws'],
+        'average_turns': combined['turns'] / games if games else 0.0,
+        # Wins per seat occupied, so policies are comparable however seats were shared
+        'win_rates': {name: combined['policy_wins'][name] / combined['policy_seats'][name]
+                      if combined['policy_seats'][name] else 0.0 for name in competitors},
+        'seat_win_rates': [wins / games if games else 0.0 for wins in combined['seat_wins']],
+        'elapsed': elapsed,
+        'games_per_second': games / elapsed if elapsed > 0 else float('inf'),
+    }
@@ -2,6 +2,9 @@ import pygame
 import os
 import math
 from constants import *
+from card import CARD_KIND_MOOD, CARD_KIND_SWING
+from game_log import game_log
+from odds import READOUT_TURNS
 import random
 from game_config import get_setting, update_setting, get_theme_colors, export_settings, import_settings
 
@@ -263,9 +266,9 @@ class UIManager:
                     # Scale to standard card size
                     image = pygame.transform.scale(image, (CARD_WIDTH, CARD_HEIGHT))
                     self.card_images[mood] = image
-                    print(f"✓ Loaded {mood} card image")
+                    game_log.debug('image_loaded', "✓ Loaded {card} card image", card=mood)
                 else:
-                    print(f"⚠ Warning: {image_path} not found")
+                    game_log.warning('image_missing', "⚠ Warning: {path} not found", path=image_path)
             
             # Load mood swing cards
             swing_dir = "image_assets/Moods_Swings"
@@ -284,12 +287,12 @@ class UIManager:
                     # Scale to standard card size
                     image = pygame.transform.scale(image, (CARD_WIDTH, CARD_HEIGHT))
                     self.card_images[card_type] = image
-                    print(f"✓ Loaded {card_type} card image")
+                    game_log.debug('image_loaded', "✓ Loaded {card} card image", card=card_type)
                 else:
-                    print(f"⚠ Warning: {image_path} not found")
+                    game_log.warning('image_missing', "⚠ Warning: {path} not found", path=image_path)
                     
         except Exception as e:
-            print(f"Error loading card images: {e}")
+            game_log.error('image_load_failed', "Error loading card images: {error}", error=e)
             # Fallback to colored rectangles if images fail to load
             self.card_images = {}
     
@@ -643,10 +646,10 @@ class UIManager:
             self.draw_player(player, i, state.current_player_index)
         
         # Draw deck
-        if deck and deck.cards:
+        if deck and not deck.is_empty():
             deck_x = WINDOW_WIDTH // 2 - 40
             deck_y = WINDOW_HEIGHT // 2 - CARD_HEIGHT // 2
-            self.draw_deck(deck_x, deck_y, len(deck.cards))
+            self.draw_deck(deck_x, deck_y, deck.get_card_count())
         
         # Draw discard pile
         if discard_pile:
@@ -714,7 +717,8 @@ class UIManager:
         discard_rect = discard_surface.get_rect(center=(discard_x + CARD_WIDTH // 2, discard_y + CARD_HEIGHT + 20))
         self.screen.blit(discard_surface, discard_rect)
     
-    def draw_player(self, player, player_index, current_player_index, selected_card, target_player):
+    def draw_player(self, player, player_index, current_player_index, selected_card=None,
+                    target_player=None):
         """Draw a player area with simplified positioning to fix UI issues"""
         # Use simple grid positioning instead of complex circular math
         # Ensure all players are visible within screen bounds
@@ -833,9 +837,9 @@ class UIManager:
             pygame.draw.rect(self.screen, (0, 0, 0, 100), shadow_rect)
         
         # Determine card image key
-        if hasattr(card, 'mood'):
+        if card.kind == CARD_KIND_MOOD:
             image_key = card.mood
-        elif hasattr(card, 'card_type'):
+        elif card.kind == CARD_KIND_SWING:
             image_key = card.card_type
         else:
             image_key = None
@@ -845,14 +849,14 @@ class UIManager:
             self.screen.blit(self.card_images[image_key], (x, y))
         else:
             # Fallback to colored rectangle
-            color = card.color if hasattr(card, 'color') else (100, 100, 100)
+            color = card.color
             pygame.draw.rect(self.screen, color, card_rect)
             pygame.draw.rect(self.screen, (255, 255, 255), card_rect, 2)
             
             # Draw card text
-            if hasattr(card, 'emoji'):
+            if card.kind == CARD_KIND_MOOD:
                 text = self.font_small.render(card.emoji, True, (0, 0, 0))
-            elif hasattr(card, 'description'):
+            elif card.kind == CARD_KIND_SWING:
                 text = self.font_small.render(card.description, True, (0, 0, 0))
             else:
                 text = self.font_small.render(card.name, True, (0, 0, 0))
@@ -881,10 +885,10 @@ class UIManager:
     def draw_card_tooltip(self, card, x, y):
         """Draw a tooltip showing card details when hovering"""
         # Determine tooltip text
-        if hasattr(card, 'mood'):
+        if card.kind == CARD_KIND_MOOD:
             tooltip_text = f"Mood: {card.mood.capitalize()}"
             tooltip_color = (255, 255, 255)
-        elif hasattr(card, 'card_type'):
+        elif card.kind == CARD_KIND_SWING:
             tooltip_text = f"Swing: {card.description}"
             tooltip_color = (255, 255, 0)
         else:
@@ -1221,10 +1225,10 @@ class UIManager:
             self.draw_player(player, i, state.current_player_index)
         
         # Draw deck
-        if deck and deck.cards:
+        if deck and not deck.is_empty():
             deck_x = WINDOW_WIDTH // 2 - 40
             deck_y = WINDOW_HEIGHT // 2 - CARD_HEIGHT // 2
-            self.draw_deck(deck_x, deck_y, len(deck.cards))
+            self.draw_deck(deck_x, deck_y, deck.get_card_count())
         
         # Draw discard pile
         if discard_pile:
@@ -1239,6 +1243,10 @@ class UIManager:
         # Draw turn phase indicator
         self.draw_turn_phase_indicator(state.turn_phase)
         
+        # Draw the chance to flip out, once the odds table is built
+        if state.flip_out_chance is not None:
+            self.draw_flip_out_chance(state.flip_out_chance)
+        
         # Draw game controls
         self.draw_game_controls(state.turn_phase)
         
@@ -1249,6 +1257,14 @@ class UIManager:
             card_y = mouse_pos[1] - CARD_HEIGHT // 2
             self.draw_card_image(drag_manager.dragged_card, card_x, card_y, highlight=True)
     
+    def draw_flip_out_chance(self, chance):
+        """Draw your chance to flip out within the next few turns"""
+        chance_text = f"Flip out in {READOUT_TURNS} turns: {chance:.0%}"
+        chance_font = pygame.font.Font(None, 28)
+        chance_surface = chance_font.render(chance_text, True, (255, 255, 255))
+        chance_rect = chance_surface.get_rect(center=(WINDOW_WIDTH - 170, WINDOW_HEIGHT - 30))
+        self.screen.blit(chance_surface, chance_rect)
+    
     def draw_turn_phase_indicator(self, turn_phase):
         """Draw the current turn phase indicator"""
         phase_text = f"Phase: {turn_phase.title()}"
@@ -0,0 +1,118 @@
+"""
+Zobrist hashing and a transposition table for Flip Out! - The Mood Swing Card Game
+A position hashes to the XOR of one random 64-bit key per (zone slot, count):
+hand and mood collection counts, discard pile counts, block counters, the
+player to move and the turn phase. The deck needs no keys of its own, since
+its contents are whatever cards are in no other zone. SearchState keeps its
+hash up to date on every move, so equal positions reached by different card
+orders share a key
+"""
+
+import random
+from constants import *
+from card import NUM_CARD_TYPES
+
+ZOBRIST_SEED = 0x5EED
+MAX_COUNT = 41  # Counts 0-40: a zone can never hold more cards than the deck has
+MOOD_SLOTS = len(MOOD_TYPES) + 1
+
+_rng = random.Random(ZOBRIST_SEED)
+
+def _keys(slots):
+    """Random keys for slots * MAX_COUNT counts; a count of zero hashes to nothing"""
+    return [0 if index % MAX_COUNT == 0 else _rng.getrandbits(64)
+            for index in range(slots * MAX_COUNT)]
+
+HAND_KEYS = _keys(MAX_PLAYERS * NUM_CARD_TYPES)  # (seat * NUM_CARD_TYPES + id) * MAX_COUNT + n
+MOOD_KEYS = _keys(MAX_PLAYERS * MOOD_SLOTS)      # (seat * MOOD_SLOTS + slot) * MAX_COUNT + n
+DISCARD_KEYS = _keys(NUM_CARD_TYPES)             # id * MAX_COUNT + n
+BLOCKED_KEYS = _keys(MAX_PLAYERS)                # seat * MAX_COUNT + blocked turns
+HAND_SIZE_KEYS = _keys(MAX_PLAYERS)              # seat * MAX_COUNT + cards held (observer keys)
+CURRENT_KEYS = [_rng.getrandbits(64) for _ in range(MAX_PLAYERS)]
+PHASE_KEYS = {phase: _rng.getrandbits(64) for phase in ('draw', 'play', 'discard')}
+
+def counts_hash(keys, counts):
+    """Hash one zone's list of counts"""
+    value = 0
+    for index, count in enumerate(counts):
+        value ^= keys[index * MAX_COUNT + count]
+    return value
+
+def full_hash(state):
+    """Hash a SearchState from scratch"""
+    return (counts_hash(HAND_KEYS, state.hands) ^ counts_hash(MOOD_KEYS, state.moods) ^
+            counts_hash(DISCARD_KEYS, state.discards) ^ counts_hash(BLOCKED_KEYS, state.blocked) ^
+            CURRENT_KEYS[state.current] ^ PHASE_KEYS[state.phase])
+
+def observer_hash(state, seat):
+    """Hash a position as one seat sees it: opponents' hands count only by their size"""
+    value = state.hash
+    hands = state.hands
+    for other in range(state.num_players):
+        if other == seat:
+            continue
+        base = other * NUM_CARD_TYPES
+        size = 0
+        for index in range(base, base + NUM_CARD_TYPES):
+            count = hands[index]
+            value ^= HAND_KEYS[index * MAX_COUNT + count]
+            size += count
+        value ^= HAND_SIZE_KEYS[other * MAX_COUNT + size]
+    return value
+
+class TranspositionTable:
+    """Fixed-size hash table of search results with two-way buckets
+
+    Each bucket keeps one preferred entry, replaced only by an entry of equal
+    or higher priority, and one entry that is always replaced. Searches pass
+    a priority such as the remaining depth or closeness to the root, so the
+    most valuable results survive when the table fills
+    """
+
+    def __init__(self, size=1 << 16):
+        self.mask = (1 << max(0, size - 1).bit_length()) - 1  # Buckets, rounded up to a power of 2
+        buckets = self.mask + 1
+        self.keys = [None] * (2 * buckets)
+        self.values = [None] * (2 * buckets)
+        self.priorities = [0] * (2 * buckets)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return sum(1 for key in self.keys if key is not None)
+
+    def get(self, key, default=None):
+        """Look up a stored value"""
+        slot = (key & self.mask) * 2
+        if self.keys[slot] == key:
+            self.hits += 1
+            return self.values[slot]
+        if self.keys[slot + 1] == key:
+            self.hits += 1
+            return self.values[slot + 1]
+        self.misses += 1
+        return default
+
+    def store(self, key, value, priority=0):
+        """Store a value, evicting the bucket's always-replace entry if need be"""
+        slot = (key & self.mask) * 2
+        keys, values, priorities = self.keys, self.values, self.priorities
+        if keys[slot + 1] == key:
+            values[slot + 1], priorities[slot + 1] = value, priority
+        elif keys[slot] == key or keys[slot] is None or priority >= priorities[slot]:
+            if keys[slot] is not None and keys[slot] != key:
+                # Demote the preferred entry rather than dropping it
+                keys[slot + 1], values[slot + 1] = keys[slot], values[slot]
+                priorities[slot + 1] = priorities[slot]
+            keys[slot], values[slot], priorities[slot] = key, value, priority
+        else:
+            keys[slot + 1], values[slot + 1], priorities[slot + 1] = key, value, priority
+
+    def clear(self):
+        """Forget every entry"""
+        for index in range(len(self.keys)):
+            self.keys[index] = None
+            self.values[index] = None
+            self.priorities[index] = 0
+        self.hits = 0
+        self.misses = 0